@@ -1,3 +1,4 @@
 from pybg.agents.base_agent import BaseAgent
 from pybg.agents.random_agent import RandomAgent
 from pybg.agents.human_agent import HumanAgent
+from pybg.agents.search_agent import SearchAgent
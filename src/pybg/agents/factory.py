@@ -1,9 +1,13 @@
 from gymnasium import spaces
 
-from pybg.agents import RandomAgent, HumanAgent, BaseAgent  # Example
+from pybg.agents import RandomAgent, HumanAgent, BaseAgent, SearchAgent
+from pybg.agents.search_agent import DEFAULT_TIME_MS
+from pybg.gnubg.hypergammon import perfect_play_search
 
 
-def create_agent(agent_type: str, player_type, game) -> BaseAgent:
+def create_agent(
+    agent_type: str, player_type, game, time_ms: float = DEFAULT_TIME_MS
+) -> BaseAgent:
     action_space = spaces.Discrete(len(game.actions))
     action_list = game.actions
 
@@ -11,5 +15,13 @@ def create_agent(agent_type: str, player_type, game) -> BaseAgent:
         return HumanAgent(player_type, game)
     elif agent_type == "random":
         return RandomAgent(action_space, action_list)
+    elif agent_type == "gnubg":
+        return SearchAgent(
+            action_space,
+            action_list,
+            time_ms=time_ms,
+            game=game,
+            search=perfect_play_search(game),
+        )
     else:
         raise ValueError(f"Unknown agent type: {agent_type}")
@@ -0,0 +1,72 @@
+from typing import List, Optional
+
+from pybg.agents import BaseAgent
+from pybg.core.logger import logger
+from pybg.gnubg.cube_decision import CubeDecisionEngine
+from pybg.gnubg.hypergammon import PerfectPlaySearch
+from pybg.gnubg.search import IterativeDeepeningSearch, SearchResult
+
+DEFAULT_TIME_MS = 1000
+
+
+class SearchAgent(BaseAgent):
+    """
+    Bot that picks its checker play with an anytime iterative-deepening search,
+    configured by a time budget per move rather than a fixed ply.
+
+    Given the game, it also doubles, takes and drops using the cube decision
+    engine; without it, it never doubles and always takes. A `search` with
+    the same interface, such as Hypergammon's perfect-play lookup, replaces
+    the iterative-deepening search.
+    """
+
+    def __init__(
+        self,
+        action_space,
+        action_list,
+        time_ms: float = DEFAULT_TIME_MS,
+        game=None,
+        cube_engine: Optional[CubeDecisionEngine] = None,
+        search: Optional[PerfectPlaySearch] = None,
+    ):
+        self._action_space = action_space
+        self._action_list = action_list
+        self.time_ms = time_ms
+        self.game = game
+        self.search = search or IterativeDeepeningSearch()
+        self.cube_engine = cube_engine or CubeDecisionEngine()
+        self.last_result: Optional[SearchResult] = None
+
+    def make_decision(self, observation=None, action_mask=None, legal_plays=None):
+        """
+        Returns a list of move actions forming the best play found within the
+        time budget, or a single non-move action like 'roll' or 'take'.
+        """
+        if legal_plays:
+            self.last_result = self.search.search(legal_plays, self.time_ms)
+            logger.debug(
+                f"Search depth {self.last_result.depth}, nodes {self.last_result.nodes}, "
+                f"{self.last_result.elapsed_ms:.0f}ms"
+            )
+            play = self.last_result.best_play
+            return [("move", m.source, m.destination) for m in play.moves]
+
+        valid = self._valid_actions(action_mask)
+        if self.game is not None and ("double" in valid or "take" in valid):
+            decision = self.cube_engine.decide(self.game)
+            logger.debug(f"Cube decision: {decision}")
+            if "double" in valid and decision.should_double:
+                return ["double"]
+            if "take" in valid and not decision.should_take and "drop" in valid:
+                return ["drop"]
+
+        for action in ("roll", "take", ("reject", "single")):
+            if action in valid:
+                return [action]
+
+        return ["pass"]
+
+    def _valid_actions(self, action_mask) -> List:
+        if action_mask is None:
+            return []
+        return [a for a, legal in zip(self._action_list, action_mask) if legal]
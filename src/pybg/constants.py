@@ -86,4 +86,6 @@ DEFAULT_SETTINGS = {
     "player_agent": "human",  # Options: "human", "random", "rl", "gnubg", "online"
     "opponent_agent": "random",  # Same as above
     "hint_top_n": 5,  # ← Add this!
+    "bot_time_ms": 1000,  # Search time budget per bot move
+    "hint_time_ms": 1000,  # Search time budget when ranking hints
 }
@@ -65,6 +65,204 @@ class Play(NamedTuple):
     position: Position
 
 
+def generate_plays(
+    position: Position,
+    dice: Tuple[int, int],
+    partial: bool = False,
+    checkers: int = CHECKERS,
+) -> List[Play]:
+    """
+    Generate and return the legal plays for `position` with `dice`.
+
+    This works on a bare Position, so evaluators and searches can expand
+    positions without building a Board (and its gym spaces) per node.
+
+    If `partial` is True, return all partial plays too (not just max-length).
+    """
+    # (position, dice left) nodes already expanded. A repeat, e.g. the same
+    # checkers moved in another order with doubles, can only reach final
+    # positions the first visit already produced, at the same play length
+    # and earlier in generation order, so it is skipped without changing
+    # the deduplicated result.
+    expanded = set()
+
+    def generate(
+        position: Position,
+        dice: Tuple[int, ...],
+        die: int,
+        moves: Tuple[Move, ...],
+        plays: List[Play],
+    ) -> List[Play]:
+        node = (position, dice[die:])
+        if node in expanded:
+            return plays
+        expanded.add(node)
+
+        if die < len(dice):
+            pips = dice[die]
+
+            if position.player_bar > 0:
+                new_position, destination = position.enter(pips)
+                if new_position:
+                    generate(
+                        new_position,
+                        dice,
+                        die + 1,
+                        moves + (Move(pips, -1, destination),),
+                        plays,
+                    )
+            elif sum(position.player_home()) + position.player_off == checkers:
+                for point in range(POINTS_PER_QUADRANT):
+                    new_position, destination = position.off(point, pips)
+                    if new_position:
+                        generate(
+                            new_position,
+                            dice,
+                            die + 1,
+                            moves + (Move(pips, point, destination),),
+                            plays,
+                        )
+            else:
+                for point, count in enumerate(position.board_points):
+                    if count <= 0:
+                        continue
+                    new_position, destination = position.move(point, pips)
+                    if new_position:
+                        generate(
+                            new_position,
+                            dice,
+                            die + 1,
+                            moves + (Move(pips, point, destination),),
+                            plays,
+                        )
+
+        plays.append(Play(moves, position))
+        return plays
+
+    if not any(d > 0 for d in dice):
+        return []
+
+    doubles = dice[0] == dice[1]
+    dice = tuple(dice) * 2 if doubles else tuple(dice)
+
+    plays: List[Play] = generate(position, dice, 0, (), [])
+    if not doubles:
+        plays = generate(position, dice[::-1], 0, (), plays)
+
+    if not partial and len(plays) > 0:
+        max_moves = max(len(p.moves) for p in plays)
+        plays = [p for p in plays if len(p.moves) == max_moves]
+
+    # Deduplicate by final position
+    seen = set()
+    unique_plays = []
+    for play in sorted(plays, key=lambda p: hash(p.position)):
+        h = hash(play.position)
+        if h not in seen:
+            seen.add(h)
+            unique_plays.append(play)
+
+    return unique_plays
+
+
+def generate_positions(
+    position: Position,
+    dice: Tuple[int, int],
+    checkers: int = CHECKERS,
+) -> List[Position]:
+    """
+    The distinct final positions of `generate_plays(position, dice)`, in no
+    particular order.
+
+    Without moves to track, each die steps a whole set of plain tuples (the
+    24 points, then player bar, player off and opponent bar) at once, and a
+    Position is only built per result. For callers that just score where a
+    roll can lead, such as the luck of every roll in a rollout.
+    """
+    if not any(d > 0 for d in dice):
+        return []
+
+    start = tuple(position.board_points) + (
+        position.player_bar,
+        position.player_off,
+        position.opponent_bar,
+    )
+    if dice[0] == dice[1]:
+        orders = [tuple(dice) * 2]
+    else:
+        orders = [tuple(dice), tuple(dice[::-1])]
+
+    # Only plays of the greatest length are legal, as in generate_plays.
+    longest, finals = 0, {start}
+    for order in orders:
+        states = {start}
+        for length, pips in enumerate(order, 1):
+            stepped = set()
+            for state in states:
+                stepped.update(_step_die(state, pips, checkers))
+            if not stepped:
+                break
+            states = stepped
+            if length > longest:
+                longest, finals = length, set()
+            if length == longest:
+                finals |= states
+
+    return [
+        Position(state[:24], state[24], state[25], state[26], position.opponent_off)
+        for state in finals
+    ]
+
+
+def _step_die(state: tuple, pips: int, checkers: int) -> List[tuple]:
+    """
+    Every state after moving one checker `pips` in a `generate_positions`
+    state, by the rules of `generate_plays`.
+    """
+    if state[24] > 0:
+        destination = POINTS - pips
+        if state[destination] >= -1:
+            return [_moved(state, -1, destination)]
+        return []
+
+    home = [n if n > 0 else 0 for n in state[:POINTS_PER_QUADRANT]]
+    if sum(home) + state[25] == checkers:
+        stepped = []
+        for point in range(POINTS_PER_QUADRANT):
+            if state[point] <= 0:
+                continue
+            destination = point - pips
+            if destination < 0:
+                if destination == -1 or not any(home[point + 1 :]):
+                    stepped.append(_moved(state, point, -1))
+            elif state[destination] >= -1:
+                stepped.append(_moved(state, point, destination))
+        return stepped
+
+    return [
+        _moved(state, point, point - pips)
+        for point in range(pips, POINTS)
+        if state[point] > 0 and state[point - pips] >= -1
+    ]
+
+
+def _moved(state: tuple, source: int, destination: int) -> tuple:
+    # Mirrors Position.apply_move; -1 is the bar as a source, off as a destination.
+    state = list(state)
+    if source == -1:
+        state[24] -= 1
+    else:
+        state[source] -= 1
+    if destination == -1:
+        state[25] += 1
+    elif state[destination] == -1:
+        state[destination] = 1
+        state[26] += 1
+    else:
+        state[destination] += 1
+    return tuple(state)
+
+
 # gym.Env
 class Board(gym.Env):
     checkers: int = CHECKERS
@@ -147,77 +345,7 @@ class Board(gym.Env):
 
         If `partial` is True, return all partial plays too (not just max-length).
         """
-
-        def generate(
-            position: Position,
-            dice: Tuple[int, ...],
-            die: int = 0,
-            moves: Tuple[Move, ...] = (),
-            plays: List[Play] = [],
-        ) -> List[Play]:
-            if die < len(dice):
-                pips = dice[die]
-
-                if position.player_bar > 0:
-                    new_position, destination = position.enter(pips)
-                    if new_position:
-                        generate(
-                            new_position,
-                            dice,
-                            die + 1,
-                            moves + (Move(pips, -1, destination),),
-                            plays,
-                        )
-                elif sum(position.player_home()) + position.player_off == self.checkers:
-                    for point in range(POINTS_PER_QUADRANT):
-                        new_position, destination = position.off(point, pips)
-                        if new_position:
-                            generate(
-                                new_position,
-                                dice,
-                                die + 1,
-                                moves + (Move(pips, point, destination),),
-                                plays,
-                            )
-                else:
-                    for point in range(len(position.board_points)):
-                        new_position, destination = position.move(point, pips)
-                        if new_position:
-                            generate(
-                                new_position,
-                                dice,
-                                die + 1,
-                                moves + (Move(pips, point, destination),),
-                                plays,
-                            )
-
-            plays.append(Play(moves, position))
-            return plays
-
-        if not any(d > 0 for d in self.match.dice):
-            return []
-
-        doubles = self.match.dice[0] == self.match.dice[1]
-        dice = self.match.dice * 2 if doubles else self.match.dice
-
-        plays = generate(self.position, dice)
-        if not doubles:
-            plays += generate(self.position, dice[::-1])
-
-        if not partial and len(plays) > 0:
-            max_moves = max(len(p.moves) for p in plays)
-            plays = [p for p in plays if len(p.moves) == max_moves]
-
-        # Deduplicate by final position
-        seen = set()
-        unique_plays = []
-        for play in sorted(plays, key=lambda p: hash(p.position)):
-            h = hash(play.position)
-            if h not in seen:
-                seen.add(h)
-                unique_plays.append(play)
-
-        return unique_plays
+        return generate_plays(self.position, self.match.dice, partial, self.checkers)
 
     def start(self, length: int = 3) -> None:
         """
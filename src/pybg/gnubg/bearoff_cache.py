@@ -0,0 +1,159 @@
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from pybg.constants import ASSETS_DIR
+
+CACHE_PATH = f"{ASSETS_DIR}/bearoff_cache.sqlite"
+
+# Entries kept per table before the oldest are evicted.
+MAX_ENTRIES = 1_000_000
+
+# Pending entries written per transaction.
+FLUSH_EVERY = 256
+
+# Record layout: one float32 per field (three for the cubeful equities), NaN
+# where a database does not produce the field.
+RECORD_FIELDS = (
+    "win_prob",
+    "gammon_prob",
+    "lose_gammon_prob",
+    "expected_rolls",
+    "equity",
+)
+CUBEFUL_FIELD = "cubeful_equity"
+RECORD_DTYPE = np.dtype("<f4")
+RECORD_SIZE = len(RECORD_FIELDS) + 3
+
+Key = Tuple[int, int]
+
+
+def encode_record(result: dict) -> bytes:
+    record = np.full(RECORD_SIZE, np.nan, dtype=RECORD_DTYPE)
+    for k, field in enumerate(RECORD_FIELDS):
+        if field in result:
+            record[k] = result[field]
+    if CUBEFUL_FIELD in result:
+        record[len(RECORD_FIELDS) :] = result[CUBEFUL_FIELD]
+    return record.tobytes()
+
+
+def decode_record(blob: bytes) -> dict:
+    record = np.frombuffer(blob, dtype=RECORD_DTYPE).astype(np.float64)
+    result = {
+        field: float(value)
+        for field, value in zip(RECORD_FIELDS, record)
+        if not np.isnan(value)
+    }
+    cubeful = record[len(RECORD_FIELDS) :]
+    if not np.isnan(cubeful).any():
+        result[CUBEFUL_FIELD] = [float(e) for e in cubeful]
+    return result
+
+
+class BearoffCache:
+    """
+    Persistent bearoff evaluations in an SQLite table, keyed by the
+    (player, opponent) bearoff index pair, with each result packed into a
+    fixed 32-byte float32 record.
+
+    New entries are buffered and written in small transactions, so saving
+    never rewrites the file. The file runs in WAL mode: any number of
+    processes can read while one writes. Once a table holds more than
+    `max_entries` rows, the oldest insertions are evicted.
+
+    Behaves like the dict it replaces (`in`, `[]`, `get`, `len`, `clear`).
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        table: str = "evaluations",
+        max_entries: int = MAX_ENTRIES,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.pending: Dict[Key, dict] = {}
+        self.connection = sqlite3.connect(path, timeout=30.0)
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "player INTEGER NOT NULL, opponent INTEGER NOT NULL, "
+            "record BLOB NOT NULL, UNIQUE (player, opponent))"
+        )
+        self.connection.commit()
+
+    def get(self, key: Key, default: Optional[dict] = None) -> Optional[dict]:
+        if key in self.pending:
+            return self.pending[key]
+        row = self.connection.execute(
+            f"SELECT record FROM {self.table} WHERE player = ? AND opponent = ?",
+            (int(key[0]), int(key[1])),
+        ).fetchone()
+        return decode_record(row[0]) if row else default
+
+    def __contains__(self, key: Key) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: Key) -> dict:
+        result = self.get(key)
+        if result is None:
+            raise KeyError(key)
+        return result
+
+    def __setitem__(self, key: Key, result: dict) -> None:
+        self.pending[key] = result
+        if len(self.pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._count()
+
+    def _count(self) -> int:
+        (count,) = self.connection.execute(
+            f"SELECT COUNT(*) FROM {self.table}"
+        ).fetchone()
+        return count
+
+    def flush(self) -> None:
+        """
+        Write pending entries in one transaction, then evict down to
+        `max_entries`.
+        """
+        if not self.pending:
+            return
+        rows = [
+            (int(player), int(opponent), encode_record(result))
+            for (player, opponent), result in self.pending.items()
+        ]
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (player, opponent, record) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            excess = self._count() - self.max_entries
+            if excess > 0:
+                self.connection.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN "
+                    f"(SELECT rowid FROM {self.table} ORDER BY rowid LIMIT ?)",
+                    (excess,),
+                )
+        self.pending.clear()
+
+    def clear(self) -> None:
+        self.pending.clear()
+        with self.connection:
+            self.connection.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.flush()
+            self.connection.close()
+            self.connection = None
@@ -1,47 +1,92 @@
 # bearoff_database.py
-import math
-
-import json
+import dataclasses
+import mmap
 import numpy as np
 import os
-import struct
+from typing import List, Optional, Tuple
 
-from pybg.core.board import Board
+from pybg.core.board import Board, Play
 from pybg.core.logger import logger
+from pybg.gnubg.bearoff_cache import CACHE_PATH, BearoffCache
+from pybg.gnubg.bearoff_index import (
+    bearoff_board,
+    bearoff_index,
+    bearoff_indices,
+    n_positions,
+)
 from pybg.gnubg.position import Position, PositionClass
 from pybg.constants import ASSETS_DIR
 
-CACHE_FILE = f"{ASSETS_DIR}/bearoff_cache.json"
 OS_PATH = f"{ASSETS_DIR}/gnubg/gnubg_os0.bd"
 TS_PATH = f"{ASSETS_DIR}/gnubg/gnubg_ts0.bd"
 
+HEADER_SIZE = 40
+
+# One-sided index entry: offset (in uint16s) into the data area, then the
+# count and first roll of the non-zero bear-off and gammon probabilities.
+OS_INDEX_DTYPE = np.dtype(
+    [("offset", "<u4"), ("nz", "u1"), ("ioff", "u1"), ("nzg", "u1"), ("ioffg", "u1")]
+)
+
 
 class _BearoffReader:
     POSITION_CACHE = {}
     MAX_PLY_DEPTH = 2  # default depth for n-ply evaluation
-    DICE_ROLLS = [(i, j) for i in range(1, 7) for j in range(i, 7)]  # 21 unique rolls
     GAMMON_WEIGHT = 1.0
     LOSE_GAMMON_WEIGHT = 1.0
 
-    def __init__(self, filename: str, cache: dict):
+    def __init__(self, filename: str, cache: Optional[dict] = None):
         self.filename = filename
+        # Evaluations by index pair; None to decode each one from the map.
         self.cache = cache
         self.loaded = False
         self.points = 0
         self.chequers = 0
         self.two_sided = False
+        self.cubeful = False
         self.data = None
+        self.index = None
+        self.values = None
+        self._moves = None
+        self._moves_loaded = False
         self.load_database()
 
     def load_database(self):
+        """
+        Map the file read-only instead of reading it: opening is instant
+        whatever the file size, pages are only touched when an entry is
+        decoded, and every process mapping the file shares one page-cache copy.
+        """
         with open(self.filename, "rb") as f:
-            header = f.read(40)
-            self.parse_header(header)
-            f.seek(0, os.SEEK_END)
-            size = f.tell()
-            f.seek(0)
-            self.data = f.read(size)
-            self.loaded = True
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.parse_header(self.data[:HEADER_SIZE])
+        if not self.two_sided:
+            # Zero-copy views: entries are decoded straight from the mapping.
+            n_pos = n_positions(self.points, self.chequers)
+            self.index = np.frombuffer(
+                self.data, dtype=OS_INDEX_DTYPE, count=n_pos, offset=HEADER_SIZE
+            )
+            self.values = np.frombuffer(
+                self.data, dtype="<u2", offset=HEADER_SIZE + n_pos * 8
+            )
+        else:
+            # One record of 1 (cubeless) or 4 (cubeful) equities per pair.
+            n_pos = n_positions(self.points, self.chequers)
+            n_values = 4 if self.cubeful else 1
+            self.values = np.frombuffer(
+                self.data,
+                dtype="<u2",
+                count=n_pos * n_pos * n_values,
+                offset=HEADER_SIZE,
+            ).reshape(n_pos * n_pos, n_values)
+        self.loaded = True
+
+    def close(self):
+        if self.data is not None:
+            self.index = self.values = None
+            self.data.close()
+            self.data = None
+            self.loaded = False
 
     def parse_header(self, header: bytes):
         header_str = header.decode("ascii", errors="ignore").strip("\x00")
@@ -58,90 +103,345 @@ class _BearoffReader:
 
         self.points = int(parts[2])
         self.chequers = int(parts[3])
+        self.cubeful = self.two_sided and parts[4][:1] == "1"
 
     def get_position_id(self, board: list):
-        fBits = 0
-        j = len(board) - 1
-        for i in range(len(board)):
-            j += board[i]
-        fBits = 1 << j
-        for i in range(len(board) - 1):
-            j -= board[i] + 1
-            fBits |= 1 << j
-        return self.position_f(fBits, 15 + len(board), len(board))
-
-    def position_f(self, fBits, n, r):
-        if n == r:
-            return 0
-        if (fBits >> (n - 1)) & 1:
-            return self.combination(n - 1, r) + self.position_f(fBits, n - 1, r - 1)
-        else:
-            return self.position_f(fBits, n - 1, r)
-
-    def combination(self, n, r):
-        if n < r or r < 0:
-            return 0
-        return math.comb(n, r)
+        return bearoff_index(board)
 
     def read_distribution(self, pos_id: int):
         if self.two_sided:
-            raise NotImplementedError(
-                "Two-sided bearoff DB support not yet implemented."
+            raise ValueError(
+                "Two-sided bearoff databases store equities, use read_equities."
             )
 
-        n_pos = self.combination(self.points + self.chequers, self.points)
-        offset_area = 40 + n_pos * 8
-
-        entry = self.data[40 + pos_id * 8 : 40 + (pos_id + 1) * 8]
-        offset, nz, ioff, nzg, ioffg = struct.unpack("<IBBBB", entry)
-
-        data_offset = offset_area + 2 * offset
-        n_bytes = 2 * (nz + nzg)
-
-        values = self.data[data_offset : data_offset + n_bytes]
+        offset, nz, ioff, nzg, ioffg = (int(x) for x in self.index[pos_id])
         dist = np.zeros(64, dtype=np.uint16)
+        dist[ioff : ioff + nz] = self.values[offset : offset + nz]
+        dist[32 + ioffg : 32 + ioffg + nzg] = self.values[
+            offset + nz : offset + nz + nzg
+        ]
+        return dist
 
-        for i in range(nz):
-            dist[ioff + i] = values[2 * i] | (values[2 * i + 1] << 8)
-
-        for i in range(nzg):
-            idx = 32 + ioffg + i
-            dist[idx] = values[2 * (nz + i)] | (values[2 * (nz + i) + 1] << 8)
+    def read_distributions(self, pos_ids: np.ndarray) -> np.ndarray:
+        """
+        Decode the (N, 64) distributions of many positions in one pass.
+        """
+        if self.two_sided:
+            raise ValueError(
+                "Two-sided bearoff databases store equities, use read_equities."
+            )
 
+        entries = self.index[np.asarray(pos_ids)]
+        offset = entries["offset"].astype(np.int64)[:, None]
+        nz = entries["nz"].astype(np.int64)[:, None]
+        slots = np.arange(32)
+        dist = np.zeros((len(entries), 64), dtype=np.uint16)
+        rows = np.broadcast_to(np.arange(len(entries))[:, None], (len(entries), 32))
+
+        mask = slots < nz
+        dist[rows[mask], (entries["ioff"][:, None] + slots)[mask]] = self.values[
+            (offset + slots)[mask]
+        ]
+        mask = slots < entries["nzg"][:, None]
+        dist[rows[mask], (32 + entries["ioffg"][:, None] + slots)[mask]] = self.values[
+            (offset + nz + slots)[mask]
+        ]
         return dist
 
-    def evaluate_position(self, position: Position) -> dict:
-        pos_id = position.encode()
-        if pos_id in self.cache:
-            logger.debug(f"Cache hit for position {pos_id}")
-            return self.cache[pos_id]
+    def read_equities(self, player_ids, opponent_ids) -> np.ndarray:
+        """
+        Two-sided lookup: money equities for the player on roll, (..., 1) for
+        a cubeless database or (..., 4) as cubeless, cube owned, centered and
+        opponent owned for a cubeful one. Accepts scalars or index arrays.
+        """
+        if not self.two_sided:
+            raise ValueError("One-sided bearoff databases store distributions.")
+        n_pos = n_positions(self.points, self.chequers)
+        records = self.values[np.asarray(player_ids) * n_pos + np.asarray(opponent_ids)]
+        return records / 32767.5 - 1.0
+
+    def win_probabilities(self, on_roll_ids, other_ids) -> np.ndarray:
+        """
+        Win chance of the side on roll for each pair of database indices.
+        """
+        if self.two_sided:
+            # Bearoffs have no gammons, so cubeless equity is 2p - 1.
+            return (self.read_equities(on_roll_ids, other_ids)[..., 0] + 1.0) / 2.0
+        return self.win_probability(
+            self.read_distributions(on_roll_ids)[:, :32] / 65535.0,
+            self.read_distributions(other_ids)[:, :32] / 65535.0,
+        )
 
-        board_opp, board_player = position.to_board_array()
+    def position_ids(self, positions) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Database indices of the player's and the opponent's home boards.
+        """
+        points = np.array([p.board_points for p in positions], dtype=np.int64)
+        player = np.clip(points[:, : self.points], 0, None)
+        opponent = np.clip(-points[:, ::-1][:, : self.points], 0, None)
+        return bearoff_indices(player), bearoff_indices(opponent)
 
-        pos_id_player = self.get_position_id(board_player[: self.points])
-        pos_id_opp = self.get_position_id(board_opp[: self.points])
+    @staticmethod
+    def win_probability(on_roll: np.ndarray, other: np.ndarray) -> np.ndarray:
+        """
+        Chance that the side on roll, needing i rolls with probability
+        on_roll[..., i], finishes no later than the other side: O(32) per pair
+        with a reversed cumulative sum, vectorized over leading axes.
+        """
+        other_tail = np.cumsum(other[..., ::-1], axis=-1)[..., ::-1]
+        return np.clip((on_roll * other_tail).sum(axis=-1), 0.0, 1.0)
 
-        dist_player = self.read_distribution(pos_id_player)
-        dist_opp = self.read_distribution(pos_id_opp)
+    @staticmethod
+    def gammon_probabilities(
+        on_roll: np.ndarray,
+        other: np.ndarray,
+        on_roll_gammon: np.ndarray,
+        other_gammon: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gammon chances won and lost by the side on roll, from the bear-off
+        distributions and the gammon distributions (rolls needed to bear off
+        the first checker, a delta at 0 once one is off).
+
+        Finishing on roll i wins a gammon if the other side still needs at
+        least i rolls for its first checker; the other side finishing on its
+        roll j wins one if the side on roll still needs more than j.
+        """
+        other_tail = np.cumsum(other_gammon[..., ::-1], axis=-1)[..., ::-1]
+        # A side already off at roll 0 gammons a full board.
+        other_tail[..., 0] = other_tail[..., 1]
+        tail = np.cumsum(on_roll_gammon[..., ::-1], axis=-1)[..., ::-1]
+        on_roll_tail = np.zeros_like(tail)
+        on_roll_tail[..., :-1] = tail[..., 1:]
+        return (
+            np.clip((on_roll * other_tail).sum(axis=-1), 0.0, 1.0),
+            np.clip((other * on_roll_tail).sum(axis=-1), 0.0, 1.0),
+        )
 
-        probs_player = dist_player[:32] / 65535.0
-        probs_opp = dist_opp[:32] / 65535.0
+    def _race(self, player_ids, opponent_ids) -> dict:
+        """
+        One-sided race of each pair of database indices, player on roll.
+        """
+        dist_player = self.read_distributions(player_ids) / 65535.0
+        dist_opp = self.read_distributions(opponent_ids) / 65535.0
+        probs_player, probs_opp = dist_player[:, :32], dist_opp[:, :32]
+        gammon, lose_gammon = self.gammon_probabilities(
+            probs_player, probs_opp, dist_player[:, 32:], dist_opp[:, 32:]
+        )
+        return {
+            "expected_rolls": probs_player @ np.arange(32),
+            "win_prob": self.win_probability(probs_player, probs_opp),
+            "gammon_prob": gammon,
+            "lose_gammon_prob": lose_gammon,
+        }
 
-        win_chance = 0.0
-        for i in range(32):
-            for j in range(i, 32):
-                win_chance += probs_player[i] * probs_opp[j]
+    def evaluate_ids(self, player_ids, opponent_ids) -> dict:
+        """
+        Evaluations of index pairs with the player on roll, as arrays.
+        """
+        if self.two_sided:
+            equity = self.read_equities(player_ids, opponent_ids)[..., 0]
+            no_gammons = np.zeros_like(equity)
+            return {
+                "win_prob": (equity + 1.0) / 2.0,
+                "gammon_prob": no_gammons,
+                "lose_gammon_prob": no_gammons,
+                "equity": equity,
+            }
+        race = self._race(player_ids, opponent_ids)
+        race["equity"] = self.calculate_equity(
+            race["win_prob"], race["gammon_prob"], race["lose_gammon_prob"]
+        )
+        return race
+
+    def evaluate_positions(self, positions) -> dict:
+        """
+        Batch form of `evaluate_position`, returning arrays, without caching.
+        """
+        return self.evaluate_ids(*self.position_ids(positions))
+
+    @property
+    def moves(self):
+        """
+        Successor table for this database's boards if it has been generated
+        (see `bearoff_moves`), else None. It is never built here.
+        """
+        if not self._moves_loaded:
+            from pybg.gnubg.bearoff_moves import move_table_for
+
+            self._moves = move_table_for(self.points, self.chequers)
+            self._moves_loaded = True
+        return self._moves
+
+    def successor_ids(self, index: int, dice) -> np.ndarray:
+        """
+        Distinct boards after playing `dice` from board `index`: a slice of
+        the move table, or generated for this one board without it.
+        """
+        from pybg.gnubg.bearoff_generator import successors
+
+        if self.moves is not None:
+            return self.moves.successors(index, tuple(dice))
+        board = bearoff_board(index, self.points, self.chequers)
+        return np.array(
+            [bearoff_index(after) for after in successors(board, tuple(dice))],
+            dtype=np.int64,
+        )
 
-        expected_rolls = sum(i * probs_player[i] for i in range(32))
+    def reply_ids(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every successor of board `index` over the 21 rolls, in WEIGHTED_ROLLS
+        order, and how many each roll has.
+        """
+        from pybg.gnubg.search import WEIGHTED_ROLLS
+
+        if self.moves is not None:
+            return self.moves.replies(index)
+        per_roll = [self.successor_ids(index, dice) for dice, _ in WEIGHTED_ROLLS]
+        return np.concatenate(per_roll), np.array([len(ids) for ids in per_roll])
+
+    def covers(self, position: Position) -> bool:
+        """
+        True for a pure bearoff whose home boards are both in this database.
+        """
+        if position.player_bar or position.opponent_bar:
+            return False
+        points = position.board_points
+        player, opponent = points[: self.points], points[::-1][: self.points]
+        return (
+            all(p >= 0 for p in player)
+            and all(p <= 0 for p in opponent)
+            and not any(points[self.points : 24 - self.points])
+            and sum(player) <= self.chequers
+            and -sum(opponent) <= self.chequers
+        )
 
+    def successor_positions(self, position: Position, dice) -> Optional[List[Position]]:
+        """
+        Distinct positions after playing `dice` in a pure bearoff, indexed
+        from the move table; None if this database does not cover `position`.
+        """
+        if not self.covers(position):
+            return None
+        if not any(position.board_points[: self.points]):
+            return []
+        index = bearoff_index(list(position.board_points[: self.points]))
+        return [
+            self.with_home_board(position, int(after))
+            for after in self.successor_ids(index, dice)
+        ]
+
+    def plays(self, position: Position, dice) -> Optional[List[Play]]:
+        """
+        The legal plays of `dice` in a pure bearoff, one per distinct result
+        as from `generate_plays`, but from one-sided boards rather than
+        `Position` moves; None if this database does not cover `position`.
+        """
+        from pybg.gnubg.bearoff_moves import successor_moves
+
+        if not self.covers(position):
+            return None
+        board = tuple(position.board_points[: self.points])
+        if not any(board):
+            return []
+        points = position.board_points
+        return [
+            Play(
+                moves,
+                dataclasses.replace(
+                    position,
+                    board_points=after + tuple(points[self.points :]),
+                    player_off=position.player_off + sum(board) - sum(after),
+                ),
+            )
+            for after, moves in successor_moves(board, tuple(dice)).items()
+        ]
+
+    def with_home_board(self, position: Position, index: int) -> Position:
+        """
+        `position` with the player's home board replaced by board `index`.
+        """
+        board = bearoff_board(index, self.points, self.chequers)
+        points = position.board_points
+        borne_off = sum(points[: self.points]) - sum(board)
+        return dataclasses.replace(
+            position,
+            board_points=tuple(board) + tuple(points[self.points :]),
+            player_off=position.player_off + borne_off,
+        )
+
+    def evaluate_replies(self, player_ids, opponent_id: int) -> dict:
+        """
+        Exact 1-ply values, for the side that has just moved, of candidate
+        boards `player_ids` against the opponent's board `opponent_id`.
+
+        For each of the opponent's 21 rolls the reply leaving the mover the
+        least equity is chosen, and the mover's on-roll evaluation after it
+        is averaged over the rolls. Every (candidate, reply) pair is looked
+        up in one batch; nothing is built per position.
+        """
+        from pybg.gnubg.bearoff_moves import ROLL_WEIGHTS
+
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        replies, counts = self.reply_ids(opponent_id)
+        n_candidates, n_replies = len(player_ids), len(replies)
+        values = self.evaluate_ids(
+            np.repeat(player_ids, n_replies), np.tile(replies, n_candidates)
+        )
+
+        # Reply columns per roll, padded with the roll's first reply.
+        offsets = np.cumsum(counts) - counts
+        width = np.arange(counts.max())
+        columns = offsets[:, None] + np.where(width < counts[:, None], width, 0)
+        equity = values["equity"].reshape(n_candidates, n_replies)
+        choice = np.argmin(equity[:, columns], axis=2)
+        best = columns[np.arange(len(counts)), choice]  # (candidate, roll)
+        rows = np.arange(n_candidates)[:, None]
         result = {
-            "expected_rolls": expected_rolls,
-            "win_prob": float(min(max(win_chance, 0), 1)),
-            "gammon_prob": 0.0,
-            "lose_gammon_prob": 0.0,
+            key: values[key].reshape(n_candidates, n_replies)[rows, best] @ ROLL_WEIGHTS
+            for key in ("win_prob", "gammon_prob", "lose_gammon_prob", "equity")
         }
 
-        self.cache[pos_id] = result
+        # A candidate that bears off the last checker wins before any reply.
+        done = player_ids == 0
+        if done.any():
+            final = self.evaluate_ids(
+                player_ids[done], np.full(done.sum(), opponent_id)
+            )
+            for key in result:
+                result[key][done] = final[key]
+        return result
+
+    def evaluate_position(self, position: Position) -> dict:
+        board_opp, board_player = position.to_board_array()
+
+        pos_id_player = self.get_position_id(board_player[: self.points])
+        pos_id_opp = self.get_position_id(board_opp[: self.points])
+        pos_id = (pos_id_player, pos_id_opp)
+        cached = self.cache.get(pos_id) if self.cache is not None else None
+        if cached is not None:
+            logger.debug(f"Cache hit for position {pos_id}")
+            return cached
+
+        if self.two_sided:
+            equities = self.read_equities(pos_id_player, pos_id_opp)
+            result = {
+                "win_prob": float((equities[0] + 1.0) / 2.0),
+                "gammon_prob": 0.0,
+                "lose_gammon_prob": 0.0,
+                "equity": float(equities[0]),
+            }
+            if self.cubeful:
+                result["cubeful_equity"] = [float(e) for e in equities[1:]]
+            if self.cache is not None:
+                self.cache[pos_id] = result
+            return result
+
+        race = self._race([pos_id_player], [pos_id_opp])
+        result = {key: float(value[0]) for key, value in race.items()}
+
+        if self.cache is not None:
+            self.cache[pos_id] = result
         return result
 
     def calculate_equity(self, win_prob, gammon_prob, lose_gammon_prob):
@@ -152,79 +452,38 @@ class _BearoffReader:
             - self.LOSE_GAMMON_WEIGHT * lose_gammon_prob
         )
 
-    def opponent_best_response(self, board):
-        plays = board.generate_plays(partial=False)
-        if not plays:
-            # No legal moves, opponent passes
-            return self.evaluate_position(board.position)
-
-        worst_equity = None
-        worst_eval = None
-
-        for play in plays:
-            new_position = play.position
-            eval_result = self.evaluate_position(new_position)
-            equity = self.calculate_equity(
-                eval_result["win_prob"],
-                eval_result["gammon_prob"],
-                eval_result["lose_gammon_prob"],
-            )
-
-            if worst_equity is None or equity < worst_equity:
-                worst_equity = equity
-                worst_eval = eval_result
-
-        return worst_eval
-
     def average_opponent_response(self, position):
-        """Average opponent responses across all 21 dice rolls."""
-        total_win = 0.0
-        total_gammon = 0.0
-        total_lose_gammon = 0.0
-        num_rolls = 0
-
-        for d0, d1 in self.DICE_ROLLS:
-            new_board = Board(position_id=position.encode())
-            new_board.match.dice = (d0, d1)
-            worst_eval = self.opponent_best_response(new_board)
-
-            total_win += worst_eval["win_prob"]  # ✅ No flipping
-            total_gammon += worst_eval["gammon_prob"]
-            total_lose_gammon += worst_eval["lose_gammon_prob"]
-
-            num_rolls += 1 if d0 == d1 else 2
-
-        avg_win = total_win / num_rolls
-        avg_gammon = total_gammon / num_rolls
-        avg_lose_gammon = total_lose_gammon / num_rolls
-
+        """
+        Average over the opponent's 21 rolls of its best reply to `position`,
+        given from the side that has just moved.
+        """
+        player_ids, opponent_ids = self.position_ids([position])
+        result = self.evaluate_replies(player_ids, int(opponent_ids[0]))
         return {
-            "win_prob": avg_win,
-            "gammon_prob": avg_gammon,
-            "lose_gammon_prob": avg_lose_gammon,
+            key: float(result[key][0])
+            for key in ("win_prob", "gammon_prob", "lose_gammon_prob")
         }
 
     def complete_eval(self, board: Board) -> list:
-        plays = board.generate_plays(partial=False)
+        plays = self.plays(board.position, board.match.dice)
+        if plays is None:
+            plays = board.generate_plays(partial=False)
 
         if not plays:
             logger.warn("No legal plays.")
             return []
 
-        evaluations = []
-
-        for play in plays:
-            new_position = play.position
+        # Every candidate shares the opponent's board, so one batch covers all.
+        player_ids, opponent_ids = self.position_ids([play.position for play in plays])
+        result = self.evaluate_replies(player_ids, int(opponent_ids[0]))
 
-            avg_eval = self.average_opponent_response(new_position)
-
-            equity = self.calculate_equity(
-                avg_eval["win_prob"],
-                avg_eval["gammon_prob"],
-                avg_eval["lose_gammon_prob"],
-            )
-
-            evaluations.append((play, avg_eval, equity))
+        evaluations = []
+        for i, play in enumerate(plays):
+            avg_eval = {
+                key: float(result[key][i])
+                for key in ("win_prob", "gammon_prob", "lose_gammon_prob")
+            }
+            evaluations.append((play, avg_eval, float(result["equity"][i])))
 
         evaluations.sort(key=lambda x: x[2], reverse=True)
 
@@ -232,10 +491,19 @@ class _BearoffReader:
 
 
 class BearoffDatabase:
-    def __init__(self, os_path: str = OS_PATH, ts_path: str = TS_PATH):
-        self._cache = self.load_cache()
-        self.os_reader: _BearoffReader = _BearoffReader(os_path, self._cache)
-        self.ts_reader: _BearoffReader = _BearoffReader(ts_path, self._cache)
+    def __init__(
+        self, os_path: str = OS_PATH, ts_path: str = TS_PATH, cache_path=CACHE_PATH
+    ):
+        if not os.path.exists(ts_path):
+            raise FileNotFoundError(
+                f"No two-sided bearoff database at {ts_path}; generate one with "
+                "`python -m pybg.gnubg.bearoff_generator`."
+            )
+        # Each reader's evaluations are keyed by its own index pairs.
+        self.os_cache = BearoffCache(cache_path, "one_sided")
+        self.ts_cache = BearoffCache(cache_path, "two_sided")
+        self.os_reader: _BearoffReader = _BearoffReader(os_path, self.os_cache)
+        self.ts_reader: _BearoffReader = _BearoffReader(ts_path, self.ts_cache)
 
     def evaluate(self, board: Board, position_class: PositionClass) -> list:
         if position_class == PositionClass.BEAROFF1:
@@ -250,26 +518,22 @@ class BearoffDatabase:
             raise ValueError(f"Unsupported position class: {position_class}")
 
     def save(self):
-        self.save_cache(self._cache)
+        self.os_cache.flush()
+        self.ts_cache.flush()
 
     def clear_cache(self):
-        self._cache.clear()
-        self.save()
+        self.os_cache.clear()
+        self.ts_cache.clear()
 
     def get_cached_eval(self, position: Position):
-        return self._cache.get(position.encode())
-
-    @staticmethod
-    def load_cache():
-        if os.path.exists(CACHE_FILE):
-            try:
-                with open(CACHE_FILE, "r") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warn("Cache file is corrupted. Starting empty cache.")
-        return {}
-
-    @staticmethod
-    def save_cache(cache):
-        with open(CACHE_FILE, "w") as f:
-            json.dump(cache, f)
+        for reader in (self.ts_reader, self.os_reader):
+            player_ids, opponent_ids = reader.position_ids([position])
+            cached = reader.cache.get((int(player_ids[0]), int(opponent_ids[0])))
+            if cached is not None:
+                return cached
+        return None
+
+    def close(self):
+        for reader in (self.os_reader, self.ts_reader):
+            reader.close()
+            reader.cache.close()
@@ -0,0 +1,569 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from pybg.core.logger import logger
+from pybg.gnubg.bearoff_database import HEADER_SIZE, OS_INDEX_DTYPE, TS_PATH
+from pybg.gnubg.bearoff_index import bearoff_board, bearoff_index, n_positions
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+# Bearing off is only allowed once every checker is within this many points.
+HOME_POINTS = 6
+
+Board = Tuple[int, ...]
+Progress = Callable[[int, int], None]
+
+_ROLL_WEIGHTS = np.array([weight for _, weight in WEIGHTED_ROLLS]) / 36.0
+
+
+def die_moves(board: Board, die: int) -> List[Tuple[int, int, Board]]:
+    """
+    (source, destination, board after) of each way to play one die on a
+    non-empty one-sided board (ace point first), with -1 for borne off.
+    """
+    occupied = [k for k, count in enumerate(board) if count]
+    highest = occupied[-1]
+    all_home = highest < HOME_POINTS
+
+    results = []
+    for k in occupied:
+        point = k + 1
+        after = list(board)
+        after[k] -= 1
+        if point > die:
+            after[k - die] += 1
+        elif not all_home or (point < die and k != highest):
+            continue
+        results.append((k, k - die if point > die else -1, tuple(after)))
+    return results
+
+
+def _play_die(board: Board, die: int) -> List[Board]:
+    """
+    Boards reachable by playing one die on a one-sided board.
+    """
+    if not any(board):
+        return [board]
+    return [after for _, _, after in die_moves(board, die)]
+
+
+def successors(board: Board, dice: Tuple[int, int]) -> List[Board]:
+    """
+    Distinct boards after playing `dice` in full. With every checker moving
+    towards home, some die can always be played until the board is empty.
+    """
+    d0, d1 = dice
+    orders = [(d0,) * 4] if d0 == d1 else [(d0, d1), (d1, d0)]
+    finals = set()
+    for order in orders:
+        boards = {board}
+        for die in order:
+            boards = {after for b in boards for after in _play_die(b, die)}
+        finals |= boards
+    return sorted(finals)
+
+
+def _successor_rows(args) -> List[List[List[int]]]:
+    first, count, points, chequers = args
+    rows = []
+    for index in range(first, first + count):
+        board = bearoff_board(index, points, chequers)
+        rows.append(
+            [
+                [bearoff_index(after) for after in successors(board, dice)]
+                for dice, _ in WEIGHTED_ROLLS
+            ]
+        )
+    return rows
+
+
+def _in_chunks(jobs, worker, workers: int, total: int, progress: Optional[Progress]):
+    """
+    Run `worker` over `jobs` (inline or on a process pool), yielding results
+    in order and reporting how many of `total` items are done.
+    """
+    done = 0
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(worker, jobs)
+    else:
+        pool = None
+        results = map(worker, jobs)
+    try:
+        for job, result in zip(jobs, results):
+            done += job[1]
+            if progress:
+                progress(done, total)
+            yield result
+    finally:
+        if pool:
+            pool.shutdown()
+
+
+def successor_lists(
+    points: int,
+    chequers: int,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Successor indices of every position and roll without padding: (n, 21)
+    counts and the flattened lists in (position, roll) order.
+    """
+    n = n_positions(points, chequers)
+    chunk = max(1, min(2000, n // (4 * workers)))
+    jobs = [
+        (first, min(chunk, n - first), points, chequers) for first in range(0, n, chunk)
+    ]
+    counts = np.empty((n, len(WEIGHTED_ROLLS)), dtype=np.int32)
+    parts = []
+    first = 0
+    for rows in _in_chunks(jobs, _successor_rows, workers, n, progress):
+        for row in rows:
+            counts[first] = [len(after) for after in row]
+            parts.extend(row)
+            first += 1
+    flat = np.fromiter((i for after in parts for i in after), dtype=np.int32)
+    return counts, flat
+
+
+def move_table(
+    points: int,
+    chequers: int,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> np.ndarray:
+    """
+    (n, 21, K) successor indices for every position and roll, each row padded
+    by repeating its first successor so a min or max over it is unaffected.
+    """
+    counts, flat = successor_lists(points, chequers, workers, progress)
+    starts = np.cumsum(counts).reshape(counts.shape) - counts
+    columns = np.arange(counts.max())
+    return flat[starts[:, :, None] + np.where(columns < counts[:, :, None], columns, 0)]
+
+
+def _encode(equities: np.ndarray) -> np.ndarray:
+    return np.round((np.clip(equities, -1.0, 1.0) + 1.0) * 32767.5).astype("<u2")
+
+
+# Solver state: set in-process, or in each pool worker by _init_solver.
+_solver: dict = {}
+
+# Smallest slice of a pip-total layer worth sending to a worker.
+MIN_PAIRS_PER_TASK = 4096
+
+
+def _init_solver(shm_name, shape, counts, starts, flat, cubeful) -> None:
+    shm = SharedMemory(name=shm_name)
+    _solver.update(
+        shm=shm,
+        equity=np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+        counts=counts,
+        starts=starts,
+        flat=flat,
+        cubeful=cubeful,
+    )
+
+
+def _solve_pairs(pairs: Tuple[np.ndarray, np.ndarray]) -> None:
+    """
+    Solve pairs (player on roll, opponent) whose successors are all solved.
+    """
+    i, j = pairs
+    equity, counts, starts = _solver["equity"], _solver["counts"], _solver["starts"]
+    channels = equity.shape[2]
+    # After a play the opponent is on roll, so cube ownership swaps sides.
+    swapped = [0, 3, 2, 1][:channels]
+
+    # Expected value over the rolls of the best play in each cube state: the
+    # one that leaves the opponent, now on roll, the least. Every (pair, roll,
+    # successor) is gathered at once and reduced per roll.
+    c = counts[i].ravel()
+    offsets = np.cumsum(c) - c
+    rows = np.repeat(starts[i].ravel() - offsets, c) + np.arange(c.sum())
+    values = equity[
+        np.repeat(np.repeat(j, len(_ROLL_WEIGHTS)), c), _solver["flat"][rows]
+    ]
+    best = np.minimum.reduceat(values, offsets, axis=0)
+    best = best.reshape(len(i), len(_ROLL_WEIGHTS), channels)[:, :, swapped]
+    no_double = -np.einsum("r,prc->pc", _ROLL_WEIGHTS, best)
+    if _solver["cubeful"]:
+        double = np.minimum(2.0 * no_double[:, 3], 1.0)
+        no_double[:, 1] = np.maximum(no_double[:, 1], double)
+        no_double[:, 2] = np.maximum(no_double[:, 2], double)
+    equity[i, j] = no_double
+
+
+def solve_two_sided(
+    points: int = 6,
+    chequers: int = 6,
+    cubeful: bool = True,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> np.ndarray:
+    """
+    Exact money equities of every two-sided bearoff position, for the player
+    on roll, by retrograde analysis.
+
+    Returns an (n * n, 1 or 4) array indexed by `player * n + opponent`, with
+    columns cubeless, then (if cubeful) cube owned, centered and opponent
+    owned, in units of the cube. A position depends only on positions with
+    fewer total pips, so pairs sharing a pip total form a layer that is
+    solved in vectorized slices, split across the pool, lowest total first.
+    """
+    counts, flat = successor_lists(points, chequers, workers, progress)
+    n = len(counts)
+    pips = np.array([bearoff_board(i, points, chequers) for i in range(n)]) @ np.arange(
+        1, points + 1
+    )
+    starts = np.cumsum(counts).reshape(counts.shape) - counts
+
+    player, opponent = np.divmod(np.arange(n * n), n)
+    live = (player > 0) & (opponent > 0)
+    player, opponent = player[live], opponent[live]
+    totals = pips[player] + pips[opponent]
+    # Within a layer, neighbouring pairs share the opponent's row.
+    order = np.lexsort((opponent, totals))
+    player, opponent, totals = player[order], opponent[order], totals[order]
+    bounds = np.flatnonzero(np.diff(totals)) + 1
+
+    shape = (n, n, 4 if cubeful else 1)
+    shm = SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    pool = None
+    try:
+        _init_solver(shm.name, shape, counts, starts, flat, cubeful)
+        equity = _solver["equity"]
+        equity[:] = 0.0
+        equity[0, :] = 1.0  # the player on roll has already borne off
+        equity[1:, 0] = -1.0  # the opponent has
+        if workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_solver,
+                initargs=(shm.name, shape, counts, starts, flat, cubeful),
+            )
+
+        for i, j in zip(np.split(player, bounds), np.split(opponent, bounds)):
+            slices = max(1, min(workers, len(i) // MIN_PAIRS_PER_TASK))
+            tasks = list(zip(np.array_split(i, slices), np.array_split(j, slices)))
+            if pool and slices > 1:
+                list(pool.map(_solve_pairs, tasks))
+            else:
+                for task in tasks:
+                    _solve_pairs(task)
+        return equity.reshape(n * n, shape[2]).copy()
+    finally:
+        if pool:
+            pool.shutdown()
+        _solver.clear()
+        shm.close()
+        shm.unlink()
+
+
+def generate_two_sided(
+    path: str = TS_PATH,
+    points: int = 6,
+    chequers: int = 6,
+    cubeful: bool = True,
+    workers: int = os.cpu_count() or 1,
+    progress: Optional[Progress] = None,
+) -> str:
+    """
+    Build a GNUBG-format two-sided bearoff database at `path`.
+    """
+    start = time.perf_counter()
+    equities = solve_two_sided(points, chequers, cubeful, workers, progress)
+    header = f"gnubg-TS-{points:02d}-{chequers:02d}-{int(cubeful)}".ljust(
+        HEADER_SIZE - 1, "x"
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.encode("ascii") + b"\n")
+        f.write(_encode(equities).tobytes())
+    os.replace(tmp_path, path)
+    logger.info(
+        f"Built two-sided bearoff database {path} "
+        f"({points} points, {chequers} checkers) in {time.perf_counter() - start:.1f}s"
+    )
+    return path
+
+
+# Rolls tracked per one-sided distribution; longer bearoffs fold into the last.
+MAX_ROLLS = 32
+
+# Working set of the one-sided solver: the shared float64 row of bear-off and
+# gammon distributions plus both expectations, the float32 result, the pip
+# count and the file index entry.
+BYTES_PER_POSITION = (2 * MAX_ROLLS + 2) * 8 + 2 * MAX_ROLLS * 4 + 8 + 8
+
+# Refuse to build anything whose working set exceeds this by default.
+DEFAULT_MAX_MEMORY = 4 << 30
+
+# Smallest slice of a one-sided pip layer worth sending to a worker.
+MIN_POSITIONS_PER_TASK = 256
+
+# Columns of the one-sided solver table.
+_BEAROFF = slice(0, MAX_ROLLS)
+_GAMMON = slice(MAX_ROLLS, 2 * MAX_ROLLS)
+_EXPECTED, _EXPECTED_GAMMON = 2 * MAX_ROLLS, 2 * MAX_ROLLS + 1
+
+
+def one_sided_path(points: int, chequers: int = 15) -> str:
+    return f"{os.path.dirname(TS_PATH)}/gnubg_os_{points}_{chequers}.bd"
+
+
+def one_sided_memory(points: int, chequers: int = 15) -> int:
+    """
+    Peak memory in bytes of building a one-sided database, 800 bytes a
+    position: 45 MB for 6 points and 15 checkers, 140 MB for 7, 390 MB for 8,
+    1.1 GB for 9 and 2.6 GB for 10. Workers share the table, not copy it.
+    """
+    return n_positions(points, chequers) * BYTES_PER_POSITION
+
+
+def _pip_counts(args) -> np.ndarray:
+    first, count, points, chequers = args
+    weights = range(1, points + 1)
+    return np.array(
+        [
+            sum(c * w for c, w in zip(bearoff_board(i, points, chequers), weights))
+            for i in range(first, first + count)
+        ],
+        dtype=np.int64,
+    )
+
+
+def _init_one_sided(shm_name, shape, points, chequers) -> None:
+    shm = SharedMemory(name=shm_name)
+    _solver.update(
+        shm=shm,
+        table=np.ndarray(shape, dtype=np.float64, buffer=shm.buf),
+        points=points,
+        chequers=chequers,
+    )
+
+
+def _best_successors(flat: np.ndarray, counts: np.ndarray, cost: np.ndarray):
+    """
+    For each (position, roll) segment of the flattened successor lists, the
+    successor with the lowest `cost`.
+    """
+    segment = np.repeat(np.arange(counts.size), counts.ravel())
+    order = np.lexsort((cost[flat], segment))
+    return flat[order[np.cumsum(counts.ravel()) - counts.ravel()]].reshape(counts.shape)
+
+
+def _after_one_roll(distributions: np.ndarray) -> np.ndarray:
+    """
+    Average (positions, rolls, MAX_ROLLS) successor distributions over the
+    dice and add the roll just played.
+    """
+    mixed = np.einsum("r,prk->pk", _ROLL_WEIGHTS, distributions)
+    shifted = np.zeros_like(mixed)
+    shifted[:, 1:] = mixed[:, :-1]
+    shifted[:, -1] += mixed[:, -1]
+    return shifted
+
+
+def _solve_positions(indices: np.ndarray) -> None:
+    """
+    Solve one-sided positions whose successors are all solved.
+    """
+    table, points, chequers = _solver["table"], _solver["points"], _solver["chequers"]
+    boards = [bearoff_board(int(i), points, chequers) for i in indices]
+    after = [
+        [bearoff_index(b) for b in successors(board, dice)]
+        for board in boards
+        for dice, _ in WEIGHTED_ROLLS
+    ]
+    counts = np.array([len(a) for a in after]).reshape(len(indices), -1)
+    flat = np.fromiter((i for a in after for i in a), dtype=np.int64)
+
+    # Each distribution follows its own best play: fewest rolls to bear off
+    # everything, and separately fewest rolls to bear off the first checker.
+    best = _best_successors(flat, counts, table[:, _EXPECTED])
+    bearoff = _after_one_roll(table[best, _BEAROFF])
+    table[indices, _BEAROFF] = bearoff
+    table[indices, _EXPECTED] = bearoff @ np.arange(MAX_ROLLS)
+
+    # Only a full board can still be gammoned; the rest keep their delta at 0.
+    full = np.array([sum(board) == chequers for board in boards])
+    if full.any():
+        best = _best_successors(
+            flat[np.repeat(full, counts.sum(axis=1))],
+            counts[full],
+            table[:, _EXPECTED_GAMMON],
+        )
+        gammon = _after_one_roll(table[best, _GAMMON])
+        table[indices[full], _GAMMON] = gammon
+        table[indices[full], _EXPECTED_GAMMON] = gammon @ np.arange(MAX_ROLLS)
+
+
+def solve_one_sided(
+    points: int = 6,
+    chequers: int = 15,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+    max_memory: int = DEFAULT_MAX_MEMORY,
+) -> np.ndarray:
+    """
+    Roll distributions of every one-sided bearoff position under the play
+    that minimizes the expected number of rolls.
+
+    Returns an (n, 2 * MAX_ROLLS) float32 array: the chance of bearing off in exactly
+    i rolls, then the chance of bearing off the first checker in exactly i
+    rolls (the gammon-saving distribution, a delta at 0 once a checker is
+    off). A position depends only on positions with fewer pips, so positions
+    sharing a pip count form a layer solved across the pool, lowest first.
+    See `one_sided_memory` for the memory ceiling, checked against
+    `max_memory` before anything is allocated.
+    """
+    needed = one_sided_memory(points, chequers)
+    if needed > max_memory:
+        raise ValueError(
+            f"A {points}-point, {chequers}-checker database needs about "
+            f"{needed / 2**20:.0f} MB, over the {max_memory / 2**20:.0f} MB limit."
+        )
+
+    n = n_positions(points, chequers)
+    chunk = max(1, min(20000, n // (4 * workers)))
+    jobs = [
+        (first, min(chunk, n - first), points, chequers) for first in range(0, n, chunk)
+    ]
+    pips = np.concatenate(list(_in_chunks(jobs, _pip_counts, workers, n, None)))
+    order = np.argsort(pips, kind="stable")
+    bounds = np.flatnonzero(np.diff(pips[order])) + 1
+
+    shape = (n, 2 * MAX_ROLLS + 2)
+    shm = SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    pool = None
+    try:
+        _init_one_sided(shm.name, shape, points, chequers)
+        table = _solver["table"]
+        table[:] = 0.0
+        table[:, MAX_ROLLS] = 1.0  # no gammon possible until solved otherwise
+        table[0, 0] = 1.0  # already borne off
+        if workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_one_sided,
+                initargs=(shm.name, shape, points, chequers),
+            )
+
+        done = 1
+        for layer in np.split(order, bounds)[1:]:
+            slices = max(1, min(4 * workers, len(layer) // MIN_POSITIONS_PER_TASK))
+            tasks = np.array_split(layer, slices)
+            if pool and slices > 1:
+                list(pool.map(_solve_positions, tasks))
+            else:
+                for task in tasks:
+                    _solve_positions(task)
+            done += len(layer)
+            if progress:
+                progress(done, n)
+        return table[:, : 2 * MAX_ROLLS].astype(np.float32)
+    finally:
+        if pool:
+            pool.shutdown()
+        _solver.clear()
+        shm.close()
+        shm.unlink()
+
+
+def _nonzero_span(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First column and count of each row's non-zero run, at least one wide.
+    """
+    nonzero = values > 0
+    first = np.argmax(nonzero, axis=1)
+    last = values.shape[1] - 1 - np.argmax(nonzero[:, ::-1], axis=1)
+    return first, np.maximum(last - first + 1, 1)
+
+
+def log_progress(label: str) -> Progress:
+    reported = [-1]
+
+    def progress(done: int, total: int) -> None:
+        tenth = 10 * done // total
+        if tenth > reported[0]:
+            reported[0] = tenth
+            logger.info(f"{label}: {done}/{total} positions")
+
+    return progress
+
+
+def generate_one_sided(
+    path: Optional[str] = None,
+    points: int = 6,
+    chequers: int = 15,
+    workers: int = os.cpu_count() or 1,
+    progress: Optional[Progress] = None,
+    max_memory: int = DEFAULT_MAX_MEMORY,
+) -> str:
+    """
+    Build a compressed GNUBG-format one-sided bearoff database with gammon
+    distributions, at `one_sided_path(points, chequers)` by default.
+
+    Each entry stores only the non-zero run of each distribution, so the
+    file is a small fraction of the solver's working set.
+    """
+    path = path or one_sided_path(points, chequers)
+    start = time.perf_counter()
+    distributions = solve_one_sided(
+        points,
+        chequers,
+        workers,
+        progress or log_progress(f"One-sided {points}x{chequers} bearoff"),
+        max_memory,
+    )
+    encoded = np.round(distributions * 65535.0).astype("<u2")
+    del distributions
+
+    index = np.zeros(len(encoded), dtype=OS_INDEX_DTYPE)
+    ioff, nz = _nonzero_span(encoded[:, _BEAROFF])
+    ioffg, nzg = _nonzero_span(encoded[:, _GAMMON])
+    index["ioff"], index["nz"], index["ioffg"], index["nzg"] = ioff, nz, ioffg, nzg
+    index["offset"] = np.cumsum(nz + nzg) - (nz + nzg)
+
+    header = f"gnubg-OS-{points:02d}-{chequers:02d}-1-1-0".ljust(HEADER_SIZE - 1, "x")
+    slots = np.arange(MAX_ROLLS)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.encode("ascii") + b"\n")
+        f.write(index.tobytes())
+        # Row-major masking keeps each entry's bear-off run before its gammon run.
+        for first in range(0, len(encoded), 1 << 16):
+            rows = slice(first, first + (1 << 16))
+            keep = np.concatenate(
+                [
+                    (slots >= ioff[rows, None]) & (slots < (ioff + nz)[rows, None]),
+                    (slots >= ioffg[rows, None]) & (slots < (ioffg + nzg)[rows, None]),
+                ],
+                axis=1,
+            )
+            f.write(encoded[rows][keep].tobytes())
+    os.replace(tmp_path, path)
+    logger.info(
+        f"Built one-sided bearoff database {path} "
+        f"({points} points, {chequers} checkers) in {time.perf_counter() - start:.1f}s"
+    )
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a two-sided bearoff database"
+    )
+    parser.add_argument("--path", default=TS_PATH)
+    parser.add_argument("--points", type=int, default=6)
+    parser.add_argument("--chequers", type=int, default=6)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    generate_two_sided(args.path, args.points, args.chequers, workers=args.workers)
@@ -0,0 +1,73 @@
+"""
+Ranking of one-sided bearoff positions, as used to index GNUBG bearoff databases.
+
+A home board of `points` points holding at most `chequers` checkers maps to
+a combination of `points` bits: the top bit sits at `points - 1 + total` and
+each point's count is the gap to the next bit. Its index is the rank of that
+combination in the combinatorial number system, sum(C(b_t, points - t)).
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+MAX_N = 64
+
+# BINOMIAL[n, r] = C(n, r), zero where r > n.
+BINOMIAL = np.zeros((MAX_N, MAX_N), dtype=np.int64)
+BINOMIAL[:, 0] = 1
+for _n in range(1, MAX_N):
+    BINOMIAL[_n, 1:] = BINOMIAL[_n - 1, 1:] + BINOMIAL[_n - 1, :-1]
+del _n
+
+_BINOMIAL_ROWS = BINOMIAL.tolist()
+
+
+def n_positions(points: int, chequers: int) -> int:
+    """
+    Number of ways to place up to `chequers` checkers on `points` points.
+    """
+    return _BINOMIAL_ROWS[points + chequers][points]
+
+
+def bearoff_index(board: Sequence[int]) -> int:
+    """
+    Database index of a home board, given as checker counts from the ace point.
+    """
+    points = len(board)
+    bit = points - 1 + sum(board)
+    index = 0
+    for t, count in enumerate(board):
+        index += _BINOMIAL_ROWS[bit][points - t]
+        bit -= count + 1
+    return index
+
+
+def bearoff_indices(boards: np.ndarray) -> np.ndarray:
+    """
+    Database indices of an (N, points) array of home boards in one pass.
+    """
+    boards = np.asarray(boards, dtype=np.int64)
+    points = boards.shape[-1]
+    # Top bit, then one bit below each point's count.
+    gaps = np.cumsum(boards + 1, axis=-1)
+    bits = (points - 1 + boards.sum(axis=-1, keepdims=True)) - np.concatenate(
+        [np.zeros_like(gaps[..., :1]), gaps[..., :-1]], axis=-1
+    )
+    return BINOMIAL[bits, points - np.arange(points)].sum(axis=-1)
+
+
+def bearoff_board(index: int, points: int = 6, chequers: int = 15) -> Tuple[int, ...]:
+    """
+    Inverse of `bearoff_index`: the home board with database index `index`.
+    """
+    bits = []
+    bit = points + chequers
+    for t in range(points):
+        r = points - t
+        bit -= 1
+        while _BINOMIAL_ROWS[bit][r] > index:
+            bit -= 1
+        index -= _BINOMIAL_ROWS[bit][r]
+        bits.append(bit)
+    return tuple(bits[t] - bits[t + 1] - 1 for t in range(points - 1)) + (bits[-1],)
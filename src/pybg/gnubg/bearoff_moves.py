@@ -0,0 +1,173 @@
+import argparse
+import functools
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from pybg.constants import ASSETS_DIR
+from pybg.core.board import Move
+from pybg.core.logger import logger
+from pybg.gnubg.bearoff_generator import (
+    Board,
+    Progress,
+    die_moves,
+    log_progress,
+    successor_lists,
+)
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+# Position of each roll, either way round, in WEIGHTED_ROLLS.
+ROLL_INDEX = {
+    dice: r
+    for r, ((d0, d1), _) in enumerate(WEIGHTED_ROLLS)
+    for dice in ((d0, d1), (d1, d0))
+}
+
+ROLL_WEIGHTS = np.array([weight for _, weight in WEIGHTED_ROLLS]) / 36.0
+
+
+class MoveTable:
+    """
+    Successor bearoff indices of every one-sided position for each of the 21
+    rolls, stored flat: a position's lists for all rolls are contiguous, in
+    WEIGHTED_ROLLS order, so its replies are a single slice.
+    """
+
+    def __init__(self, points: int, chequers: int, counts: np.ndarray, flat):
+        self.points = points
+        self.chequers = chequers
+        self.counts = counts
+        self.flat = flat
+        self.starts = np.cumsum(counts, dtype=np.int64).reshape(counts.shape) - counts
+
+    @classmethod
+    def build(
+        cls,
+        points: int = 6,
+        chequers: int = 15,
+        workers: int = 1,
+        progress: Optional[Progress] = None,
+    ) -> "MoveTable":
+        counts, flat = successor_lists(points, chequers, workers, progress)
+        return cls(points, chequers, counts, flat)
+
+    @classmethod
+    def load(cls, path: str) -> "MoveTable":
+        with np.load(path) as cached:
+            points, chequers = (int(x) for x in cached["shape"])
+            return cls(
+                points,
+                chequers,
+                cached["counts"].astype(np.int32),
+                cached["flat"].astype(np.int32),
+            )
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            shape=np.array([self.points, self.chequers]),
+            counts=self.counts.astype(np.uint8),
+            flat=self.flat,
+        )
+        os.replace(tmp_path, path)
+
+    def successors(self, index: int, dice: Tuple[int, int]) -> np.ndarray:
+        r = ROLL_INDEX[dice]
+        start = self.starts[index, r]
+        return self.flat[start : start + self.counts[index, r]]
+
+    def replies(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every successor of `index` over the 21 rolls, and how many each roll has.
+        """
+        start = self.starts[index, 0]
+        counts = self.counts[index]
+        return self.flat[start : start + counts.sum()], counts
+
+
+def move_table_path(points: int, chequers: int) -> str:
+    return f"{ASSETS_DIR}/gnubg/bearoff_moves_{points}_{chequers}.npz"
+
+
+def load_move_table(
+    points: int = 6, chequers: int = 15, path: Optional[str] = None
+) -> Optional[MoveTable]:
+    """
+    The cached move table for `points` x `chequers` boards, or None if it has
+    not been generated.
+    """
+    path = path or move_table_path(points, chequers)
+    if os.path.exists(path):
+        table = MoveTable.load(path)
+        if (table.points, table.chequers) == (points, chequers):
+            return table
+    return None
+
+
+def generate_move_table(
+    points: int = 6,
+    chequers: int = 15,
+    path: Optional[str] = None,
+    workers: int = os.cpu_count() or 1,
+) -> MoveTable:
+    """
+    Build the move table for `points` x `chequers` boards and cache it on
+    disk (about 40s and 14 MB for 6 points, 15 checkers).
+    """
+    path = path or move_table_path(points, chequers)
+    label = f"Bearoff {points}x{chequers} move table"
+    table = MoveTable.build(points, chequers, workers, log_progress(label))
+    table.save(path)
+    move_table_for.cache_clear()
+    return table
+
+
+@functools.lru_cache(maxsize=4)
+def move_table_for(points: int, chequers: int) -> Optional[MoveTable]:
+    table = load_move_table(points, chequers)
+    if table is None:
+        logger.info(
+            f"No {points}x{chequers} bearoff move table; generate one with "
+            "`python -m pybg.gnubg.bearoff_moves` to look bearoff plays up."
+        )
+    return table
+
+
+def successor_moves(
+    board: Board, dice: Tuple[int, int]
+) -> Dict[Board, Tuple[Move, ...]]:
+    """
+    The distinct boards after playing `dice` in full from one-sided `board`,
+    like `bearoff_generator.successors`, each with the moves (in `Position`
+    coordinates) of one way to reach it.
+    """
+    d0, d1 = dice
+    orders = [(d0,) * 4] if d0 == d1 else [(d0, d1), (d1, d0)]
+    finals: Dict[Board, Tuple[Move, ...]] = {}
+    for order in orders:
+        boards = {tuple(board): ()}
+        for die in order:
+            after_die: Dict[Board, Tuple[Move, ...]] = {}
+            for before, moves in boards.items():
+                if not any(before):
+                    after_die.setdefault(before, moves)
+                    continue
+                for source, destination, after in die_moves(before, die):
+                    after_die.setdefault(
+                        after, moves + (Move(die, source, destination),)
+                    )
+            boards = after_die
+        for after, moves in boards.items():
+            finals.setdefault(after, moves)
+    return finals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a bearoff move table")
+    parser.add_argument("--points", type=int, default=6)
+    parser.add_argument("--chequers", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    generate_move_table(args.points, args.chequers, workers=args.workers)
@@ -0,0 +1,277 @@
+import functools
+import os
+from typing import Tuple
+
+import numpy as np
+
+from pybg.constants import ASSETS_DIR
+from pybg.core.logger import logger
+
+MET_PATH = f"{ASSETS_DIR}/gnubg/met.npz"
+
+# Longest match the table covers.
+MAX_SCORE = 25
+
+# Share of games that end in a gammon, used to generate the table.
+GAMMON_RATE = 0.26
+
+# Janowski's cube efficiency: 0 is a dead cube, 1 a perfectly live one.
+CUBE_EFFICIENCY = 0.68
+
+# Columns of a cumulative evaluation vector, as produced by the networks.
+WIN, WIN_GAMMON, WIN_BACKGAMMON, LOSE_GAMMON, LOSE_BACKGAMMON = range(5)
+
+# Cube ownership, from the perspective of the player on roll.
+CENTERED, OWNED, OPPONENT_OWNED = range(3)
+
+
+def generate_met(
+    max_score: int = MAX_SCORE, gammon_rate: float = GAMMON_RATE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute a match equity table with a Zadeh-style gammon-rate recurrence.
+
+    Returns `(met, post_crawford)`:
+      - met[i, j]: match winning chance for a player i-away against an
+        opponent j-away, before Crawford (a 1-away entry is the Crawford game).
+        Row 0 is a won match and column 0 a lost one.
+      - post_crawford[n]: winning chance for the trailer n-away against a
+        1-away leader after the Crawford game.
+
+    The trailer doubles at once after Crawford and the leader drops when that
+    is cheaper (the free drop). Cube play inside earlier games is not
+    modelled, so values are close to, not identical with, published tables.
+    """
+    win_single = (1.0 - gammon_rate) / 2.0
+    win_gammon = gammon_rate / 2.0
+
+    post_crawford = np.ones(max_score + 1)
+    for n in range(1, max_score + 1):
+        if n == 1:
+            post_crawford[n] = 0.5
+            continue
+        take = (
+            win_single * post_crawford[max(n - 2, 0)]
+            + win_gammon * post_crawford[max(n - 4, 0)]
+        )
+        drop = post_crawford[n - 1]
+        post_crawford[n] = min(take, drop)
+
+    met = np.zeros((max_score + 1, max_score + 1))
+    met[0, 1:] = 1.0
+    for total in range(2, 2 * max_score + 1):
+        for i in range(max(1, total - max_score), min(total, max_score + 1)):
+            j = total - i
+            if i == 1 and j == 1:
+                met[i, j] = 0.5
+            elif i == 1:
+                # Crawford game for the leader: no cube.
+                met[i, j] = (
+                    0.5
+                    + win_single * (1.0 - post_crawford[j - 1])
+                    + win_gammon * (1.0 - post_crawford[max(j - 2, 0)])
+                )
+            elif j == 1:
+                met[i, j] = (
+                    win_single * post_crawford[i - 1]
+                    + win_gammon * post_crawford[max(i - 2, 0)]
+                )
+            else:
+                met[i, j] = win_single * (met[i - 1, j] + 1.0 - met[j - 1, i]) + (
+                    win_gammon * (met[max(i - 2, 0), j] + 1.0 - met[max(j - 2, 0), i])
+                )
+    return met, post_crawford
+
+
+@functools.lru_cache(maxsize=1)
+def load_met(path: str = MET_PATH) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load the match equity table, generating and caching it on first use.
+    """
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            if (
+                cached["met"].shape == (MAX_SCORE + 1, MAX_SCORE + 1)
+                and float(cached["gammon_rate"]) == GAMMON_RATE
+            ):
+                return cached["met"], cached["post_crawford"]
+    met, post_crawford = generate_met()
+    try:
+        np.savez(path, met=met, post_crawford=post_crawford, gammon_rate=GAMMON_RATE)
+    except OSError as e:
+        logger.warning(f"Could not cache match equity table: {e}")
+    return met, post_crawford
+
+
+def match_equity(away: int, opponent_away: int, post_crawford: bool = False) -> float:
+    """
+    Match winning chance for a player `away` points from winning.
+    """
+    met, post = load_met()
+    if away <= 0:
+        return 1.0
+    if opponent_away <= 0:
+        return 0.0
+    if post_crawford and opponent_away == 1:
+        return float(post[away])
+    if post_crawford and away == 1:
+        return 1.0 - float(post[opponent_away])
+    return float(met[away, opponent_away])
+
+
+def _win_values(probs: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Split cumulative outputs into (p, W, L): the win chance and the average
+    number of points won when winning and lost when losing.
+    """
+    p = np.clip(probs[..., WIN], 1e-9, 1.0 - 1e-9)
+    won = p + probs[..., WIN_GAMMON] + probs[..., WIN_BACKGAMMON]
+    lost = (1.0 - p) + probs[..., LOSE_GAMMON] + probs[..., LOSE_BACKGAMMON]
+    return p, won / p, lost / (1.0 - p)
+
+
+def cubeless_equity(probs: np.ndarray) -> np.ndarray:
+    """
+    Money equity per unit cube of one or more (..., 5) evaluation vectors.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    return (
+        2.0 * probs[..., WIN]
+        - 1.0
+        + probs[..., WIN_GAMMON]
+        - probs[..., LOSE_GAMMON]
+        + probs[..., WIN_BACKGAMMON]
+        - probs[..., LOSE_BACKGAMMON]
+    )
+
+
+def _live_cube(p, left, take_point, cash_point, right, low, high, ownership):
+    """
+    Janowski's piecewise-linear live-cube value: `left` at p=0, `low` at the
+    take point, `high` at the cash point and `right` at p=1.
+    """
+    below = left + (low - left) * p / take_point
+    between = low + (high - low) * (p - take_point) / (cash_point - take_point)
+    above = high + (right - high) * (p - cash_point) / (1.0 - cash_point)
+    owned = np.where(p < cash_point, left + (high - left) * p / cash_point, above)
+    opponent_owned = np.where(
+        p < take_point,
+        below,
+        low + (right - low) * (p - take_point) / (1.0 - take_point),
+    )
+    centered = np.where(p < take_point, below, np.where(p < cash_point, between, above))
+    return np.select(
+        [ownership == OWNED, ownership == OPPONENT_OWNED],
+        [owned, opponent_owned],
+        centered,
+    )
+
+
+def cubeful_equity(
+    probs: np.ndarray,
+    ownership: int = CENTERED,
+    cube_efficiency: float = CUBE_EFFICIENCY,
+) -> np.ndarray:
+    """
+    Janowski cubeful money equity per unit cube, vectorized over (..., 5) inputs.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    p, won, lost = _win_values(probs)
+    take_point = (lost - 0.5) / (won + lost + 0.5)
+    cash_point = (lost + 1.0) / (won + lost + 0.5)
+    live = _live_cube(p, -lost, take_point, cash_point, won, -1.0, 1.0, ownership)
+    dead = p * (won + lost) - lost
+    return cube_efficiency * live + (1.0 - cube_efficiency) * dead
+
+
+def _outcome_equities(away, opponent_away, cube):
+    """
+    Match winning chances after winning and losing a single game, gammon and
+    backgammon at `cube`. Once either side is 1-away, later games are all
+    post-Crawford.
+    """
+    post = away == 1 or opponent_away == 1
+    win = [match_equity(away - n * cube, opponent_away, post) for n in (1, 2, 3)]
+    lose = [match_equity(away, opponent_away - n * cube, post) for n in (1, 2, 3)]
+    return win, lose
+
+
+def _mix(probs: np.ndarray, win, lose) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Match winning chances when the game is won and when it is lost, weighted
+    by the gammon mix of `probs`.
+    """
+    p = np.clip(probs[..., WIN], 1e-9, 1.0 - 1e-9)
+    wg, wbg = probs[..., WIN_GAMMON], probs[..., WIN_BACKGAMMON]
+    lg, lbg = probs[..., LOSE_GAMMON], probs[..., LOSE_BACKGAMMON]
+    won = ((p - wg) * win[0] + (wg - wbg) * win[1] + wbg * win[2]) / p
+    lost = ((1.0 - p - lg) * lose[0] + (lg - lbg) * lose[1] + lbg * lose[2]) / (1.0 - p)
+    return won, lost
+
+
+def cubeless_mwc(
+    probs: np.ndarray, away: int, opponent_away: int, cube: int = 1
+) -> np.ndarray:
+    """
+    Cubeless match winning chance of one or more (..., 5) evaluation vectors.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    won, lost = _mix(probs, *_outcome_equities(away, opponent_away, cube))
+    p = probs[..., WIN]
+    return p * won + (1.0 - p) * lost
+
+
+def cubeful_mwc(
+    probs: np.ndarray,
+    away: int,
+    opponent_away: int,
+    cube: int = 1,
+    ownership: int = CENTERED,
+    crawford: bool = False,
+    cube_efficiency: float = CUBE_EFFICIENCY,
+) -> np.ndarray:
+    """
+    Janowski cubeful match winning chance, vectorized over (..., 5) inputs.
+
+    The take and cash points are the dead-cube points implied by the match
+    equity table at twice the current cube. When the cube cannot be turned
+    usefully (the Crawford game, or a cube that already decides the match for
+    whoever would double) the cubeless value is returned.
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    p = np.clip(probs[..., WIN], 1e-9, 1.0 - 1e-9)
+    won, lost = _mix(probs, *_outcome_equities(away, opponent_away, cube))
+    dead = p * won + (1.0 - p) * lost
+
+    can_double = {
+        OWNED: away > cube,
+        OPPONENT_OWNED: opponent_away > cube,
+        CENTERED: away > cube or opponent_away > cube,
+    }[ownership]
+    if crawford or not can_double:
+        return dead
+
+    post = away == 1 or opponent_away == 1
+    cashed = match_equity(away - cube, opponent_away, post)
+    dropped = match_equity(away, opponent_away - cube, post)
+    won_doubled, lost_doubled = _mix(
+        probs, *_outcome_equities(away, opponent_away, 2 * cube)
+    )
+    spread = np.maximum(won_doubled - lost_doubled, 1e-9)
+    take_point = np.clip((dropped - lost_doubled) / spread, 1e-6, 1.0 - 2e-6)
+    cash_point = np.clip(
+        (cashed - lost_doubled) / spread, take_point + 1e-6, 1.0 - 1e-6
+    )
+    live = _live_cube(p, lost, take_point, cash_point, won, dropped, cashed, ownership)
+    return cube_efficiency * live + (1.0 - cube_efficiency) * dead
+
+
+def mwc_to_equity(
+    mwc: np.ndarray, away: int, opponent_away: int, cube: int = 1
+) -> np.ndarray:
+    """
+    Normalize match winning chances to money-like equity: -1 for losing and
+    +1 for winning a single game at `cube`.
+    """
+    win, lose = _outcome_equities(away, opponent_away, cube)
+    return (2.0 * np.asarray(mwc) - (win[0] + lose[0])) / (win[0] - lose[0])
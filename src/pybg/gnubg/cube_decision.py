@@ -0,0 +1,249 @@
+import dataclasses
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from pybg.core.board import CHECKERS, generate_plays
+from pybg.core.player import PlayerType
+from pybg.gnubg.cube import (
+    CENTERED,
+    OPPONENT_OWNED,
+    OWNED,
+    cubeful_equity,
+    cubeful_mwc,
+    match_equity,
+    mwc_to_equity,
+)
+from pybg.gnubg.match import GameState, Match
+from pybg.gnubg.position import Position
+from pybg.gnubg.rollout import (
+    PubevalPolicy,
+    Policy,
+    choose_play,
+    pubeval_win_probability,
+)
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+# Evaluates many positions at once, returning (N, 5) cumulative probabilities
+# for the player who has just moved into each position.
+BatchEvaluator = Callable[[List[Position]], np.ndarray]
+
+MAX_CACHE_ENTRIES = 100_000
+
+_ROLL_WEIGHTS = np.array([weight for _, weight in WEIGHTED_ROLLS]) / 36.0
+
+
+def _other_side(probs: np.ndarray) -> np.ndarray:
+    """
+    Cumulative (N, 5) chances seen from the other player.
+    """
+    flipped = probs[:, [0, 3, 4, 1, 2]]
+    flipped[:, 0] = 1.0 - flipped[:, 0]
+    return flipped
+
+
+def pubeval_probabilities(positions: List[Position]) -> np.ndarray:
+    """
+    Win chances from pubeval, with no gammons: cheap enough for every bot turn.
+    """
+    probs = np.zeros((len(positions), 5))
+    probs[:, 0] = [pubeval_win_probability(p) for p in positions]
+    return probs
+
+
+def nn_probabilities(evaluator) -> BatchEvaluator:
+    """
+    Wrap a GnubgEvaluator (or TorchGnubgEvaluator) as a batch evaluator,
+    falling back to pubeval for position classes that have no network.
+    """
+
+    def evaluate(positions: List[Position]) -> np.ndarray:
+        probs = pubeval_probabilities(positions)
+        rows = []
+        for i, position in enumerate(positions):
+            if position.player_off == CHECKERS:
+                probs[i] = (1.0, 0.0, 0.0, 0.0, 0.0)
+            elif position.classify() in evaluator.network_mapping:
+                rows.append(i)
+        if rows:
+            probs[rows] = evaluator.evaluate_batch([positions[i] for i in rows])
+        return probs
+
+    return evaluate
+
+
+@dataclasses.dataclass(frozen=True)
+class CubeState:
+    """
+    Cube and score from the perspective of the player who may double.
+    `away` is 0 in money games.
+    """
+
+    cube: int = 1
+    ownership: int = CENTERED
+    away: int = 0
+    opponent_away: int = 0
+    crawford: bool = False
+
+    @classmethod
+    def from_match(cls, match: Match) -> "CubeState":
+        """
+        Read the state of `match` for `match.player`, who is on roll or has
+        just offered a double.
+        """
+        cube = match.cube_value
+        if match.game_state == GameState.DOUBLED:
+            cube //= 2
+        if match.cube_holder == PlayerType.CENTERED:
+            ownership = CENTERED
+        elif match.cube_holder == match.player:
+            ownership = OWNED
+        else:
+            ownership = OPPONENT_OWNED
+
+        away = opponent_away = 0
+        if match.length:
+            scores = (match.player_0_score, match.player_1_score)
+            away = match.length - scores[int(match.player)]
+            opponent_away = match.length - scores[1 - int(match.player)]
+        return cls(cube, ownership, away, opponent_away, match.crawford)
+
+
+@dataclasses.dataclass(frozen=True)
+class CubeDecision:
+    """
+    Equities for the doubler, normalized to the current cube: money equity in
+    money games, and match equity rescaled to -1/+1 for a single game in
+    matches.
+    """
+
+    no_double: float
+    double_take: float
+    double_pass: float
+    available: bool = True  # False in the Crawford game or without cube access
+
+    @property
+    def double_equity(self) -> float:
+        return min(self.double_take, self.double_pass)
+
+    @property
+    def should_double(self) -> bool:
+        return self.available and self.double_equity > self.no_double
+
+    @property
+    def should_take(self) -> bool:
+        return self.double_take <= self.double_pass
+
+    def __str__(self) -> str:
+        return (
+            f"No double {self.no_double:+.3f}, double/take {self.double_take:+.3f}, "
+            f"double/pass {self.double_pass:+.3f}"
+        )
+
+
+class CubeDecisionEngine:
+    """
+    Double, take and pass equities from one batched evaluation of a position.
+
+    The doubler's 21 rolls, and the opponent's 21 replies to each, are
+    played with a fast checker policy, and the resulting positions are
+    evaluated in a single call. Each roll's chances, averaged over the
+    replies, are converted with the Janowski model from cube.py. The same
+    result answers both sides of a cube action: whether to double, and
+    whether the opponent should take. Results are cached by position and
+    cube state, so asking again within a game costs nothing.
+    """
+
+    def __init__(
+        self,
+        probabilities: BatchEvaluator = pubeval_probabilities,
+        policy: Policy = None,
+        checkers: int = CHECKERS,
+    ):
+        self.probabilities = probabilities
+        self.policy = policy or PubevalPolicy()
+        self.checkers = checkers
+        self.cache: Dict[Tuple[str, CubeState], CubeDecision] = {}
+
+    def decide(self, board) -> CubeDecision:
+        """
+        Cube decision for the board's player on roll (or who has just doubled).
+        """
+        return self.evaluate(board.position, CubeState.from_match(board.match))
+
+    def evaluate(self, position: Position, state: CubeState) -> CubeDecision:
+        key = (position.encode(), state)
+        if key not in self.cache:
+            if len(self.cache) >= MAX_CACHE_ENTRIES:
+                self.cache.clear()
+            self.cache[key] = self._evaluate(position, state)
+        return self.cache[key]
+
+    def _evaluate(self, position: Position, state: CubeState) -> CubeDecision:
+        probs = self._roll_probabilities(position)
+        available = not state.crawford and state.ownership != OPPONENT_OWNED
+
+        if not state.away:
+            no_double = _ROLL_WEIGHTS @ cubeful_equity(probs, state.ownership)
+            double_take = 2.0 * (_ROLL_WEIGHTS @ cubeful_equity(probs, OPPONENT_OWNED))
+            return CubeDecision(no_double, double_take, 1.0, available)
+
+        away, opponent_away, cube = state.away, state.opponent_away, state.cube
+        no_double = _ROLL_WEIGHTS @ cubeful_mwc(
+            probs, away, opponent_away, cube, state.ownership, state.crawford
+        )
+        double_take = _ROLL_WEIGHTS @ cubeful_mwc(
+            probs, away, opponent_away, 2 * cube, OPPONENT_OWNED
+        )
+        post_crawford = away == 1 or opponent_away == 1
+        double_pass = match_equity(away - cube, opponent_away, post_crawford)
+        no_double, double_take, double_pass = mwc_to_equity(
+            np.array([no_double, double_take, double_pass]), away, opponent_away, cube
+        )
+        return CubeDecision(
+            float(no_double), float(double_take), float(double_pass), available
+        )
+
+    def _roll_probabilities(self, position: Position) -> np.ndarray:
+        """
+        (21, 5) chances for the doubler after each of their rolls, averaged
+        over the opponent's 21 replies, from one batched evaluation. A roll
+        that ends the game is evaluated as it stands, and rolls reaching the
+        same position share its replies.
+        """
+        batch: List[Position] = []
+        rows: Dict[Position, slice] = {}
+        afters = self._after_rolls(position)
+        for after in afters:
+            if after in rows:
+                continue
+            start = len(batch)
+            if after.player_off == self.checkers:
+                batch.append(after)
+            else:
+                batch.extend(self._after_rolls(after.swap_players()))
+            rows[after] = slice(start, len(batch))
+
+        probs = self.probabilities(batch)
+        result = np.empty((len(WEIGHTED_ROLLS), 5))
+        for r, after in enumerate(afters):
+            chances = probs[rows[after]]
+            if after.player_off == self.checkers:
+                result[r] = chances[0]
+            else:
+                result[r] = _ROLL_WEIGHTS @ _other_side(chances)
+        return result
+
+    def _after_rolls(self, position: Position) -> List[Position]:
+        """
+        The position after each of the 21 rolls, played by the checker policy.
+        """
+        positions = []
+        for dice, _ in WEIGHTED_ROLLS:
+            plays = generate_plays(position, dice, checkers=self.checkers)
+            positions.append(
+                choose_play(self.policy, position, plays).position
+                if plays
+                else position
+            )
+        return positions
@@ -3,6 +3,7 @@ from pybg.gnubg.pub_eval import pubeval, pubeval_to_win_probability
 from pybg.core.board import Board
 from pybg.gnubg.position import PositionClass
 from pybg.gnubg.bearoff_database import BearoffDatabase
+from pybg.gnubg.race import evaluate_race
 
 
 def n_ply_evaluate(
@@ -136,6 +137,8 @@ class Eval:
             result = self._eval_terminal(position)
         elif pc in (PositionClass.BEAROFF1, PositionClass.BEAROFF2):
             result = self._eval_bearoff(board, pc)
+        elif pc == PositionClass.RACE:
+            result = self._eval_race(position)
         else:
             result = self._eval_static(position, pc)
 
@@ -167,6 +170,9 @@ class Eval:
     def _eval_bearoff(self, board, position_class) -> dict:
         return self.bearoff_db.evaluate(board, position_class)
 
+    def _eval_race(self, position) -> dict:
+        return evaluate_race(position)
+
     def _eval_static(self, position, pc) -> dict:
         pos_array = position.to_array()
         race = pc == PositionClass.RACE
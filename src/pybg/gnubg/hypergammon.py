@@ -0,0 +1,488 @@
+"""
+Exact cubeless equities for Hypergammon by retrograde analysis.
+
+Each side is a multiset of checker locations, 0 (borne off), 1-24 (pips to
+go) or 25 (the bar), ranked among all such multisets; a position is the pair
+(side on roll, opponent), indexed `player * n_sides + opponent`. Every
+position's successor for each die and checker is tabulated once, then value
+iteration sweeps all positions with gathers from those tables until the
+equities stop changing. Sweeps are split across a process pool over shared
+memory.
+
+The converged table is saved as a flat float32 .npy file and read through a
+memory map, so lookups cost a page fault rather than a load.
+"""
+
+import functools
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pybg.constants import ASSETS_DIR
+from pybg.core.board import Play
+from pybg.core.logger import logger
+from pybg.gnubg.position import Position
+from pybg.gnubg.search import WEIGHTED_ROLLS, SearchResult
+
+HYPERGAMMON_CHECKERS = 3
+
+# Side coordinates: 0 is off, 1-24 the point (pips to go), 25 the bar.
+BAR = 25
+HOME_POINTS = 6
+
+DEFAULT_TOLERANCE = 1e-5
+MAX_ITERATIONS = 1000
+
+# Smallest slice of positions worth sending to a worker.
+MIN_POSITIONS_PER_TASK = 1 << 16
+
+# Score per die played, ranking doubles by dice used before equity (see `_update`).
+_DIE_SCORE = 10.0
+
+
+def table_path(checkers: int = HYPERGAMMON_CHECKERS) -> str:
+    return f"{ASSETS_DIR}/gnubg/hypergammon_{checkers}.npy"
+
+
+def n_sides(checkers: int) -> int:
+    return math.comb(BAR + checkers, checkers)
+
+
+@functools.lru_cache(maxsize=4)
+def side_layouts(checkers: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every side layout as sorted checker locations (n_sides, checkers), and
+    a dense lookup from sorted locations to the layout's rank.
+    """
+    layouts = np.array(
+        list(itertools.combinations_with_replacement(range(BAR + 1), checkers)),
+        dtype=np.int64,
+    ).reshape(-1, checkers)
+    ranks = np.full((BAR + 1,) * checkers, -1, dtype=np.int64)
+    ranks[tuple(layouts.T)] = np.arange(len(layouts))
+    return layouts, ranks
+
+
+@functools.lru_cache(maxsize=4)
+def win_values(checkers: int) -> np.ndarray:
+    """
+    Points won against each opponent layout once every checker is off:
+    a gammon if none of its checkers is off, a backgammon if one is also on
+    the bar or in the winner's home board.
+    """
+    layouts, _ = side_layouts(checkers)
+    gammon = layouts.min(axis=1) > 0
+    backgammon = gammon & (layouts.max(axis=1) > 24 - HOME_POINTS)
+    return (1 + gammon + backgammon).astype(np.float32)
+
+
+def _single_moves(
+    player: np.ndarray, opponent: np.ndarray, die: int, ranks: np.ndarray
+) -> np.ndarray:
+    """
+    (n, checkers) position index after moving each checker of `player` by
+    `die`, or -1 where that move is illegal or repeats a checker's move.
+    """
+    n, checkers = player.shape
+    m = n_sides(checkers)
+    top = player[:, -1]
+    on_bar = top == BAR
+    rows = np.arange(n)
+    result = np.full((n, checkers), -1, dtype=np.int64)
+    for c in range(checkers):
+        source = player[:, c]
+        dest = source - die
+        bearing_off = dest <= 0
+        legal = (source > 0) & (~on_bar | (source == BAR))
+        if c > 0:
+            legal &= source != player[:, c - 1]
+        # Bear off once home, overshooting only from the highest point.
+        legal &= ~bearing_off | ((top <= HOME_POINTS) & ((dest == 0) | (source == top)))
+        landing = opponent == (BAR - dest)[:, None]
+        blots = landing.sum(axis=1)
+        legal &= bearing_off | (blots < 2)
+
+        after = player.copy()
+        after[:, c] = np.maximum(dest, 0)
+        hit = ~bearing_off & (blots == 1)
+        hit_opponent = opponent.copy()
+        hit_opponent[rows[hit], np.argmax(landing[hit], axis=1)] = BAR
+        after.sort(axis=1)
+        hit_opponent.sort(axis=1)
+        index = ranks[tuple(after.T)] * m + ranks[tuple(hit_opponent.T)]
+        result[:, c] = np.where(legal, index, -1)
+    return result
+
+
+def move_tables(
+    checkers: int, out: Optional[np.ndarray] = None, chunk: int = 1 << 20
+) -> np.ndarray:
+    """
+    (6, checkers, n) successor of every position for each die and checker,
+    with illegal moves pointing at the sentinel index n.
+    """
+    layouts, ranks = side_layouts(checkers)
+    m = len(layouts)
+    n = m * m
+    tables = np.empty((6, checkers, n), dtype=np.int32) if out is None else out
+    for first in range(0, n, chunk):
+        states = np.arange(first, min(first + chunk, n))
+        player, opponent = layouts[states // m], layouts[states % m]
+        for die in range(1, 7):
+            moves = _single_moves(player, opponent, die, ranks)
+            tables[die - 1, :, states[0] : states[-1] + 1] = np.where(
+                moves < 0, n, moves
+            ).T
+    return tables
+
+
+# Sweep state: set in-process, or in each pool worker by _init_sweep.
+_sweep_state: dict = {}
+
+# Shared arrays: name -> (shape, dtype).
+_ARRAYS = {
+    "moves": lambda k, n: ((6, k, n), np.int32),
+    "value": lambda k, n: ((n + 1,), np.float32),
+    "after": lambda k, n: ((n + 1,), np.float32),
+    "single": lambda k, n: ((6, n + 1), np.float32),
+    "double": lambda k, n: ((3, 6, n + 1), np.float32),
+    "update": lambda k, n: ((n,), np.float32),
+}
+
+
+def _init_sweep(names: Dict[str, str], checkers: int) -> None:
+    m = n_sides(checkers)
+    n = m * m
+    for key, name in names.items():
+        shape, dtype = _ARRAYS[key](checkers, n)
+        shm = SharedMemory(name=name)
+        _sweep_state[f"{key}_shm"] = shm
+        _sweep_state[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _sweep_state.update(checkers=checkers, m=m, n=n)
+
+
+def _best(table: np.ndarray, moves: np.ndarray, offset: float = 0.0) -> np.ndarray:
+    """
+    Best of `table` over the checker moves `moves` (checkers, n).
+    """
+    best = table[moves[0]]
+    for row in moves[1:]:
+        np.maximum(best, table[row], out=best)
+    return best + offset if offset else best
+
+
+def _singles(states: slice) -> None:
+    """
+    Best single-die afterstate values, and the first level of doubles.
+    """
+    s = _sweep_state
+    after, single, double = s["after"], s["single"], s["double"]
+    finished = np.arange(states.start, states.stop) < s["m"]
+    for die in range(6):
+        best = _best(after, s["moves"][die, :, states])
+        own = after[states]
+        single[die, states] = np.where(finished, own, best)
+        double[0, die, states] = np.where(
+            finished,
+            own + _DIE_SCORE,
+            np.where(best > -np.inf, best + _DIE_SCORE, own),
+        )
+
+
+def _doubles(args: Tuple[slice, int]) -> None:
+    """
+    Level `level` of the doubles: the best sequence of `level + 1` dice.
+    """
+    states, level = args
+    s = _sweep_state
+    after, double = s["after"], s["double"]
+    finished = np.arange(states.start, states.stop) < s["m"]
+    for die in range(6):
+        best = _best(double[level - 1, die], s["moves"][die, :, states], _DIE_SCORE)
+        own = after[states]
+        double[level, die, states] = np.where(
+            finished,
+            own + _DIE_SCORE * (level + 1),
+            np.where(best > -np.inf, best, own),
+        )
+
+
+def _update(states: slice) -> float:
+    """
+    New equity of the positions in `states`: the expectation over the rolls
+    of the best play, where a play must use as many dice as it can and, if
+    only one, the larger when it can. Returns the largest change.
+    """
+    s = _sweep_state
+    moves, single, double = s["moves"], s["single"], s["double"]
+    own = s["after"][states]
+    total = np.zeros(states.stop - states.start, dtype=np.float32)
+    for (d0, d1), weight in WEIGHTED_ROLLS:
+        a, b = d0 - 1, d1 - 1
+        if a == b:
+            # Scores count the dice played in tens over the equity.
+            score = _best(double[2, a], moves[a, :, states], _DIE_SCORE)
+            score = np.where(score > -np.inf, score, own)
+            value = score - _DIE_SCORE * np.round(score / _DIE_SCORE)
+        else:
+            both = np.maximum(
+                _best(single[b], moves[a, :, states]),
+                _best(single[a], moves[b, :, states]),
+            )
+            larger, smaller = single[b, states], single[a, states]
+            value = np.where(
+                both > -np.inf,
+                both,
+                np.where(
+                    larger > -np.inf,
+                    larger,
+                    np.where(smaller > -np.inf, smaller, own),
+                ),
+            )
+        total += weight / 36.0 * value
+    fixed = _fixed(states)
+    total[fixed] = s["value"][states][fixed]
+    change = float(np.max(np.abs(total - s["value"][states]), initial=0.0))
+    s["update"][states] = total
+    return change
+
+
+def _fixed(states: slice) -> np.ndarray:
+    """
+    Positions in `states` where a side has already borne everything off.
+    """
+    m = _sweep_state["m"]
+    index = np.arange(states.start, states.stop)
+    return (index < m) | (index % m == 0)
+
+
+def _afterstates() -> None:
+    """
+    Equity of every afterstate for the side that just moved: the points won
+    once it is off, otherwise minus the equity of the opponent on roll.
+    """
+    s = _sweep_state
+    m, n = s["m"], s["n"]
+    after = s["after"]
+    after[:n] = -s["value"][:n].reshape(m, m).T.ravel()
+    after[:m] = win_values(s["checkers"])
+
+
+def solve(
+    checkers: int = HYPERGAMMON_CHECKERS,
+    workers: int = 1,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_iterations: int = MAX_ITERATIONS,
+) -> np.ndarray:
+    """
+    Cubeless equities (n_sides ** 2,) for the player on roll in every
+    `checkers`-checker position, iterated until no equity changes by more
+    than `tolerance`. Positions where a side is already off hold the
+    final result; positions no game can reach are solved all the same.
+    """
+    start = time.perf_counter()
+    m = n_sides(checkers)
+    n = m * m
+    shms = {}
+    pool = None
+    try:
+        for key, spec in _ARRAYS.items():
+            shape, dtype = spec(checkers, n)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            shms[key] = SharedMemory(create=True, size=size)
+        names = {key: shm.name for key, shm in shms.items()}
+        _init_sweep(names, checkers)
+        s = _sweep_state
+        move_tables(checkers, out=s["moves"])
+        logger.info(
+            f"Hypergammon {checkers}-checker move tables built "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+        value = s["value"]
+        value[:] = 0.0
+        wins = win_values(checkers)
+        value[:m] = wins  # the side on roll is off; never reached
+        value[:n:m] = -wins  # the opponent is off
+        # Illegal moves point past the last position, at a play never chosen.
+        for key in ("value", "after", "single", "double"):
+            s[key][..., n] = -np.inf
+
+        slices = max(1, min(4 * workers, n // MIN_POSITIONS_PER_TASK))
+        bounds = np.linspace(0, n, slices + 1).astype(np.int64)
+        tasks = [slice(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+        if workers > 1 and slices > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_sweep,
+                initargs=(names, checkers),
+            )
+        run = pool.map if pool else map
+
+        for iteration in range(1, max_iterations + 1):
+            _afterstates()
+            list(run(_singles, tasks))
+            for level in (1, 2):
+                list(run(_doubles, [(task, level) for task in tasks]))
+            change = max(run(_update, tasks))
+            value[:n] = s["update"]
+            logger.info(
+                f"Hypergammon {checkers}-checker sweep {iteration}: "
+                f"largest change {change:.2e}"
+            )
+            if change < tolerance:
+                break
+        else:
+            logger.warning(
+                f"Hypergammon solver stopped after {max_iterations} sweeps "
+                f"(largest change {change:.2e})"
+            )
+        logger.info(
+            f"Solved {n} Hypergammon positions in {time.perf_counter() - start:.1f}s"
+        )
+        return value[:n].copy()
+    finally:
+        if pool:
+            pool.shutdown()
+        _sweep_state.clear()
+        for shm in shms.values():
+            shm.close()
+            shm.unlink()
+
+
+def generate_table(
+    path: Optional[str] = None,
+    checkers: int = HYPERGAMMON_CHECKERS,
+    workers: int = os.cpu_count() or 1,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> str:
+    """
+    Solve `checkers`-checker Hypergammon and save the equities at
+    `table_path(checkers)` by default.
+    """
+    path = path or table_path(checkers)
+    equities = solve(checkers, workers, tolerance)
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, equities)
+    os.replace(tmp_path, path)
+    return path
+
+
+class HypergammonTable:
+    """
+    Perfect-play cubeless equities read from a solved table through a
+    memory map.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.values = np.load(path, mmap_mode="r")
+        m = math.isqrt(len(self.values))
+        checkers = 1
+        while n_sides(checkers) < m:
+            checkers += 1
+        if n_sides(checkers) ** 2 != len(self.values):
+            raise ValueError(f"{path} is not a Hypergammon table")
+        self.checkers = checkers
+        self.m = m
+        self.layouts, self.ranks = side_layouts(checkers)
+
+    def _rank(self, locations: List[int]) -> int:
+        if len(locations) > self.checkers:
+            raise ValueError(
+                f"Position has more than {self.checkers} checkers on a side"
+            )
+        locations = sorted(locations + [0] * (self.checkers - len(locations)))
+        return int(self.ranks[tuple(locations)])
+
+    def sides(self, position: Position) -> Tuple[int, int]:
+        """
+        Layout ranks of the player on roll and the opponent.
+        """
+        player = [BAR] * position.player_bar
+        opponent = [BAR] * position.opponent_bar
+        for i, n in enumerate(position.board_points):
+            if n > 0:
+                player += [i + 1] * n
+            elif n < 0:
+                opponent += [24 - i] * -n
+        return self._rank(player), self._rank(opponent)
+
+    def equity(self, position: Position) -> float:
+        """
+        Equity of the player on roll in `position`.
+        """
+        player, opponent = self.sides(position)
+        return float(self.values[player * self.m + opponent])
+
+    def play_equity(self, play: Play) -> float:
+        """
+        Equity of `play` for the player making it.
+        """
+        player, opponent = self.sides(play.position)
+        if player == 0:
+            return float(win_values(self.checkers)[opponent])
+        return -float(self.values[opponent * self.m + player])
+
+
+@functools.lru_cache(maxsize=2)
+def load_table(path: str) -> HypergammonTable:
+    return HypergammonTable(path)
+
+
+class PerfectPlaySearch:
+    """
+    Drop-in for `IterativeDeepeningSearch` that ranks plays by their exact
+    equity, so it finishes at once and ignores the time budget.
+    """
+
+    def __init__(self, table: HypergammonTable):
+        self.table = table
+
+    def search(
+        self, plays: List[Play], time_ms: Optional[float] = None
+    ) -> SearchResult:
+        start = time.perf_counter()
+        ranked = sorted(
+            ((self.table.play_equity(play), play) for play in plays),
+            key=lambda r: r[0],
+            reverse=True,
+        )
+        return SearchResult(
+            best_play=ranked[0][1] if ranked else None,
+            ranked=ranked,
+            depth=0,
+            nodes=len(ranked),
+            nodes_per_depth=[len(ranked)],
+            elapsed_ms=(time.perf_counter() - start) * 1000.0,
+            timed_out=False,
+        )
+
+
+def perfect_play_search(game) -> Optional[PerfectPlaySearch]:
+    """
+    Perfect-play search for a Hypergammon game once its table has been
+    generated, otherwise None (callers fall back to the heuristic search).
+    """
+    from pybg.variants.hypergammon import Hypergammon
+
+    if not isinstance(game, Hypergammon):
+        return None
+    path = table_path()
+    if not os.path.exists(path):
+        logger.info(
+            f"No Hypergammon table at {path}; generate one with "
+            "`python -m pybg.gnubg.hypergammon` for perfect play."
+        )
+        return None
+    return PerfectPlaySearch(load_table(path))
+
+
+if __name__ == "__main__":
+    generate_table()
@@ -1,4 +1,5 @@
 # neural_net.py
+import hashlib
 import os
 
 import numpy as np
@@ -9,6 +10,7 @@ from pybg.constants import ASSETS_DIR
 from pybg.core.logger import logger
 
 WEIGHTS_FILE = f"{ASSETS_DIR}/gnubg/nngnubg.weights"
+WEIGHTS_VERSION = "GNU Backgammon 1.01"
 
 
 def sigmoid(x):
@@ -159,6 +161,33 @@ class GnubgNetwork:
         return output
 
 
+def save_networks(
+    path: str, networks: dict[str, GnubgNetwork], version: str = WEIGHTS_VERSION
+) -> None:
+    """
+    Write networks to a GNUBG-style multi-network weights file, in the
+    layout `GnubgEvaluator.load_all_networks` reads back.
+
+    Parameters:
+      path: file to write.
+      networks: networks by name; underscores are written as spaces, so
+        "prune_contact" is stored as "prune contact".
+      version: the file's first line.
+    """
+    lines = [version]
+    for name, net in networks.items():
+        lines.append(name.replace("_", " "))
+        lines.append(
+            f"{net.cInput} {net.cHidden} {net.cOutput} {net.nTrained} "
+            f"{net.rBetaHidden:.7f} {net.rBetaOutput:.7f}"
+        )
+        # Weights column by column, as the loader reads them.
+        for values in (net.weights1.T, net.weights2.T, net.bias1, net.bias2):
+            lines.extend(f"{v:.7f}" for v in np.ravel(values))
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
 # ------------------------------------------------------------------------------
 # Container class that loads all networks from the weights file and
 # provides a simple evaluation interface.
@@ -171,7 +200,7 @@ class GnubgEvaluator:
         Parameters:
           weights_file: path to the weights file (defaults to "gnubg.weights" in the same directory).
         """
-        self.weights_file = WEIGHTS_FILE
+        self.weights_file = weights_file
         # Load all network objects from the file.
         nets = self.load_all_networks()
         # Create a mapping from PositionClass to the appropriate network.
@@ -181,6 +210,19 @@ class GnubgEvaluator:
             PositionClass.CRASHED: (nets["crashed"], nets["prune_crashed"]),
         }
 
+    def cache_key(self) -> str:
+        """
+        A digest of the loaded weights, so that rollouts with different nets
+        are told apart.
+        """
+        digest = hashlib.sha1()
+        for nets in self.network_mapping.values():
+            for net in nets:
+                digest.update(repr((net.rBetaHidden, net.rBetaOutput)).encode())
+                for array in (net.weights1, net.weights2, net.bias1, net.bias2):
+                    digest.update(np.ascontiguousarray(array, dtype=float).tobytes())
+        return digest.hexdigest()
+
     def load_all_networks(self) -> dict[str, GnubgNetwork]:
         """
         Load all neural networks from a GNUBG-style multi-network weights file.
@@ -260,9 +302,12 @@ class GnubgEvaluator:
           - losegammon
           - losebackgammon
         """
-        position = board.position
-        player_on_roll = board.match.player
+        return self.evaluate(board.position)
 
+    def evaluate(self, position) -> dict:
+        """
+        Evaluate a bare Position, returning the same keys as `evaluate_position`.
+        """
         # 🧠 DEBUG: Show selected network
         pos_class = position.classify()
         net = self.network_mapping[pos_class]
@@ -283,3 +328,18 @@ class GnubgEvaluator:
             "losegammon": raw[3],
             "losebackgammon": raw[4],
         }
+
+    def evaluate_batch(self, positions) -> np.ndarray:
+        """
+        Evaluate many positions with one matrix product per network.
+
+        Returns an (N, 5) array with columns in the order of `evaluate`'s keys.
+        """
+        classes = [position.classify() for position in positions]
+        outputs = np.empty((len(positions), 5))
+        for pos_class in set(classes):
+            net = self.network_mapping[pos_class][0]
+            rows = [i for i, c in enumerate(classes) if c is pos_class]
+            inputs = np.stack([encode_board(positions[i], net.cInput) for i in rows])
+            outputs[rows] = net.evaluate(inputs)
+        return outputs
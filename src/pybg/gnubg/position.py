@@ -1,5 +1,3 @@
-from math import comb
-
 import base64
 import dataclasses
 import os
@@ -8,6 +6,8 @@ from enum import Enum
 from typing import List, Optional, Tuple
 import numpy as np
 
+from pybg.gnubg.bearoff_index import bearoff_index
+
 basename = os.path.basename(__file__)
 dirname = os.path.dirname(__file__)
 
@@ -291,27 +291,6 @@ class Position:
         GNUBG-style classification of the board position.
         """
 
-        def position_f(f_bits: int, n: int, r: int) -> int:
-            if n == r:
-                return 0
-            if f_bits & (1 << (n - 1)):
-                return comb(n - 1, r) + position_f(f_bits, n - 1, r - 1)
-            else:
-                return position_f(f_bits, n - 1, r)
-
-        # BEAROFF threshold: replicate PositionBearoff signature check
-        def compute_bearoff_signature(slots):
-            j = 5  # ← Start from 5, per GNUBG
-            for x in slots:
-                j += x
-            f_bits = 1 << j
-            for x in slots:
-                j -= x + 1
-                if j < 0:
-                    break  # Match GNUBG behavior: just skip invalid bits
-                f_bits |= 1 << j
-            return position_f(f_bits, 21, 6)
-
         # Extract player and opponent points:
         player_points = tuple(x if x > 0 else 0 for x in self.board_points)
         opponent_points = tuple(
@@ -346,8 +325,9 @@ class Position:
             return PositionClass.RACE
 
         if (
-            compute_bearoff_signature(player_points[:6]) > 923
-            or compute_bearoff_signature(opponent_points[:6]) > 923
+            # BEAROFF threshold: replicate PositionBearoff signature check
+            bearoff_index(player_points[:6]) > 923
+            or bearoff_index(opponent_points[:6]) > 923
         ):
             return PositionClass.BEAROFF1
 
@@ -361,8 +341,8 @@ class Position:
         Convention (from pub_eval.c):
           - Element 0: opponent's checkers on the bar (stored as a negative integer)
           - Elements 1 to 24: board locations 1-24 (from computer's perspective)
-              The ordering should be such that element 1 corresponds to board point 24,
-              and element 24 corresponds to board point 1.
+              The computer moves from 24 towards 1, so element 1 is the computer's
+              ace point (board_points[0]) and element 24 its 24 point (board_points[23]).
               In these locations, computer's checkers are positive and opponent's are negative.
           - Element 25: computer's checkers on the bar (a positive integer)
           - Element 26: computer's checkers borne off (a positive integer)
@@ -371,10 +351,9 @@ class Position:
         pos = [0] * 28
         # Element 0: opponent's bar (make it negative)
         pos[0] = -self.opponent_bar
-        # Elements 1 to 24: reverse the board_points order.
-        board_reversed = list(self.board_points[::-1])
+        # Elements 1 to 24: board_points in order, ace point first.
         for i in range(24):
-            pos[1 + i] = board_reversed[i]
+            pos[1 + i] = self.board_points[i]
         # Element 25: computer's bar
         pos[25] = self.player_bar
         # Element 26: computer's borne off
@@ -1,7 +1,10 @@
 import math
+from typing import Iterable, List, Optional, Tuple
 
 import numpy as np
 
+from pybg.gnubg.position import Position
+
 # Fast weights (contact and race)
 gwc = np.array(
     [
@@ -312,5 +315,177 @@ def pubeval_x(race: bool, pos: list) -> float:
     return float(np.dot(weights, x))
 
 
+# Both weight vectors as columns (contact, race), so a batch is one matmul.
+_WEIGHTS = np.stack([gwc, gwr], axis=1)
+
+
+def pubeval_features(boards: np.ndarray) -> np.ndarray:
+    """
+    (N, 122) pubeval inputs for an (N, 28) array of `Position.to_array`
+    boards, laid out as `pubeval` reads them (the weights carry the scaling).
+    """
+    boards = np.asarray(boards)
+    points = boards[:, 24:0:-1]  # the 24 point first
+    units = np.empty(points.shape + (5,))
+    units[:, :, 0] = points == -1
+    units[:, :, 1] = points == 1
+    units[:, :, 2] = points >= 2
+    units[:, :, 3] = points == 3
+    units[:, :, 4] = np.maximum(points - 3, 0)
+    x = np.empty((len(boards), 122))
+    x[:, :120] = units.reshape(len(boards), 120)
+    x[:, 120] = -boards[:, 0]
+    x[:, 121] = boards[:, 26]
+    return x
+
+
+def pubeval_races(boards: np.ndarray) -> np.ndarray:
+    """
+    Whether each (N, 28) board is a race: nobody on the bar and every player
+    checker past every opponent checker.
+    """
+    boards = np.asarray(boards)
+    points = boards[:, 1:25]
+    index = np.arange(24)
+    player_back = np.where(points > 0, index, -1).max(axis=1)
+    opponent_back = np.where(points < 0, index, 24).min(axis=1)
+    return (boards[:, 0] == 0) & (boards[:, 25] == 0) & (player_back < opponent_back)
+
+
+def pubeval_batch(boards: np.ndarray, race: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    `pubeval` scores of an (N, 28) array of boards from one matmul against
+    both weight vectors, taking the race column where `race` is set
+    (`pubeval_races` by default).
+    """
+    boards = np.asarray(boards)
+    if race is None:
+        race = pubeval_races(boards)
+    column = np.broadcast_to(race, (len(boards),)).astype(np.intp)
+    scores = (pubeval_features(boards) @ _WEIGHTS)[np.arange(len(boards)), column]
+    scores[boards[:, 26] == 15] = 99999999.0
+    return scores
+
+
+def pubeval_ranking(
+    boards: np.ndarray, race: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices of `boards` from best to worst pubeval score, and the scores.
+    """
+    scores = pubeval_batch(boards, race)
+    return np.argsort(-scores, kind="stable"), scores
+
+
+def _point_terms(weights: np.ndarray) -> List[List[float]]:
+    """
+    pubeval's term for each board point (ace point first) holding each signed
+    checker count from -15 to 15 (index count + 15).
+    """
+    counts = np.arange(-15, 16)
+    terms = []
+    for point in range(24):
+        w = weights[(23 - point) * 5 :]
+        terms.append(
+            np.select(
+                [counts == -1, counts == 1, counts == 2, counts == 3, counts >= 4],
+                [w[0], w[1], w[2], w[2] + w[3], w[2] + w[4] * (counts - 3)],
+                0.0,
+            ).tolist()
+        )
+    return terms
+
+
+# Plain lists: scoring a move reads a handful of entries, where NumPy
+# scalar indexing would cost more than the arithmetic.
+CONTACT_TERMS = _point_terms(gwc)
+RACE_TERMS = _point_terms(gwr)
+
+
+class IncrementalPubeval:
+    """
+    pubeval of the plays from one position, by delta updates.
+
+    The contact and race scores of the position are computed once. A move
+    changes only the terms of its source and destination points, plus the
+    opponent's bar on a hit or the borne-off count. So a play costs
+    O(moves) rather than O(24) points, and no board is rebuilt. Whether the
+    result is a race is tracked the same way, from how many checkers are
+    still behind the opponent's back checker.
+    """
+
+    def __init__(self, position: Position):
+        self.position = position
+        board = position.to_array()
+        self.contact = pubeval(False, board)
+        self.race = pubeval(True, board)
+        points = position.board_points
+        self.opponent_back = min((i for i in range(24) if points[i] < 0), default=24)
+        self.behind = position.player_bar + sum(
+            n for n in points[self.opponent_back :] if n > 0
+        )
+
+    def score(self, moves: Iterable) -> float:
+        """
+        pubeval of the position after `moves` (`Move`s with -1 for the bar
+        or off, as `Position.apply_move` takes them).
+        """
+        points = self.position.board_points
+        back = self.opponent_back
+        contact, race = self.contact, self.race
+        behind = self.behind
+        off = self.position.player_off
+        hit = False
+        counts = {}
+        for move in moves:
+            source, destination = move.source, move.destination
+            if source == -1:
+                was_behind = True
+            else:
+                n = counts.get(source, points[source])
+                counts[source] = n - 1
+                contact += CONTACT_TERMS[source][n + 14] - CONTACT_TERMS[source][n + 15]
+                race += RACE_TERMS[source][n + 14] - RACE_TERMS[source][n + 15]
+                was_behind = source >= back
+            if destination == -1:
+                off += 1
+                contact += gwc[121]
+                race += gwr[121]
+            else:
+                n = counts.get(destination, points[destination])
+                after = 1 if n == -1 else n + 1
+                if n == -1:
+                    hit = True
+                    contact += gwc[120]
+                    race += gwr[120]
+                counts[destination] = after
+                contact += (
+                    CONTACT_TERMS[destination][after + 15]
+                    - CONTACT_TERMS[destination][n + 15]
+                )
+                race += (
+                    RACE_TERMS[destination][after + 15]
+                    - RACE_TERMS[destination][n + 15]
+                )
+            if was_behind and destination < back:
+                behind -= 1
+        if off == 15:
+            return 99999999.0
+        is_race = not hit and self.position.opponent_bar == 0 and behind == 0
+        return float(race if is_race else contact)
+
+    def best(self, plays: List):
+        """
+        The play with the highest pubeval, first on ties.
+        """
+        return max(plays, key=lambda play: self.score(play.moves))
+
+
 def pubeval_to_win_probability(score: float, scaling_factor: float = 100.0) -> float:
     return 1.0 / (1.0 + math.exp(-score / scaling_factor))
+
+
+def pubeval_to_win_probabilities(
+    scores: np.ndarray, scaling_factor: float = 100.0
+) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.asarray(scores) / scaling_factor))
@@ -0,0 +1,190 @@
+"""
+Race evaluation from effective pip counts and exact dice convolution tables.
+
+The number of turns a side needs to bear off is modelled as the number of
+rolls whose pips first cover its effective pip count (EPC). Those turn
+distributions come from one precomputed table, so evaluating a race is two
+table lookups and a dot product, vectorized over any number of positions.
+
+A side's EPC is its pips outside the home board plus the EPC of its home
+board with every outside checker gathered on the six point. Home-board EPCs
+are calibrated against the one-sided bearoff database: the pip count whose
+modelled expected number of turns equals the database's. A side already
+bearing off uses the database's exact distribution instead.
+"""
+
+import functools
+from typing import List, Tuple
+
+import numpy as np
+
+from pybg.gnubg.bearoff_database import OS_PATH, _BearoffReader
+from pybg.gnubg.bearoff_index import bearoff_indices
+from pybg.gnubg.cube import LOSE_GAMMON, WIN, WIN_GAMMON
+from pybg.gnubg.position import Position
+
+HOME_POINTS = 6
+
+# Largest (effective) pip count covered: 15 checkers on the 24 point plus
+# wastage.
+MAX_PIPS = 400
+
+# Turns tracked per distribution; more than covers MAX_PIPS at 3 pips a turn.
+MAX_TURNS = 144
+
+
+def turn_pips() -> np.ndarray:
+    """
+    Distribution of the pips moved in one turn (doubles count four times).
+    """
+    pips = np.zeros(25)
+    for d0 in range(1, 7):
+        for d1 in range(1, 7):
+            pips[4 * d0 if d0 == d1 else d0 + d1] += 1 / 36
+    return pips
+
+
+@functools.lru_cache(maxsize=1)
+def turn_table() -> np.ndarray:
+    """
+    (MAX_PIPS + 1, MAX_TURNS): chance that covering `pips` takes exactly `n`
+    turns, from repeated convolution of the one-turn distribution.
+    """
+    step = turn_pips()
+    # covered[n, e]: chance that n turns move at least e pips.
+    covered = np.zeros((MAX_TURNS, MAX_PIPS + 1))
+    moved = np.zeros(MAX_PIPS + 1)
+    moved[0] = 1.0
+    for n in range(MAX_TURNS):
+        tail = np.cumsum(moved[::-1])[::-1]
+        covered[n] = tail
+        moved = np.convolve(moved, step)
+        moved[MAX_PIPS] += moved[MAX_PIPS + 1 :].sum()
+        moved = moved[: MAX_PIPS + 1]
+    table = np.diff(covered, axis=0, prepend=0.0).T
+    table[:, -1] += 1.0 - table.sum(axis=1)
+    return table
+
+
+@functools.lru_cache(maxsize=1)
+def expected_turns() -> np.ndarray:
+    return turn_table() @ np.arange(MAX_TURNS)
+
+
+def turn_distributions(pips: np.ndarray) -> np.ndarray:
+    """
+    (N, MAX_TURNS) turn distributions for fractional pip counts, linearly
+    interpolated between neighbouring table rows.
+    """
+    pips = np.clip(np.asarray(pips, dtype=np.float64), 0.0, MAX_PIPS)
+    low = np.minimum(np.floor(pips).astype(np.int64), MAX_PIPS - 1)
+    frac = (pips - low)[:, None]
+    table = turn_table()
+    return (1.0 - frac) * table[low] + frac * table[low + 1]
+
+
+@functools.lru_cache(maxsize=2)
+def home_boards(os_path: str = OS_PATH) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bear-off and first-checker-off turn distributions (n, 32) and effective
+    pip counts (n,) of every home board in the one-sided database.
+    """
+    reader = _BearoffReader(os_path, {})
+    try:
+        distributions = reader.read_distributions(np.arange(len(reader.index)))
+    finally:
+        reader.close()
+    turns = distributions[:, :32] / 65535.0
+    first_off = distributions[:, 32:] / 65535.0
+    epc = np.interp(turns @ np.arange(32), expected_turns(), np.arange(MAX_PIPS + 1))
+    return turns, first_off, epc
+
+
+def _sides(positions: List[Position]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (N, 24) checker counts for the player and the opponent, each from its own
+    ace point.
+    """
+    points = np.array([p.board_points for p in positions], dtype=np.int64)
+    return np.clip(points, 0, None), np.clip(-points[:, ::-1], 0, None)
+
+
+def _gathered(side: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Home boards with outside checkers moved to the six point, and the pips
+    that takes.
+    """
+    outside = side[:, HOME_POINTS:]
+    excess = outside @ np.arange(1, outside.shape[1] + 1)
+    home = side[:, :HOME_POINTS].copy()
+    home[:, -1] += outside.sum(axis=1)
+    return home, excess
+
+
+def effective_pip_counts(side: np.ndarray, os_path: str = OS_PATH) -> np.ndarray:
+    """
+    EPC of each (N, 24) one-sided checker layout.
+    """
+    home, excess = _gathered(side)
+    return excess + home_boards(os_path)[2][bearoff_indices(home)]
+
+
+def side_turns(
+    side: np.ndarray, checkers: int = 15, os_path: str = OS_PATH
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (N, MAX_TURNS) distributions of the turns each one-sided checker layout
+    needs to bear off, and to bear off a first checker (0 once one is off).
+    Exact from the database when every checker is home, otherwise modelled:
+    the EPC for bearing off, and the pips to bring everything home and clear
+    the lowest point for the first checker.
+    """
+    home, excess = _gathered(side)
+    turns, first_off, epc = home_boards(os_path)
+    indices = bearoff_indices(home)
+    lowest = np.argmax(home > 0, axis=1) + 1
+    first_pips = np.where(side.sum(axis=1) < checkers, 0, excess + lowest)
+
+    result = turn_distributions(excess + epc[indices])
+    first = turn_distributions(first_pips)
+    exact = excess == 0
+    for modelled, table in ((result, turns), (first, first_off)):
+        modelled[exact] = 0.0
+        modelled[exact, : table.shape[1]] = table[indices[exact]]
+    return result, first
+
+
+def race_probabilities(
+    positions: List[Position], checkers: int = 15, os_path: str = OS_PATH
+) -> np.ndarray:
+    """
+    (N, 5) cumulative win, win gammon, win backgammon, lose gammon and lose
+    backgammon chances for the player on roll in each race position.
+    Backgammons are taken as impossible once contact is broken.
+    """
+    player, opponent = _sides(positions)
+    on_roll, on_roll_first = side_turns(player, checkers, os_path)
+    other, other_first = side_turns(opponent, checkers, os_path)
+
+    probs = np.zeros((len(positions), 5))
+    probs[:, WIN] = _BearoffReader.win_probability(on_roll, other)
+    probs[:, WIN_GAMMON], probs[:, LOSE_GAMMON] = _BearoffReader.gammon_probabilities(
+        on_roll, other, on_roll_first, other_first
+    )
+    return probs
+
+
+def evaluate_race(position: Position, checkers: int = 15) -> dict:
+    """
+    Race evaluation of one position, keyed like `Eval.evaluate`.
+    """
+    win, win_gammon, win_backgammon, lose_gammon, lose_backgammon = race_probabilities(
+        [position], checkers
+    )[0]
+    return {
+        "win": float(win),
+        "win_gammon": float(win_gammon),
+        "win_backgammon": float(win_backgammon),
+        "lose_gammon": float(lose_gammon),
+        "lose_backgammon": float(lose_backgammon),
+    }
@@ -0,0 +1,497 @@
+import dataclasses
+import functools
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pybg.core.board import (
+    CHECKERS,
+    POINTS_PER_QUADRANT,
+    Play,
+    generate_plays,
+    generate_positions,
+)
+from pybg.gnubg.bearoff_database import OS_PATH, _BearoffReader
+from pybg.gnubg.position import Position
+from pybg.gnubg.pub_eval import (
+    IncrementalPubeval,
+    pubeval,
+    pubeval_batch,
+    pubeval_to_win_probability,
+)
+from pybg.gnubg.search import (
+    WEIGHTED_ROLLS,
+    BatchStaticEvaluator,
+    IterativeDeepeningSearch,
+    StaticEvaluator,
+    pubeval_batch_evaluator,
+)
+
+# Per-trial result layout (cumulative, GNUBG-style: gammons include backgammons).
+WIN, WIN_GAMMON, WIN_BACKGAMMON, LOSE_GAMMON, LOSE_BACKGAMMON, EQUITY = range(6)
+RESULT_FIELDS = (
+    "win",
+    "win_gammon",
+    "win_backgammon",
+    "lose_gammon",
+    "lose_backgammon",
+    "equity",
+)
+
+Policy = Callable[[List[Play]], Play]
+
+# Position of each of the 21 rolls, lower die first, in WEIGHTED_ROLLS.
+ROLL_INDEX = {dice: r for r, (dice, _) in enumerate(WEIGHTED_ROLLS)}
+ROLL_WEIGHTS = np.array([weight for _, weight in WEIGHTED_ROLLS], dtype=float)
+
+
+def is_race(position: Position) -> bool:
+    """
+    True when contact is broken: every player checker is past every opponent checker.
+    """
+    if position.player_bar or position.opponent_bar:
+        return False
+    points = position.board_points
+    player_back = max((i for i in range(24) if points[i] > 0), default=-1)
+    opponent_back = min((i for i in range(24) if points[i] < 0), default=24)
+    return player_back < opponent_back
+
+
+def is_bearoff(position: Position) -> bool:
+    """
+    True when both sides have all their remaining checkers in their home boards.
+    """
+    if position.player_bar or position.opponent_bar:
+        return False
+    points = position.board_points
+    return all(p <= 0 for p in points[POINTS_PER_QUADRANT:]) and all(
+        p >= 0 for p in points[: 24 - POINTS_PER_QUADRANT]
+    )
+
+
+def fast_pubeval(position: Position) -> float:
+    """
+    Raw pubeval score using the cheap race test instead of a full classify().
+    """
+    return pubeval(is_race(position), position.to_array())
+
+
+class PubevalPolicy:
+    """
+    Greedy 0-ply checker play with pubeval: the fastest rollout policy.
+
+    Given the position the plays start from, each play is scored by delta
+    updates from it (see `IncrementalPubeval`); otherwise all plays are
+    scored in one batch.
+    """
+
+    def __call__(self, plays: List[Play], position: Optional[Position] = None) -> Play:
+        if len(plays) == 1:
+            return plays[0]
+        if position is not None:
+            return IncrementalPubeval(position).best(plays)
+        boards = np.array([p.position.to_array() for p in plays])
+        return plays[int(np.argmax(pubeval_batch(boards)))]
+
+    def cache_key(self) -> dict:
+        return {}
+
+
+def choose_play(policy: Policy, position: Position, plays: List[Play]) -> Play:
+    """
+    Apply `policy` to the plays from `position`, passing the position to
+    policies that score plays incrementally from it.
+    """
+    if isinstance(policy, PubevalPolicy):
+        return policy(plays, position)
+    return policy(plays)
+
+
+class SearchPolicy:
+    """
+    Checker play chosen by an n-ply search over any static evaluator
+    (pubeval, or a GNUBG neural net via `nn_evaluator`).
+    """
+
+    def __init__(self, evaluate: StaticEvaluator, ply: int = 0):
+        self.evaluate = evaluate
+        self.ply = ply
+        self.search = IterativeDeepeningSearch(evaluate=evaluate, max_ply=ply)
+
+    def __call__(self, plays: List[Play]) -> Play:
+        return self.search.search(plays).best_play
+
+    def cache_key(self) -> dict:
+        return {"evaluate": self.evaluate, "ply": self.ply}
+
+
+def nn_evaluator(evaluator) -> StaticEvaluator:
+    """
+    Wrap a GnubgEvaluator as a static evaluator, falling back to pubeval for
+    position classes that have no network.
+    """
+
+    def evaluate(position: Position) -> float:
+        if position.player_off == CHECKERS:
+            return 1.0
+        pos_class = position.classify()
+        if pos_class not in evaluator.network_mapping:
+            return pubeval_to_win_probability(fast_pubeval(position))
+        return float(evaluator.evaluate(position)["win"])
+
+    evaluate.cache_key = lambda: {"evaluator": evaluator}
+    return evaluate
+
+
+def pubeval_win_probability(position: Position) -> float:
+    if position.player_off == CHECKERS:
+        return 1.0
+    return pubeval_to_win_probability(fast_pubeval(position))
+
+
+def batch_evaluator(
+    evaluate: StaticEvaluator, evaluate_batch: Optional[BatchStaticEvaluator] = None
+) -> BatchStaticEvaluator:
+    """
+    `evaluate_batch`, else the batched pubeval when `evaluate` is
+    `pubeval_win_probability`, else `evaluate` applied to each position.
+    """
+    if evaluate_batch is not None:
+        return evaluate_batch
+    if evaluate is pubeval_win_probability:
+        return pubeval_batch_evaluator
+    return lambda positions: np.array([evaluate(p) for p in positions])
+
+
+@dataclasses.dataclass
+class RolloutStats:
+    """
+    Running mean and standard error of per-trial results (Welford's method).
+    """
+
+    trials: int = 0
+    mean: np.ndarray = dataclasses.field(default_factory=lambda: np.zeros(6))
+    m2: np.ndarray = dataclasses.field(default_factory=lambda: np.zeros(6))
+    elapsed: float = 0.0
+
+    @classmethod
+    def from_results(cls, results: np.ndarray) -> "RolloutStats":
+        """
+        Accumulate per-trial results in trial order, so the same trials always
+        give bit-identical statistics however they were computed.
+        """
+        stats = cls()
+        for result in results:
+            stats.update(result)
+        return stats
+
+    def update(self, result: np.ndarray) -> None:
+        self.trials += 1
+        delta = result - self.mean
+        self.mean += delta / self.trials
+        self.m2 += delta * (result - self.mean)
+
+    def merge(self, other: "RolloutStats") -> None:
+        """
+        Fold in the statistics of other trials (Chan et al.'s pairwise update).
+        """
+        if not other.trials:
+            return
+        trials = self.trials + other.trials
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.trials / trials)
+        self.m2 = self.m2 + other.m2 + delta**2 * (self.trials * other.trials / trials)
+        self.trials = trials
+
+    @property
+    def stderr(self) -> np.ndarray:
+        if self.trials < 2:
+            return np.zeros(6)
+        return np.sqrt(self.m2 / (self.trials - 1) / self.trials)
+
+    @property
+    def trials_per_second(self) -> float:
+        return self.trials / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        stderr = self.stderr
+        result = {name: float(self.mean[i]) for i, name in enumerate(RESULT_FIELDS)}
+        result.update(
+            {f"{name}_stderr": float(stderr[i]) for i, name in enumerate(RESULT_FIELDS)}
+        )
+        result["trials"] = self.trials
+        return result
+
+    def __str__(self) -> str:
+        stderr = self.stderr
+        return (
+            f"{self.trials} trials: "
+            f"{self.mean[WIN]:.3f} {self.mean[WIN_GAMMON]:.3f} {self.mean[WIN_BACKGAMMON]:.3f}"
+            f" - {1 - self.mean[WIN]:.3f} {self.mean[LOSE_GAMMON]:.3f} {self.mean[LOSE_BACKGAMMON]:.3f}"
+            f"  Eq.: {self.mean[EQUITY]:+.3f} (±{stderr[EQUITY]:.3f})"
+        )
+
+
+# All 36 ordered rolls, in a fixed order for stratification.
+ALL_ROLLS: Tuple[Tuple[int, int], ...] = tuple(
+    (d0, d1) for d0 in range(1, 7) for d1 in range(1, 7)
+)
+
+# Extra entropy word for the stratified-roll permutations.
+STRATIFY_STREAM = 0x5354
+
+
+def trial_rng(seed: int, trial: int) -> np.random.Generator:
+    """
+    The dice stream for one trial, independent of which trials ran before it.
+    """
+    return np.random.default_rng((seed, trial))
+
+
+def stratified_roll(seed: int, trial: int, turn: int) -> Tuple[int, int]:
+    """
+    Quasi-random roll for an early `turn` of `trial`.
+
+    Every block of 36**(turn + 1) consecutive trials sees each combination of
+    the first turn + 1 rolls exactly once, so the luck of the opening rolls
+    cancels out instead of adding variance. The order is shuffled per seed.
+    """
+    return ALL_ROLLS[_roll_order(seed, turn)[(trial // 36**turn) % 36]]
+
+
+@functools.lru_cache(maxsize=64)
+def _roll_order(seed: int, turn: int) -> Tuple[int, ...]:
+    # A third entropy word keeps these streams apart from the per-trial dice.
+    return tuple(np.random.default_rng((seed, turn, STRATIFY_STREAM)).permutation(36))
+
+
+class RolloutEngine:
+    """
+    Cubeless Monte Carlo rollouts of a position with the player on roll.
+
+    Each trial plays the game out with `policy` on its own seeded dice stream,
+    optionally truncating into the one-sided bearoff database once both sides
+    are home, or after `truncate_at` half-moves. The first `stratify` rolls
+    are stratified over the 36 combinations. With variance reduction on,
+    the luck of every roll (actual roll value minus the average over all 36
+    rolls, at 0-ply) is subtracted from the trial's win and equity results.
+
+    The 0-ply values behind the luck and truncation are scored in one batch
+    per position, by `luck_batch_evaluator` and `truncate_batch_evaluator`
+    (see `batch_evaluator` for the defaults).
+
+    Known limitation: trials are bound by move generation in Python, which
+    takes about four fifths of a plain pubeval trial. That gives tens of
+    trials per second on one core (a few with variance reduction), not
+    thousands; batching the policy's scoring would not close the gap.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[Policy] = None,
+        seed: int = 0,
+        variance_reduction: bool = False,
+        luck_evaluator: StaticEvaluator = pubeval_win_probability,
+        truncate_bearoff: bool = True,
+        truncate_at: Optional[int] = None,
+        stratify: int = 0,
+        truncate_evaluator: StaticEvaluator = pubeval_win_probability,
+        bearoff_path: str = OS_PATH,
+        checkers: int = CHECKERS,
+        luck_batch_evaluator: Optional[BatchStaticEvaluator] = None,
+        truncate_batch_evaluator: Optional[BatchStaticEvaluator] = None,
+    ):
+        self.policy = policy or PubevalPolicy()
+        self.seed = seed
+        self.variance_reduction = variance_reduction
+        self.luck_evaluator = luck_evaluator
+        self.truncate_bearoff = truncate_bearoff
+        self.truncate_at = truncate_at
+        self.stratify = stratify
+        self.truncate_evaluator = truncate_evaluator
+        self.luck_batch_evaluator = batch_evaluator(
+            luck_evaluator, luck_batch_evaluator
+        )
+        self.truncate_batch_evaluator = batch_evaluator(
+            truncate_evaluator, truncate_batch_evaluator
+        )
+        self.checkers = checkers
+        self._roll_values_cache: Dict[tuple, np.ndarray] = {}
+        # Truncates pure bearoffs, or looks their plays up when played out.
+        # Uncached, so long runs keep no state per position reached.
+        self.bearoff = _BearoffReader(bearoff_path)
+
+    def rollout(
+        self,
+        position: Position,
+        trials: int,
+        first_trial: int = 0,
+        progress: Optional[Callable[[RolloutStats], None]] = None,
+        progress_every: int = 100,
+    ) -> RolloutStats:
+        """
+        Roll out `position` for `trials` trials and return the running statistics.
+        """
+        stats = RolloutStats()
+        start = time.perf_counter()
+        for trial in range(first_trial, first_trial + trials):
+            stats.update(self.play_trial(position, trial))
+            if progress and stats.trials % progress_every == 0:
+                stats.elapsed = time.perf_counter() - start
+                progress(stats)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def rollout_play(self, play: Play, trials: int, **kwargs) -> RolloutStats:
+        """
+        Roll out the position after `play`, reported from the mover's perspective.
+        """
+        stats = self.rollout(play.position.swap_players(), trials, **kwargs)
+        stats.mean = invert_result(stats.mean)
+        stats.m2 = stats.m2[
+            [WIN, LOSE_GAMMON, LOSE_BACKGAMMON, WIN_GAMMON, WIN_BACKGAMMON, EQUITY]
+        ]
+        return stats
+
+    def play_trial(self, position: Position, trial: int) -> np.ndarray:
+        """
+        Play one game out from `position` and return its result vector.
+        """
+        rng = trial_rng(self.seed, trial)
+        sign = 1.0  # +1 while the original player is on roll
+        luck = 0.0
+        half_moves = 0
+
+        while True:
+            if self.truncate_bearoff and is_bearoff(position):
+                win = self.bearoff.evaluate_position(position)["win_prob"]
+                return self._result(win, 0.0, 0.0, 0.0, 0.0, sign, luck)
+            if self.truncate_at is not None and half_moves >= self.truncate_at:
+                win = self._pre_roll_value(position, half_moves <= self.stratify)
+                return self._result(win, 0.0, 0.0, 0.0, 0.0, sign, luck)
+
+            d0, d1 = rng.integers(1, 7, size=2)
+            if half_moves < self.stratify:
+                dice = stratified_roll(self.seed, trial, half_moves)
+            else:
+                dice = (int(d0), int(d1))
+
+            if self.variance_reduction:
+                luck += sign * self._luck(position, dice, half_moves <= self.stratify)
+
+            plays = self._plays(position, dice)
+            if plays:
+                position = choose_play(self.policy, position, plays).position
+                if position.player_off == self.checkers:
+                    gammon, backgammon = self._gammons(position)
+                    return self._result(1.0, gammon, backgammon, 0.0, 0.0, sign, luck)
+
+            position = position.swap_players()
+            sign = -sign
+            half_moves += 1
+
+    def _plays(self, position: Position, dice) -> List[Play]:
+        plays = self.bearoff.plays(position, dice)
+        if plays is None:
+            plays = generate_plays(position, dice, checkers=self.checkers)
+        return plays
+
+    def _result(self, win, win_g, win_bg, lose_g, lose_bg, sign, luck) -> np.ndarray:
+        """
+        Build a result vector for the player on roll and flip it to the
+        original player's perspective, then subtract accumulated luck.
+        """
+        result = np.array([win, win_g, win_bg, lose_g, lose_bg, 0.0], dtype=np.float64)
+        if sign < 0:
+            result = invert_result(result)
+        result[EQUITY] = (
+            2.0 * result[WIN]
+            - 1.0
+            + result[WIN_GAMMON]
+            + result[WIN_BACKGAMMON]
+            - result[LOSE_GAMMON]
+            - result[LOSE_BACKGAMMON]
+        )
+        if luck:
+            result[WIN] -= luck
+            result[EQUITY] -= 2.0 * luck
+        return result
+
+    def _gammons(self, position: Position):
+        """
+        Gammon/backgammon flags for a mover who has just borne off their last checker.
+        """
+        if position.opponent_off > 0:
+            return 0.0, 0.0
+        backgammon = position.opponent_bar > 0 or any(
+            p < 0 for p in position.board_points[:POINTS_PER_QUADRANT]
+        )
+        return 1.0, 1.0 if backgammon else 0.0
+
+    def _successors(self, position: Position, dice) -> List[Position]:
+        positions = self.bearoff.successor_positions(position, dice)
+        if positions is None:
+            positions = generate_positions(position, dice, checkers=self.checkers)
+        return positions
+
+    def _roll_values(
+        self, position: Position, evaluate_batch: BatchStaticEvaluator, cached: bool
+    ) -> np.ndarray:
+        """
+        The best 0-ply value after each of the 21 rolls, in WEIGHTED_ROLLS
+        order, with the successors of every roll scored in one batch. A roll
+        with no legal play is worth `position` itself.
+
+        With `cached`, for positions reached before the first random roll
+        (the start, and the stratified openings), the values are kept for
+        the engine's later trials, which all reach those positions again.
+        """
+        key = (position, evaluate_batch)
+        if cached and key in self._roll_values_cache:
+            return self._roll_values_cache[key]
+        per_roll = [self._successors(position, roll) for roll, _ in WEIGHTED_ROLLS]
+        counts = np.array([len(successors) for successors in per_roll])
+        positions = [p for successors in per_roll for p in successors]
+        if not counts.all():
+            positions.append(position)
+        values = np.asarray(evaluate_batch(positions), dtype=float)
+        best = np.full(len(per_roll), values[-1])
+        moved = counts > 0
+        if moved.any():
+            starts = np.cumsum(counts) - counts
+            best[moved] = np.maximum.reduceat(values, starts[moved])
+        if cached:
+            self._roll_values_cache[key] = best
+        return best
+
+    def _luck(self, position: Position, dice, cached: bool) -> float:
+        """
+        Win-probability luck of `dice` for the player on roll at 0-ply.
+        """
+        values = self._roll_values(position, self.luck_batch_evaluator, cached)
+        actual = values[ROLL_INDEX[tuple(sorted(dice))]]
+        return actual - float(values @ ROLL_WEIGHTS) / 36.0
+
+    def _pre_roll_value(self, position: Position, cached: bool) -> float:
+        """
+        Win probability for the player on roll, before rolling, at 1-ply.
+        """
+        values = self._roll_values(position, self.truncate_batch_evaluator, cached)
+        return float(values @ ROLL_WEIGHTS) / 36.0
+
+
+def invert_result(result: np.ndarray) -> np.ndarray:
+    """
+    Flip a result vector to the other player's perspective.
+    """
+    return np.array(
+        [
+            1.0 - result[WIN],
+            result[LOSE_GAMMON],
+            result[LOSE_BACKGAMMON],
+            result[WIN_GAMMON],
+            result[WIN_BACKGAMMON],
+            -result[EQUITY],
+        ]
+    )
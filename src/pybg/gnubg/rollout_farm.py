@@ -0,0 +1,187 @@
+import dataclasses
+import hashlib
+import json
+import os
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from pybg.core.logger import logger
+from pybg.gnubg.position import Position
+from pybg.gnubg.rollout import RolloutEngine, RolloutStats
+
+DEFAULT_CHUNK_SIZE = 72  # a multiple of 36 keeps stratified blocks together
+
+_worker_engine: Optional[RolloutEngine] = None
+
+
+def _init_worker(engine_kwargs: dict) -> None:
+    global _worker_engine
+    _worker_engine = RolloutEngine(**engine_kwargs)
+
+
+def _run_chunk(position_id: str, first: int, count: int) -> np.ndarray:
+    position = Position.decode(position_id)
+    return np.array(
+        [_worker_engine.play_trial(position, t) for t in range(first, first + count)]
+    )
+
+
+def _describe(value):
+    """
+    A JSON-able description of an engine setting for the checkpoint key.
+
+    Objects describe their configuration through `cache_key()`; plain
+    module-level functions by their name. Anything else, such as a closure
+    or an object without `cache_key`, could hide settings that change the
+    trials, so it is rejected.
+    """
+    if isinstance(value, (int, float, bool, str, type(None))):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return [_describe(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _describe(v) for k, v in sorted(value.items())}
+    name = getattr(value, "__qualname__", type(value).__qualname__)
+    module = getattr(value, "__module__", type(value).__module__)
+    cache_key = getattr(value, "cache_key", None)
+    if callable(cache_key):
+        return [f"{module}.{name}", _describe(cache_key())]
+    if isinstance(value, types.FunctionType) and "<locals>" not in name:
+        return f"{module}.{name}"
+    raise TypeError(
+        f"Cannot key a rollout checkpoint on {value!r}: "
+        "give it a cache_key() describing its configuration"
+    )
+
+
+class RolloutFarm:
+    """
+    Shards a rollout's trials over a process pool and checkpoints them to disk.
+
+    Trials are split into fixed-size chunks. Every trial draws its dice from
+    its own (seed, trial) stream, so which worker runs a chunk never changes
+    its result, and the merged statistics are accumulated in trial order:
+    the outcome is bit-identical for any worker count, and an interrupted
+    rollout resumes from its checkpoint without redoing finished chunks.
+    """
+
+    def __init__(
+        self,
+        workers: int = os.cpu_count() or 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_path: Optional[str] = None,
+        **engine_kwargs,
+    ):
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.engine_kwargs = engine_kwargs
+        self.settings = {
+            name: _describe(value) for name, value in sorted(engine_kwargs.items())
+        }
+
+    def run(
+        self,
+        position: Position,
+        trials: int,
+        progress: Optional[Callable[[RolloutStats], None]] = None,
+    ) -> RolloutStats:
+        """
+        Roll out `position` for `trials` trials, resuming from the checkpoint if any.
+        """
+        position_id = position.encode()
+        key = self._key(position_id, trials)
+        results, done = self._load_checkpoint(key, trials)
+        chunks = self._chunks(trials)
+        pending = [i for i, _ in enumerate(chunks) if not done[i]]
+        if len(pending) < len(chunks):
+            logger.info(f"Resuming rollout: {len(chunks) - len(pending)} chunks done")
+
+        # Finished chunks are merged into `so_far` as they come in, for progress.
+        so_far = RolloutStats()
+        if progress:
+            for i in np.flatnonzero(done):
+                first, count = chunks[i]
+                so_far.merge(RolloutStats.from_results(results[first : first + count]))
+
+        start = time.perf_counter()
+        if self.workers == 1:
+            _init_worker(self.engine_kwargs)
+            for i in pending:
+                first, count = chunks[i]
+                chunk_results = _run_chunk(position_id, first, count)
+                self._store(results, done, i, first, chunk_results, key)
+                self._report(progress, so_far, chunk_results, start)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.engine_kwargs,),
+            ) as pool:
+                futures = {
+                    pool.submit(_run_chunk, position_id, *chunks[i]): i for i in pending
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    chunk_results = future.result()
+                    self._store(results, done, i, chunks[i][0], chunk_results, key)
+                    self._report(progress, so_far, chunk_results, start)
+
+        stats = RolloutStats.from_results(results)
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def _chunks(self, trials: int) -> List[tuple]:
+        return [
+            (first, min(self.chunk_size, trials - first))
+            for first in range(0, trials, self.chunk_size)
+        ]
+
+    def _key(self, position_id: str, trials: int) -> str:
+        """
+        Identify a rollout by everything that determines its trial results.
+        """
+        blob = json.dumps(
+            [position_id, trials, self.chunk_size, self.settings], sort_keys=True
+        )
+        return hashlib.sha1(blob.encode()).hexdigest()
+
+    def _load_checkpoint(self, key: str, trials: int):
+        results = np.zeros((trials, 6))
+        done = np.zeros(len(self._chunks(trials)), dtype=bool)
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with np.load(self.checkpoint_path) as checkpoint:
+                if str(checkpoint["key"]) == key:
+                    results[:] = checkpoint["results"]
+                    done[:] = checkpoint["done"]
+                else:
+                    logger.warning(
+                        "Checkpoint is for a different rollout, ignoring it."
+                    )
+        return results, done
+
+    def _store(self, results, done, index, first, chunk_results, key) -> None:
+        results[first : first + len(chunk_results)] = chunk_results
+        done[index] = True
+        if self.checkpoint_path:
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, key=key, results=results, done=done)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def _report(self, progress, so_far, chunk_results, start) -> None:
+        if not progress:
+            return
+        so_far.merge(RolloutStats.from_results(chunk_results))
+        progress(
+            dataclasses.replace(
+                so_far,
+                mean=so_far.mean.copy(),
+                m2=so_far.m2.copy(),
+                elapsed=time.perf_counter() - start,
+            )
+        )
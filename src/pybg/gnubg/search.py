@@ -0,0 +1,244 @@
+import dataclasses
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pybg.core.board import CHECKERS, Play, generate_plays
+from pybg.gnubg.bearoff_database import OS_PATH, _BearoffReader
+from pybg.gnubg.position import Position, PositionClass
+from pybg.gnubg.pub_eval import (
+    IncrementalPubeval,
+    pubeval,
+    pubeval_batch,
+    pubeval_to_win_probabilities,
+    pubeval_to_win_probability,
+)
+
+# The 21 distinct rolls with their weight out of 36.
+WEIGHTED_ROLLS: Tuple[Tuple[Tuple[int, int], int], ...] = tuple(
+    ((d0, d1), 1 if d0 == d1 else 2) for d0 in range(1, 7) for d1 in range(d0, 7)
+)
+
+# How many candidates survive into each depth (GNUBG-style move filter).
+DEFAULT_MOVE_FILTER: Dict[int, int] = {1: 8, 2: 3}
+
+MAX_PLY = 2
+
+StaticEvaluator = Callable[[Position], float]
+BatchStaticEvaluator = Callable[[List[Position]], np.ndarray]
+
+
+class SearchTimeout(Exception):
+    """Raised internally when the wall-clock deadline is hit mid-depth."""
+
+
+@dataclasses.dataclass
+class SearchResult:
+    best_play: Optional[Play]
+    ranked: List[Tuple[float, Play]]  # (score, play), best first
+    depth: int  # deepest ply fully completed
+    nodes: int  # static evaluations across all depths
+    nodes_per_depth: List[int]
+    elapsed_ms: float
+    timed_out: bool
+
+
+def pubeval_evaluator(position: Position) -> float:
+    """
+    Static 0-ply evaluation: the win probability for the player who has just
+    moved into `position` (i.e. the opponent is on roll).
+    """
+    if position.player_off == CHECKERS:
+        return 1.0
+    race = position.classify() == PositionClass.RACE
+    return pubeval_to_win_probability(pubeval(race, position.to_array()))
+
+
+def pubeval_batch_evaluator(positions: List[Position]) -> np.ndarray:
+    """
+    `pubeval_evaluator` over many positions with a single matmul. Races are
+    detected from the boards, so a checker on the bar always means contact.
+    """
+    boards = np.array([p.to_array() for p in positions])
+    probs = pubeval_to_win_probabilities(pubeval_batch(boards))
+    probs[boards[:, 26] == CHECKERS] = 1.0
+    return probs
+
+
+class IterativeDeepeningSearch:
+    """
+    Anytime search over candidate plays: 0-ply, then 1-ply, then 2-ply on the
+    candidates that survive the move filter, stopping at a wall-clock deadline.
+
+    Scores are win probabilities for the player making the play. When the
+    deadline interrupts a depth, the ranking from the last completed depth is
+    returned; 0-ply always completes.
+
+    Sibling positions (the candidates at 0-ply, the replies to each roll)
+    are scored together by `evaluate_batch`, which defaults to the batched
+    pubeval when `evaluate` is pubeval. Replies in pure bearoffs come from
+    the bearoff database at `bearoff_path` (None to always generate them).
+    """
+
+    def __init__(
+        self,
+        evaluate: StaticEvaluator = pubeval_evaluator,
+        max_ply: int = MAX_PLY,
+        move_filter: Optional[Dict[int, int]] = None,
+        checkers: int = CHECKERS,
+        evaluate_batch: Optional[BatchStaticEvaluator] = None,
+        bearoff_path: Optional[str] = OS_PATH,
+    ):
+        self.evaluate = evaluate
+        self.bearoff = _BearoffReader(bearoff_path) if bearoff_path else None
+        if evaluate_batch is None and evaluate is pubeval_evaluator:
+            evaluate_batch = pubeval_batch_evaluator
+        self.evaluate_batch = evaluate_batch
+        self.max_ply = max_ply
+        self.move_filter = move_filter or DEFAULT_MOVE_FILTER
+        self.checkers = checkers
+        self._deadline: Optional[float] = None
+        self._nodes = 0
+
+    def search(
+        self, plays: List[Play], time_ms: Optional[float] = None
+    ) -> SearchResult:
+        """
+        Rank `plays` within `time_ms` milliseconds (no limit if None).
+        """
+        start = time.perf_counter()
+        self._deadline = start + time_ms / 1000.0 if time_ms is not None else None
+
+        ranked: List[Tuple[float, Play]] = []
+        nodes_per_depth: List[int] = []
+        depth = -1
+        timed_out = False
+
+        for ply in range(self.max_ply + 1):
+            if ply == 0:
+                candidates = list(plays)
+            else:
+                keep = self.move_filter.get(ply, len(ranked))
+                candidates = [play for _, play in ranked[:keep]]
+            if not candidates:
+                break
+            # A single candidate cannot be re-ranked by searching deeper.
+            if ply > 0 and len(candidates) == 1:
+                break
+
+            self._nodes = 0
+            try:
+                if ply == 0:
+                    # 0-ply is cheap and always finished, so even a spent
+                    # budget returns a play.
+                    deadline, self._deadline = self._deadline, None
+                    try:
+                        positions = [play.position for play in candidates]
+                        values = self._static_batch(positions)
+                    finally:
+                        self._deadline = deadline
+                    scored = list(zip(values.tolist(), candidates))
+                else:
+                    scored = [
+                        (self._play_value(play, ply), play) for play in candidates
+                    ]
+            except SearchTimeout:
+                nodes_per_depth.append(self._nodes)
+                timed_out = True
+                break
+            nodes_per_depth.append(self._nodes)
+
+            scored.sort(key=lambda x: x[0], reverse=True)
+            # Candidates filtered out keep their shallower ranking below the survivors.
+            survivors = {id(play) for _, play in scored}
+            ranked = scored + [r for r in ranked if id(r[1]) not in survivors]
+            depth = ply
+
+        self._deadline = None
+        return SearchResult(
+            best_play=ranked[0][1] if ranked else None,
+            ranked=ranked,
+            depth=depth,
+            nodes=sum(nodes_per_depth),
+            nodes_per_depth=nodes_per_depth,
+            elapsed_ms=(time.perf_counter() - start) * 1000.0,
+            timed_out=timed_out,
+        )
+
+    def _static(self, position: Position) -> float:
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        self._nodes += 1
+        return self.evaluate(position)
+
+    def _static_batch(self, positions: List[Position]) -> np.ndarray:
+        if self.evaluate_batch is None:
+            return np.array([self._static(p) for p in positions])
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        self._nodes += len(positions)
+        return np.asarray(self.evaluate_batch(positions), dtype=float)
+
+    def _best_reply(self, position: Position, replies: List[Play]) -> Play:
+        """
+        The 0-ply reply from `position`, scored by delta updates when the
+        search runs on pubeval.
+        """
+        if self.evaluate_batch is not pubeval_batch_evaluator:
+            values = self._static_batch([p.position for p in replies])
+            return replies[int(np.argmax(values))]
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        self._nodes += len(replies)
+        return IncrementalPubeval(position).best(replies)
+
+    def _reply(self, position: Position, dice) -> Optional[Position]:
+        """
+        The position after the opponent's 0-ply reply to `dice`, as GNUBG
+        picks it, or None when they cannot move.
+        """
+        if self.bearoff is not None:
+            positions = self.bearoff.successor_positions(position, dice)
+            if positions is not None:
+                if not positions:
+                    return None
+                return positions[int(np.argmax(self._static_batch(positions)))]
+        replies = generate_plays(position, dice, checkers=self.checkers)
+        if not replies:
+            return None
+        return self._best_reply(position, replies).position
+
+    def _play_value(self, play: Play, ply: int) -> float:
+        return self._value(play.position, ply)
+
+    def _value(self, position: Position, ply: int) -> float:
+        """
+        Value of `position` for the player who has just moved into it.
+        """
+        if ply == 0 or position.player_off == self.checkers:
+            return self._static(position)
+
+        opponent = position.swap_players()
+        total = 0.0
+        for dice, weight in WEIGHTED_ROLLS:
+            reply = self._reply(opponent, dice)
+            if reply is not None:
+                total += weight * self._value(reply, ply - 1)
+            else:
+                total += weight * self._value(opponent, ply - 1)
+        return 1.0 - total / 36.0
+
+
+def search_plays(
+    plays: List[Play],
+    time_ms: Optional[float] = None,
+    evaluate: StaticEvaluator = pubeval_evaluator,
+    max_ply: int = MAX_PLY,
+) -> SearchResult:
+    """
+    Convenience wrapper: rank `plays` with an iterative-deepening search.
+    """
+    return IterativeDeepeningSearch(evaluate=evaluate, max_ply=max_ply).search(
+        plays, time_ms
+    )
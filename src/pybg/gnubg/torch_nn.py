@@ -0,0 +1,190 @@
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+from torch import nn
+
+from pybg.constants import ASSETS_DIR
+from pybg.core.logger import logger
+from pybg.gnubg.neural_net import (
+    WEIGHTS_FILE,
+    GnubgEvaluator,
+    GnubgNetwork,
+    encode_board,
+)
+from pybg.gnubg.position import PositionClass
+
+SCRIPTED_PATH = f"{ASSETS_DIR}/gnubg/nngnubg.pt"
+
+# Same clamp as neural_net.sigmoid, so saturated outputs agree exactly.
+SIGMOID_CLAMP = 60.0
+
+
+class TorchGnubgNetwork(nn.Module):
+    """
+    One GNUBG network as two linear layers, each followed by GNUBG's
+    sigmoid of `-beta * activity`.
+    """
+
+    def __init__(self, net: GnubgNetwork, dtype: torch.dtype = torch.float32):
+        super().__init__()
+        self.hidden = nn.Linear(net.cInput, net.cHidden, dtype=dtype)
+        self.output = nn.Linear(net.cHidden, net.cOutput, dtype=dtype)
+        with torch.no_grad():
+            self.hidden.weight.copy_(torch.from_numpy(net.weights1.T))
+            self.hidden.bias.copy_(torch.from_numpy(net.bias1))
+            self.output.weight.copy_(torch.from_numpy(net.weights2.T))
+            self.output.bias.copy_(torch.from_numpy(net.bias2))
+        self.beta_hidden = float(net.rBetaHidden)
+        self.beta_output = float(net.rBetaOutput)
+        self.clamp = SIGMOID_CLAMP
+        self.requires_grad_(False)
+
+    def to_gnubg(self, trained: int = 0) -> GnubgNetwork:
+        """
+        The network as a `GnubgNetwork`, e.g. to save with `save_networks`.
+        """
+        return GnubgNetwork(
+            self.hidden.in_features,
+            self.hidden.out_features,
+            self.output.out_features,
+            trained,
+            self.beta_hidden,
+            self.beta_output,
+            self.hidden.weight.detach().double().numpy().T.copy(),
+            self.output.weight.detach().double().numpy().T.copy(),
+            self.hidden.bias.detach().double().numpy().copy(),
+            self.output.bias.detach().double().numpy().copy(),
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        hidden = torch.sigmoid(
+            torch.clamp(-self.beta_hidden * self.hidden(x), -self.clamp, self.clamp)
+        )
+        return torch.sigmoid(
+            torch.clamp(
+                -self.beta_output * self.output(hidden), -self.clamp, self.clamp
+            )
+        )
+
+
+class TorchGnubgNetworks(nn.Module):
+    """
+    The evaluation networks in one module, keyed by lower-case position
+    class name, so they script and save as a single TorchScript file.
+    """
+
+    def __init__(self, networks: Dict[str, TorchGnubgNetwork]):
+        super().__init__()
+        self.networks = nn.ModuleDict(networks)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        # Scripting needs a forward; evaluation calls the networks directly.
+        return x
+
+
+class TorchGnubgEvaluator:
+    """
+    GNUBG network evaluation in torch on the CPU, batched per network.
+
+    `evaluate_batch` and `evaluate` return what `GnubgEvaluator`'s do, so
+    the two are interchangeable. `threads` sets torch's intra-op thread
+    count, which is process-wide. `load` starts from a TorchScript export
+    of the networks, written on first use, instead of parsing the text
+    weights file.
+    """
+
+    def __init__(
+        self,
+        networks: TorchGnubgNetworks,
+        threads: Optional[int] = None,
+        dtype: torch.dtype = torch.float32,
+    ):
+        if threads is not None:
+            torch.set_num_threads(threads)
+        self.networks = networks.eval()
+        self.dtype = dtype
+        self.network_mapping = {
+            pos_class: getattr(networks.networks, pos_class.name.lower())
+            for pos_class in PositionClass
+            if hasattr(networks.networks, pos_class.name.lower())
+        }
+
+    @classmethod
+    def from_weights(
+        cls,
+        weights_file: str = WEIGHTS_FILE,
+        threads: Optional[int] = None,
+        dtype: torch.dtype = torch.float32,
+    ) -> "TorchGnubgEvaluator":
+        """
+        Convert the networks `GnubgEvaluator` picks for each position class.
+        """
+        mapping = GnubgEvaluator(weights_file).network_mapping
+        networks = TorchGnubgNetworks(
+            {
+                pos_class.name.lower(): TorchGnubgNetwork(nets[0], dtype)
+                for pos_class, nets in mapping.items()
+            }
+        )
+        return cls(networks, threads, dtype)
+
+    @classmethod
+    def load(
+        cls,
+        path: str = SCRIPTED_PATH,
+        weights_file: str = WEIGHTS_FILE,
+        threads: Optional[int] = None,
+    ) -> "TorchGnubgEvaluator":
+        """
+        Load the TorchScript export at `path`, exporting it from
+        `weights_file` first if it is missing.
+        """
+        if os.path.exists(path):
+            return cls(torch.jit.load(path), threads)
+        evaluator = cls.from_weights(weights_file, threads)
+        try:
+            evaluator.save(path)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"Could not save scripted GNUBG networks: {e}")
+        return evaluator
+
+    def save(self, path: str) -> None:
+        scripted = self.networks
+        if not isinstance(scripted, torch.jit.ScriptModule):
+            scripted = torch.jit.script(scripted)
+        tmp_path = f"{path}.tmp"
+        torch.jit.save(scripted, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _input_size(self, network) -> int:
+        return network.hidden.weight.shape[1]
+
+    def evaluate_batch(self, positions) -> np.ndarray:
+        """
+        Evaluate many positions with one forward pass per network.
+
+        Returns an (N, 5) array with columns in the order of `evaluate`'s keys.
+        """
+        classes = [position.classify() for position in positions]
+        outputs = np.empty((len(positions), 5))
+        with torch.inference_mode():
+            for pos_class in set(classes):
+                network = self.network_mapping[pos_class]
+                size = self._input_size(network)
+                rows = [i for i, c in enumerate(classes) if c is pos_class]
+                inputs = np.stack([encode_board(positions[i], size) for i in rows])
+                x = torch.from_numpy(inputs).to(self.dtype)
+                outputs[rows] = network(x).numpy()
+        return outputs
+
+    def evaluate(self, position) -> dict:
+        raw = self.evaluate_batch([position])[0]
+        return {
+            "win": raw[0],
+            "wingammon": raw[1],
+            "winbackgammon": raw[2],
+            "losegammon": raw[3],
+            "losebackgammon": raw[4],
+        }
@@ -2,6 +2,7 @@ import traceback
 from typing import Tuple
 
 from pybg.agents.factory import create_agent
+from pybg.agents.search_agent import DEFAULT_TIME_MS
 from pybg.core.board import BoardError
 from pybg.core.logger import logger
 from pybg.core.player import PlayerType
@@ -75,11 +76,12 @@ class GameModule(BaseModule):
         s.game.auto_doubles = bool(s.settings["autodoubles"])
         s.game.jacoby = bool(s.settings["jacoby"])
         s.game.start()
+        time_ms = s.settings.get("bot_time_ms", DEFAULT_TIME_MS)
         s.player0_agent = create_agent(
-            s.settings["player_agent"], PlayerType.ZERO, s.game
+            s.settings["player_agent"], PlayerType.ZERO, s.game, time_ms=time_ms
         )
         s.player1_agent = create_agent(
-            s.settings["opponent_agent"], PlayerType.ONE, s.game
+            s.settings["opponent_agent"], PlayerType.ONE, s.game, time_ms=time_ms
         )
         s.sound_manager.play_sound("roll")
         s.active_module = "game"
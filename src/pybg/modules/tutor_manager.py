@@ -5,7 +5,9 @@ from typing import List, Tuple
 
 from pybg.core.events import EVENT_GAME
 from pybg.modules.base_module import BaseModule
-from pybg.gnubg.pub_eval import pubeval_x
+from pybg.agents.search_agent import DEFAULT_TIME_MS
+from pybg.gnubg.search import IterativeDeepeningSearch
+from pybg.gnubg.hypergammon import perfect_play_search
 from pybg.gnubg.match import GameState
 from pybg.core.logger import logger
 from pybg.core.board import Play
@@ -25,19 +27,15 @@ class TutorManager(BaseModule):
             True  # fix for a race condition with the hint and apply hint functions
         )
         self.original_position = None
+        self.search = IterativeDeepeningSearch()
 
     def evaluate_and_sort_plays(self) -> None:
         plays = self.shell.game.generate_plays()
-        self.evaluated_plays.clear()
+        time_ms = self.shell.settings.get("hint_time_ms", DEFAULT_TIME_MS)
 
-        for play in plays:
-            pos_array = play.position.to_array()
-            is_race = play.position.classify().name == "RACE"
-            score = pubeval_x(is_race, pos_array)
-            self.evaluated_plays.append((score, play))
-
-        self.evaluated_plays.sort(reverse=True, key=lambda x: x[0])
-        self.evaluated_plays = self.evaluated_plays[: self.max_hint_moves]
+        search = perfect_play_search(self.shell.game) or self.search
+        result = search.search(plays, time_ms)
+        self.evaluated_plays = result.ranked[: self.max_hint_moves]
         self.current_hint_index = 0
 
     def format_play_moves(self, play: Play) -> str:
@@ -0,0 +1,271 @@
+"""
+A compact Q-table for `SarsaAgent`, keyed by packed integers.
+
+`SarsaGame.get_state3` describes a state as a string: the die, then a
+letter per point (white counts as "1"-"9" and "RUTVWYZ", each followed by
+an extra "0"; black counts as "A"-"Q"; "0" for an empty point). Actions
+are tuples such as ("move", 7, 3) or ("bearoff", 4). `QTable` parses both
+into three uint64 words: a 6-bit signed count per point and the die, with
+the action's kind, source and destination in the last word. Keys and
+float32 values live in open-addressed NumPy arrays with linear probing:
+28 bytes a slot, kept at most half full, instead of two tuples, two
+strings and a float per dict item.
+
+`lookup` finds the values of all of a state's actions at once, and
+`save`/`load` write the arrays to an `.npz` file, without pickle.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+POINTS = 24
+WORDS = 3
+MASK = (1 << 64) - 1
+BITS_PER_POINT = 6
+POINTS_PER_WORD = 10
+# Added to the signed count so every point packs as 0-33.
+COUNT_OFFSET = 17
+
+# `get_state3`'s tokens for 1-16 white and 1-17 black checkers.
+POINT_TOKEN = re.compile(r"[1-9RUTVWYZ]0|[A-Q]|0")
+POINT_FIELDS = {"0": COUNT_OFFSET}
+POINT_FIELDS.update(
+    (c + "0", COUNT_OFFSET + n) for n, c in enumerate("123456789RUTVWYZ", start=1)
+)
+POINT_FIELDS.update(
+    (c, COUNT_OFFSET - n) for n, c in enumerate("ABCDEFGHIJKLMNOPQ", start=1)
+)
+# Per point, each token's field already shifted into place in the three
+# words read as one 192-bit integer.
+POINT_BITS = [
+    {
+        token: field << (64 * word + BITS_PER_POINT * slot)
+        for token, field in POINT_FIELDS.items()
+    }
+    for word, slot in (divmod(point, POINTS_PER_WORD) for point in range(POINTS))
+]
+
+ACTION_KINDS = {
+    "move": 1,
+    "hit": 2,
+    "bearoff": 3,
+    "reenter": 4,
+    "reenter_hit": 5,
+    "Nomove": 6,
+}
+
+# Probing stops at an all-zero key; real keys never are, as the die is
+# stored in the first word.
+MAX_LOAD = 0.5
+HASH_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64
+)
+MULTIPLIERS = HASH_MULTIPLIERS.tolist()
+
+StateKey = Tuple[int, int, int]
+
+
+@lru_cache(maxsize=1 << 14)
+def pack_state(state: str) -> StateKey:
+    """
+    The three words of a `get_state3` string, with no action.
+    """
+    tokens = POINT_TOKEN.findall(state, 1)
+    if (
+        len(tokens) != POINTS
+        or sum(map(len, tokens)) != len(state) - 1
+        or not state[:1].isdigit()
+    ):
+        raise ValueError(f"Not a get_state3 state: {state!r}")
+
+    bits = sum(map(dict.__getitem__, POINT_BITS, tokens))
+    die = int(state[0]) << (BITS_PER_POINT * POINTS_PER_WORD)
+    return (bits & MASK) | die, (bits >> 64) & MASK, bits >> 128
+
+
+@lru_cache(maxsize=None)
+def pack_action(action: Sequence) -> int:
+    """
+    An action's kind, source and destination in the bits above the last
+    word's four points.
+    """
+    source = action[1] if len(action) > 1 else 0
+    destination = action[2] if len(action) > 2 else 0
+    if not (0 <= source < 32 and 0 <= destination < 32):
+        raise ValueError(f"Cannot pack action {action!r}")
+    code = ACTION_KINDS[action[0]] | (source << 3) | (destination << 8)
+    return code << (BITS_PER_POINT * (POINTS - 2 * POINTS_PER_WORD))
+
+
+def pack(state: str, action: Sequence) -> StateKey:
+    w0, w1, w2 = pack_state(state)
+    return w0, w1, w2 | pack_action(action)
+
+
+def _hash(keys: np.ndarray) -> np.ndarray:
+    mixed = np.bitwise_xor.reduce(keys * HASH_MULTIPLIERS, axis=-1)
+    return mixed ^ (mixed >> np.uint64(29))
+
+
+def _state_hash(w0: int, w1: int) -> int:
+    # The first two words' share of `_hash`, for the keys of one state.
+    return ((w0 * MULTIPLIERS[0]) ^ (w1 * MULTIPLIERS[1])) & MASK
+
+
+def _hash_one(key: StateKey) -> int:
+    mixed = _state_hash(key[0], key[1]) ^ ((key[2] * MULTIPLIERS[2]) & MASK)
+    return mixed ^ (mixed >> 29)
+
+
+class QTable:
+    """
+    Q-values keyed by `(state, action)`, with the dict methods
+    `SarsaAgent` uses.
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        capacity = 1 << max(int(capacity) - 1, 1).bit_length()
+        self.keys = np.zeros((capacity, WORDS), dtype=np.uint64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _slot(self, key: StateKey) -> int:
+        """
+        The slot holding `key`, or the empty slot where it would go.
+        """
+        mask = len(self.values) - 1
+        slot = _hash_one(key) & mask
+        keys = self.keys
+        while True:
+            w0 = int(keys[slot, 0])
+            if w0 == 0 or (
+                w0 == key[0]
+                and int(keys[slot, 1]) == key[1]
+                and int(keys[slot, 2]) == key[2]
+            ):
+                return slot
+            slot = (slot + 1) & mask
+
+    def get(self, key: Tuple[str, Sequence], default: Optional[float] = None):
+        slot = self._slot(pack(*key))
+        return float(self.values[slot]) if self.keys[slot, 0] else default
+
+    def __contains__(self, key: Tuple[str, Sequence]) -> bool:
+        return bool(self.keys[self._slot(pack(*key)), 0])
+
+    def __getitem__(self, key: Tuple[str, Sequence]) -> float:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Tuple[str, Sequence], value: float) -> None:
+        packed = pack(*key)
+        slot = self._slot(packed)
+        if not self.keys[slot, 0]:
+            if self.size + 1 > MAX_LOAD * len(self.values):
+                self._grow()
+                slot = self._slot(packed)
+            self.keys[slot] = packed
+            self.size += 1
+        self.values[slot] = value
+
+    def _grow(self) -> None:
+        used = self.keys[:, 0] != 0
+        keys, values = self.keys[used], self.values[used]
+        self.keys = np.zeros((2 * len(self.values), WORDS), dtype=np.uint64)
+        self.values = np.zeros(len(self.keys), dtype=np.float32)
+        self.size = 0
+        self._insert(keys, values)
+
+    def _insert(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Place distinct keys, none of them present yet, in batch.
+        """
+        mask = np.uint64(len(self.values) - 1)
+        slots = (_hash(keys) & mask).astype(np.int64)
+        pending = np.arange(len(keys))
+        while len(pending):
+            # The first key of each free slot claims it; the rest move on.
+            free = self.keys[slots[pending], 0] == 0
+            candidates = pending[free]
+            _, first = np.unique(slots[candidates], return_index=True)
+            placed = candidates[first]
+            self.keys[slots[placed]] = keys[placed]
+            self.values[slots[placed]] = values[placed]
+            done = np.zeros(len(keys), dtype=bool)
+            done[placed] = True
+            pending = pending[~done[pending]]
+            slots[pending] = (slots[pending] + 1) & int(mask)
+        self.size += len(keys)
+
+    def lookup(
+        self, state: str, actions: Iterable[Sequence], default: float = 0.0
+    ) -> np.ndarray:
+        """
+        The values of `state` with each of `actions`, `default` for any
+        not in the table.
+        """
+        w0, w1, w2 = pack_state(state)
+        last = np.array([w2 | pack_action(action) for action in actions], np.uint64)
+        # Only the last word differs between the keys.
+        hashes = (last * HASH_MULTIPLIERS[2]) ^ np.uint64(_state_hash(w0, w1))
+        hashes ^= hashes >> np.uint64(29)
+        w0, w1 = np.uint64(w0), np.uint64(w1)
+
+        mask = len(self.values) - 1
+        slots = hashes.astype(np.int64) & mask
+        result = np.full(len(last), default, dtype=np.float64)
+        rows = np.arange(len(last))
+        # Probe every pending key's next slot together until each is found
+        # or reaches an empty slot.
+        while True:
+            found = self.keys[slots]
+            hit = (found[:, 2] == last) & (found[:, 0] == w0) & (found[:, 1] == w1)
+            result[rows[hit]] = self.values[slots[hit]]
+            pending = ~hit & (found[:, 0] != 0)
+            if not pending.any():
+                return result
+            rows, last = rows[pending], last[pending]
+            slots = (slots[pending] + 1) & mask
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The packed keys and values of the used slots.
+        """
+        used = self.keys[:, 0] != 0
+        return self.keys[used], self.values[used]
+
+    @classmethod
+    def from_arrays(cls, keys: np.ndarray, values: np.ndarray) -> "QTable":
+        """
+        A table holding the distinct packed keys and values from `arrays`.
+        """
+        table = cls(int(len(keys) / MAX_LOAD) + 1)
+        table._insert(
+            np.asarray(keys, dtype=np.uint64).reshape(-1, WORDS),
+            np.asarray(values, dtype=np.float32),
+        )
+        return table
+
+    @classmethod
+    def from_dict(cls, q: dict) -> "QTable":
+        """
+        A table holding a dict Q-table's `(state, action)` entries.
+        """
+        return cls.from_arrays([pack(*key) for key in q], list(q.values()))
+
+    def save(self, path: str) -> None:
+        keys, values = self.arrays()
+        np.savez(path, keys=keys, values=values)
+
+    @classmethod
+    def load(cls, path: str) -> "QTable":
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data["keys"], data["values"])
@@ -11,14 +11,21 @@ Sabanci University
 
 This script defines the sarsa algorithm. Modified significantly from
 https://github.com/vmayoral/basic_reinforcement_learning/blob/master/tutorial2/sarsa.py
+
+Q-values live in a `QTable` rather than a dict; `save` and `load` keep an
+agent in an `.npz` file instead of a pickle.
 """
 
 import random
 
+import numpy as np
+
+from pybg.rl.agents.q_table import QTable
+
 
 class SarsaAgent:
     def __init__(self, actions=None, epsilon=0.2, alpha=0.2, gamma=0.9):
-        self.q = {}
+        self.q = QTable()
 
         self.epsilon = epsilon
         self.alpha = alpha
@@ -38,50 +45,59 @@ class SarsaAgent:
         else:
             self.q[(state, action)] = oldv + self.alpha * (value - oldv)
 
+    def bestAction(self, state, actions):
+        """
+        The index of a highest-valued action, ties broken at random.
+        """
+        if isinstance(self.q, QTable):
+            q = self.q.lookup(state, actions)
+        else:
+            # Agents pickled before `QTable` keep their dict.
+            q = np.array([self.getQ(state, a) for a in actions])
+        best = np.flatnonzero(q == q.max())
+        return int(random.choice(best))
+
     def chooseAction(self, state, actions):
         if len(actions) < 1:
-            actions = [("Nomove", 0, 0)]
             return ("Nomove", 0, 0), 0
         if random.random() < self.epsilon:
             i = random.choice(range(0, len(actions)))
         else:
-            q = [self.getQ(state, a) for a in actions]
-            if len(q) > 0:
-                maxQ = max(q)
-                count = q.count(maxQ)
-            else:
-                count = 0
-                # maxQ = random.choice(range(0,len))
-            if count >= 1:
-                best = [i for i in range(len(actions)) if q[i] == maxQ]
-                i = random.choice(best)
-            else:
-                i = random.choice(range(0, len(actions)))
+            i = self.bestAction(state, actions)
 
         action = actions[i]
         return action, i
 
     def playAction(self, state, actions):
         if len(actions) < 1:
-            actions = [("Nomove", 0, 0)]
             return ("Nomove", 0, 0)
 
-        q = [self.getQ(state, a) for a in actions]
-
-        if len(q) > 0:
-            maxQ = max(q)
-            count = q.count(maxQ)
-        else:
-            count = 0
-        if count >= 1:
-            best = [i for i in range(len(actions)) if q[i] == maxQ]
-            i = random.choice(best)
-        else:
-            i = random.choice(range(0, len(actions)))
-
-        action = actions[i]
-        return action
+        return actions[self.bestAction(state, actions)]
 
     def learn(self, state1, action1, reward, state2, action2):
         qnext = self.getQ(state2, action2)
         self.learnQ(state1, action1, reward, reward + self.gamma * qnext)
+
+    def save(self, path):
+        """
+        Write the Q-table and hyperparameters to an `.npz` file.
+        """
+        q = self.q if isinstance(self.q, QTable) else QTable.from_dict(self.q)
+        keys, values = q.arrays()
+        np.savez(
+            path,
+            keys=keys,
+            values=values,
+            hyperparameters=np.array([self.epsilon, self.alpha, self.gamma]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        An agent saved by `save`.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            epsilon, alpha, gamma = data["hyperparameters"].tolist()
+            agent = cls(epsilon=epsilon, alpha=alpha, gamma=gamma)
+            agent.q = QTable.from_arrays(data["keys"], data["values"])
+        return agent
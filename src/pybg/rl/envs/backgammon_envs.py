@@ -1,16 +1,130 @@
 import time
-from typing import Any, TypeVar
+from typing import Any, List, Optional, Tuple, TypeVar
 
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
 
-from pybg.rl.agents import RandomAgent, PolicyAgent, HumanAgent
+from pybg.core.board import (
+    BACKGAMMON_STARTING_POSITION_ID,
+    Board,
+    Move,
+    Play,
+    generate_plays,
+)
+from pybg.gnubg.position import Position
+from pybg.rl.agents import HumanAgent, PolicyAgent
+from pybg.rl.agents.agent import Agent
+from pybg.rl.envs.encoders import CHECKERS, LegacyEncoder
+from pybg.rl.envs.vec_env import (
+    ACTION_DICE,
+    ACTION_SOURCE,
+    BAR,
+    HIT_ACTIONS,
+    HIT_REWARDS,
+    HOME,
+    INVALID_ACTION_REWARD,
+    MAX_PASSES,
+    MOVE_ACTIONS,
+    MOVE_REWARDS,
+)
 from pybg.rl.game import ALL_ACTIONS
-from pybg.rl.game import Game
 
 ObsType = TypeVar("ObsType")
 
+# Plays offered per step in afterstate mode; any beyond are dropped.
+MAX_PLAYS = 256
+
+ENCODER = LegacyEncoder()
+
+
+def first_moves(plays: List[Play]) -> List[Move]:
+    """
+    The distinct checker moves that start one of `plays`.
+    """
+    return list(dict.fromkeys(play.moves[0] for play in plays))
+
+
+def follow(plays: List[Play], move: Move) -> List[Play]:
+    """
+    The rest of each play that starts with `move`, dropping finished ones.
+    """
+    return [
+        Play(play.moves[1:], play.position)
+        for play in plays
+        if play.moves[0] == move and len(play.moves) > 1
+    ]
+
+
+def move_cell(move: Move) -> Tuple[int, int]:
+    """
+    The (source, die) cell of `move` in the `vec_env` action tables.
+    """
+    return (BAR if move.source == -1 else move.source), move.pips - 1
+
+
+def move_action(position: Position, move: Move) -> int:
+    """
+    The `ALL_ACTIONS` index of `move`, played from `position`.
+    """
+    hit = move.destination >= 0 and position.board_points[move.destination] == -1
+    return int((HIT_ACTIONS if hit else MOVE_ACTIONS)[move_cell(move)])
+
+
+def move_reward(position: Position, move: Move) -> float:
+    hit = move.destination >= 0 and position.board_points[move.destination] == -1
+    return float((HIT_REWARDS if hit else MOVE_REWARDS)[move_cell(move)])
+
+
+def action_mask(position: Position, moves: List[Move]) -> np.ndarray:
+    mask = np.zeros(len(ALL_ACTIONS), dtype=bool)
+    mask[[move_action(position, move) for move in moves]] = True
+    return mask
+
+
+def find_move(action: int, moves: List[Move]) -> Optional[Move]:
+    """
+    The legal move `action` names, using the smallest die that plays it.
+    """
+    candidates = [
+        move
+        for move in moves
+        if ACTION_SOURCE[action] == move_cell(move)[0]
+        and ACTION_DICE[action, move.pips - 1]
+    ]
+    return min(candidates, key=lambda move: move.pips, default=None)
+
+
+def observation(position: Position, dice: List[int]) -> np.ndarray:
+    """
+    The 54-D observation of `position`, from the side of its player.
+    """
+    return ENCODER.encode_position(position, dice)
+
+
+def afterstate_features(
+    positions: List[Position], out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    (K, 54) observations of the positions after K plays, with no dice,
+    written into `out` when given.
+    """
+    return ENCODER.encode_positions(positions, out)
+
+
+def game_points(position: Position) -> int:
+    """
+    Points won by the player who has just borne off their last checker:
+    a gammon if the opponent has none off, a backgammon if one is also on
+    the bar or in the winner's home board.
+    """
+    if position.opponent_off > 0:
+        return 1
+    backgammon = position.opponent_bar > 0 or any(
+        p < 0 for p in position.board_points[:HOME]
+    )
+    return 3 if backgammon else 2
+
 
 class BackgammonEnv(gym.Env):
     """
@@ -18,6 +132,16 @@ class BackgammonEnv(gym.Env):
     to run the RL algorithm in. It is stochastic and fully-observable, with a
     bounded, discrete action domain.
 
+    Games run on the core engine: a `Position` from the agent's side, with
+    legal checker moves taken from the plays `generate_plays` allows, so
+    each step plays one checker of a legal play. Once the agent's play is
+    complete the opponent plays a whole turn, and turns the agent cannot
+    move in are passed without a step.
+
+    The opponent is an `Agent` that picks `ALL_ACTIONS` indices from the
+    observation and action mask of its own side, one checker at a time, or
+    None for a uniformly random legal play.
+
     The action space is discrete, ranging from 0 to 1728 for each possible
     action of this tuple: (Type, Source, Target)
 
@@ -41,39 +165,9 @@ class BackgammonEnv(gym.Env):
 
     metadata = {"render_modes": ["human"], "render_fps": 4}
 
-    def __init__(self, opponent, cont=False):
+    def __init__(self, opponent: Optional[Agent] = None, cont: bool = False):
         # Action and observation spaces.
-        lower_bound = np.array(
-            [
-                1,
-            ]
-            * 2
-            + [
-                0,
-            ]
-            * 52
-        )
-        upper_bound = np.array(
-            [
-                6,
-            ]
-            * 2
-            + [
-                15,
-            ]
-            * 4
-            + [
-                item
-                for sublist in [
-                    [2, 15],
-                ]
-                * 24
-                for item in sublist
-            ]
-        )
-        self.observation_space = spaces.Box(
-            low=lower_bound, high=upper_bound, dtype=np.float32
-        )
+        self.observation_space = ENCODER.space()
 
         if cont:
             self.action_space = spaces.Box(
@@ -85,18 +179,21 @@ class BackgammonEnv(gym.Env):
             self.action_space = spaces.Discrete(len(ALL_ACTIONS))
 
         # Debug info.
-        self.__invalid_actions_taken = 0
-        self.__time_elapsed = 0
+        self.invalid_actions_taken = 0
+        self.time_elapsed = time.time()
 
         # Game initialization.
-        self.__opponent = opponent
-        self._game: Game = Game("amca", opponent)
+        self.opponent = opponent
+        self.position = Position.decode(BACKGAMMON_STARTING_POSITION_ID)
+        self.dice: List[int] = []
+        self.plays: List[Play] = []
 
     def render(self, mode="human"):
-        """Renders the board. 'w' is player1 and 'b' is player2."""
+        """Renders the board. 'X' is the agent and 'O' the opponent."""
 
         if mode == "human":
-            self._game.print_game()
+            print(Board(self.position.encode()))
+            print(f"Dice: {self.dice}")
 
     def reset(
         self,
@@ -106,9 +203,20 @@ class BackgammonEnv(gym.Env):
     ) -> tuple[ObsType, dict[str, Any]]:
         """Restarts the game."""
 
-        self._game: Game = Game(self, self.__opponent)
+        super().reset(seed=seed)
+        self.invalid_actions_taken = 0
+        self.position = Position.decode(BACKGAMMON_STARTING_POSITION_ID)
 
-        return np.array(self._game.get_observation(), dtype=np.float32), {}
+        # Whoever rolls the higher die starts, playing both dice.
+        agent, opponent = (int(d) for d in self.np_random.choice(6, 2, False) + 1)
+        if agent > opponent:
+            self.start_turn((agent, opponent))
+        else:
+            self.opponent_turn((opponent, agent))
+            self.start_turn(self.roll())
+        self.advance()
+
+        return self.get_observation(), {}
 
     def step(self, actionint):
         """Run one timestep of the environment's dynamics. When end of
@@ -126,38 +234,105 @@ class BackgammonEnv(gym.Env):
             debugging, and sometimes learning)
         """
 
-        if isinstance(self.action_space, spaces.Box):
-            actionint += int(len(ALL_ACTIONS) / 2)
-            actionint = int(actionint)
+        moves = first_moves(self.plays)
+        move = find_move(self.action_index(actionint), moves)
+        if move is None:
+            self.invalid_actions_taken += 1
+            move = moves[self.np_random.integers(len(moves))]
+            reward = INVALID_ACTION_REWARD
+        else:
+            reward = move_reward(self.position, move)
+
+        self.play(move)
+        terminated = self.position.player_off == CHECKERS
+        truncated = False
+        if not terminated and not self.plays:
+            truncated = not self.advance()
+            terminated = self.position.opponent_off == CHECKERS
 
-        reward = self._game.player_turn(actionint)
-        observation = self._game.get_observation()
-        done = self._game.get_done()
         info = self.get_info()
+        if terminated:
+            info["is_success"] = self.position.player_off == CHECKERS
 
-        terminated = done
-        truncated = False  # You could make this configurable if needed
+        return self.get_observation(), reward, terminated, truncated, info
 
-        return (
-            np.array(observation, dtype=np.float32),
-            reward,
-            terminated,
-            truncated,
-            info,
-        )
+    def action_index(self, action) -> int:
+        """The `ALL_ACTIONS` index of an action from the action space."""
+
+        action = np.asarray(action).ravel()[0]
+        if isinstance(self.action_space, spaces.Box):
+            action += int(len(ALL_ACTIONS) / 2)
+        return int(action)
+
+    def roll(self) -> Tuple[int, int]:
+        return tuple(int(d) for d in self.np_random.integers(1, 7, size=2))
+
+    def start_turn(self, dice: Tuple[int, int]) -> None:
+        """Give the agent `dice` and work out its legal plays."""
+
+        self.dice = list(dice) * (2 if dice[0] == dice[1] else 1)
+        self.plays = [p for p in generate_plays(self.position, dice) if p.moves]
+
+    def play(self, move: Move) -> None:
+        """Play one of the agent's checkers."""
+
+        self.position = self.position.apply_move(move.source, move.destination)
+        self.dice.remove(move.pips)
+        self.plays = follow(self.plays, move)
+
+    def opponent_turn(self, dice: Tuple[int, int]) -> None:
+        """Let the opponent play a whole turn with `dice`."""
+
+        position = self.position.swap_players()
+        plays = [p for p in generate_plays(position, dice) if p.moves]
+        if self.opponent is None:
+            if plays:
+                position = plays[self.np_random.integers(len(plays))].position
+        else:
+            remaining = list(dice) * (2 if dice[0] == dice[1] else 1)
+            while plays:
+                moves = first_moves(plays)
+                actionint = self.opponent.make_decision(
+                    observation(position, remaining), action_mask(position, moves)
+                )
+                move = find_move(self.action_index(actionint), moves)
+                if move is None:
+                    move = moves[self.np_random.integers(len(moves))]
+                position = position.apply_move(move.source, move.destination)
+                remaining.remove(move.pips)
+                plays = follow(plays, move)
+        self.position = position.swap_players()
+        self.dice = []
+
+    def advance(self) -> bool:
+        """
+        Hand turns to the opponent until the agent has a legal move or the
+        game is over. Returns False if neither side could move for
+        `MAX_PASSES` turns.
+        """
+        for _ in range(MAX_PASSES):
+            if self.plays or self.position.opponent_off == CHECKERS:
+                return True
+            self.opponent_turn(self.roll())
+            if self.position.opponent_off < CHECKERS:
+                self.start_turn(self.roll())
+        return bool(self.plays) or self.position.opponent_off == CHECKERS
+
+    def get_observation(self) -> np.ndarray:
+        return observation(self.position, self.dice)
 
     def get_info(self):
         """Returns useful info for debugging, etc."""
 
         return {
-            "time elapsed": time.time() - self.__time_elapsed,
-            "invalid actions taken": self.__invalid_actions_taken,
+            "time elapsed": time.time() - self.time_elapsed,
+            "invalid actions taken": self.invalid_actions_taken,
         }
 
 
 # ✅ BACKGAMMON ENVIRONMENT WITH ACTION MASKING FOR MASKABLEPPO
 class BackgammonMaskableEnv(BackgammonEnv):
-    def __init__(self, opponent):
+    def __init__(self, opponent: Optional[Agent] = None):
         super().__init__(opponent)
 
     def get_action_mask(self):
@@ -165,47 +340,115 @@ class BackgammonMaskableEnv(BackgammonEnv):
         Returns a boolean array of length len(ALL_ACTIONS),
         where each True means the action is currently legal.
         """
-        legal_action_mask = np.zeros(len(ALL_ACTIONS), dtype=bool)
+        return action_mask(self.position, first_moves(self.plays))
 
-        valid_action_sets, _ = self._game.get_valid_actions()
+    def action_masks(self):
+        return self.get_action_mask()
 
-        flattened_valid_actions = [a for s in valid_action_sets for a in s]
 
-        for action in flattened_valid_actions:
-            try:
-                idx = ALL_ACTIONS.index(action)
-                legal_action_mask[idx] = True
-            except ValueError:
-                pass
+class BackgammonAfterstateEnv(BackgammonEnv):
+    """
+    Backgammon with whole plays as actions.
 
-        return legal_action_mask
+    Each step offers the legal plays `generate_plays` finds for the agent's
+    roll, at most `max_plays` of them. The observation stacks their
+    afterstates as rows of `afterstate_features` (from the agent's side,
+    zero-padded), action `i` plays the `i`-th, and `action_masks` marks the
+    real rows. A policy or value network can then score every afterstate
+    in one batch and a turn takes one decision instead of one per checker.
 
+    The reward is 0 until the game ends, then the points won or lost.
+    """
 
-class BackgammonHumanEnv(BackgammonEnv):
-    def __init__(self, opponent=HumanAgent()):
+    def __init__(self, opponent: Optional[Agent] = None, max_plays: int = MAX_PLAYS):
         super().__init__(opponent)
+        self.max_plays = max_plays
+        high = np.tile(ENCODER.space().high, (max_plays, 1))
+        self.observation_space = spaces.Box(
+            low=np.zeros_like(high), high=high, dtype=np.float32
+        )
+        self.action_space = spaces.Discrete(max_plays)
+
+    def candidates(self) -> List[Play]:
+        return self.plays[: self.max_plays]
+
+    def get_observation(self) -> np.ndarray:
+        obs = np.zeros((self.max_plays, ENCODER.size), dtype=np.float32)
+        candidates = self.candidates()
+        if candidates:
+            afterstate_features(
+                [play.position for play in candidates], obs[: len(candidates)]
+            )
+        return obs
+
+    def action_masks(self) -> np.ndarray:
+        mask = np.zeros(self.max_plays, dtype=bool)
+        mask[: len(self.candidates())] = True
+        return mask
+
+    def step(self, action):
+        candidates = self.candidates()
+        index = self.action_index(action)
+        reward = 0
+        if not 0 <= index < len(candidates):
+            self.invalid_actions_taken += 1
+            index = self.np_random.integers(len(candidates))
+            reward = INVALID_ACTION_REWARD
+
+        self.position = candidates[index].position
+        self.dice, self.plays = [], []
+        terminated = self.position.player_off == CHECKERS
+        truncated = False
+        if terminated:
+            reward += game_points(self.position)
+        else:
+            truncated = not self.advance()
+            terminated = self.position.opponent_off == CHECKERS
+            if terminated:
+                reward -= game_points(self.position.swap_players())
+
+        info = self.get_info()
+        if terminated:
+            info["is_success"] = self.position.player_off == CHECKERS
+
+        return self.get_observation(), reward, terminated, truncated, info
+
+
+class BackgammonHumanEnv(BackgammonEnv):
+    def __init__(self, opponent: Optional[Agent] = None):
+        super().__init__(opponent or HumanAgent())
 
 
 class BackgammonRandomEnv(BackgammonMaskableEnv):
-    def __init__(self, opponent=RandomAgent(spaces.Discrete(len(ALL_ACTIONS)))):
+    def __init__(self, opponent: Optional[Agent] = None):
         super().__init__(opponent)
 
 
 class BackgammonPolicyEnv(BackgammonEnv):
-    def __init__(self, opponent=PolicyAgent("ppo", "models/amca.zip")):
-        super().__init__(opponent)
+    def __init__(self, opponent: Optional[Agent] = None):
+        super().__init__(opponent or PolicyAgent("ppo", "models/amca.zip"))
 
 
 class BackgammonHumanContinuousEnv(BackgammonEnv):
-    def __init__(self, opponent=HumanAgent()):
-        super().__init__(opponent, cont=True)
+    def __init__(self, opponent: Optional[Agent] = None):
+        super().__init__(opponent or HumanAgent(), cont=True)
 
 
 class BackgammonPolicyContinuousEnv(BackgammonEnv):
-    def __init__(self, opponent=RandomAgent(spaces.Discrete(len(ALL_ACTIONS)))):
-        super().__init__(opponent, cont=True)
+    """
+    Continuous actions against the PPO policy in models/amca.zip, unless
+    another `opponent` is given.
+    """
+
+    def __init__(self, opponent: Optional[Agent] = None):
+        super().__init__(opponent or PolicyAgent("ppo", "models/amca.zip"), cont=True)
 
 
 class BackgammonRandomContinuousEnv(BackgammonEnv):
-    def __init__(self, opponent=PolicyAgent("ppo", "models/amca.zip")):
+    """
+    Continuous actions against random legal plays, unless another
+    `opponent` is given.
+    """
+
+    def __init__(self, opponent: Optional[Agent] = None):
         super().__init__(opponent, cont=True)
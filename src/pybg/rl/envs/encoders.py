@@ -0,0 +1,279 @@
+"""
+Observation encoders that write into caller-provided float32 arrays.
+
+An encoder turns N boards, held as NumPy arrays in the `Position` layout
+(`points` (N, 24) from the player's side, `bar` and `off` (N, 2) as
+(player, opponent)), into N rows of network inputs. `encode` writes into
+`out`, which may be a preallocated batch, a slice of one, or an array in
+shared memory, so a vectorized env can encode every step without
+allocating. Per-point features are read from small lookup tables indexed
+by the signed checker count with `np.take(..., mode="wrap")`, so negative
+counts index from the end of the table and no temporaries are built.
+
+Two layouts are provided:
+
+- `LegacyEncoder`: the 54-D observation of `BackgammonEnv` and
+  `BackgammonVecEnv`.
+- `GnubgEncoder`: the inputs `pybg.gnubg.neural_net.encode_board` builds
+  for the GNUBG networks, zero-padded or cut to `size`. It has no dice.
+
+Encoders keep a little scratch state, so one encoder should not be shared
+between threads.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence, Type
+
+import numpy as np
+from gymnasium import spaces
+
+from pybg.gnubg.position import Position
+
+POINTS = 24
+CHECKERS = 15
+OBSERVATION_SIZE = 54
+GNUBG_INPUTS = 250
+
+# encode_board's scale for pip counts.
+PIP_SCALE = 167.0
+
+
+def _signed_table(values) -> np.ndarray:
+    """
+    Rows of `values(count)` for counts -15..15, in the order
+    `np.take(..., mode="wrap")` reads them: 0..15, then -15..-1.
+    """
+    counts = list(range(CHECKERS + 1)) + list(range(-CHECKERS, 0))
+    return np.array([values(count) for count in counts], dtype=np.float32)
+
+
+def _units(count: int) -> tuple:
+    # encode_board's pair per point: occupied, then extra checkers capped at 4.
+    return (1.0 if count > 0 else 0.0, min(count - 1, 4) / 4.0 if count > 1 else 0.0)
+
+
+COLOURS = _signed_table(lambda n: 1 if n > 0 else 2 if n < 0 else 0)
+COUNTS = _signed_table(abs)
+PLAYER_UNITS = _signed_table(_units)
+OPPONENT_UNITS = _signed_table(lambda n: _units(-n))
+PLAYER_CHECKERS = _signed_table(lambda n: max(n, 0)).astype(np.float64)
+OPPONENT_CHECKERS = _signed_table(lambda n: max(-n, 0)).astype(np.float64)
+
+BAR_UNITS = np.array([min(n, 5) / 5.0 for n in range(CHECKERS + 1)], np.float32)
+OFF_UNITS = np.array([n / 15.0 for n in range(CHECKERS + 1)], np.float32)
+OFF_RAMPS = np.array(
+    [[1.0 if n > 2 * k else 0.0 for k in range(6)] for n in range(CHECKERS + 1)],
+    np.float32,
+)
+
+# Pips per checker on each point, then on the bar.
+PLAYER_PIPS = np.array(list(range(1, POINTS + 1)) + [25], dtype=np.float64)
+OPPONENT_PIPS = np.array(list(range(POINTS, 0, -1)) + [25], dtype=np.float64)
+
+
+class ObservationEncoder(ABC):
+    """
+    Encodes boards into rows of `size` float32 inputs. Subclasses set `size`
+    and implement `space` and `encode`.
+    """
+
+    size: int
+
+    def __init__(self):
+        self._points = np.zeros((1, POINTS), dtype=np.int8)
+        self._bar = np.zeros((1, 2), dtype=np.int8)
+        self._off = np.zeros((1, 2), dtype=np.int8)
+        self._dice = np.zeros((1, 2), dtype=np.int8)
+
+    @abstractmethod
+    def space(self) -> spaces.Box:
+        """
+        The observation space of one encoded board.
+        """
+
+    @abstractmethod
+    def encode(
+        self,
+        points: np.ndarray,
+        bar: np.ndarray,
+        off: np.ndarray,
+        dice: Optional[np.ndarray],
+        out: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Write the inputs of N boards into `out`, an (N, size) float32 array
+        whose rows are contiguous, and return it. `dice` is (N, >=2), or
+        None for no dice.
+        """
+
+    def __call__(
+        self,
+        points: np.ndarray,
+        bar: np.ndarray,
+        off: np.ndarray,
+        dice: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        out = np.empty((len(points), self.size), dtype=np.float32)
+        return self.encode(points, bar, off, dice, out)
+
+    def encode_position(
+        self,
+        position: Position,
+        dice: Sequence[int] = (),
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Encode one `Position` into `out`, a row of `size` inputs, with the
+        first two of `dice` (missing dice read as 0).
+        """
+        if out is None:
+            out = np.empty(self.size, dtype=np.float32)
+        self._points[0] = position.board_points
+        self._bar[0] = position.player_bar, position.opponent_bar
+        self._off[0] = position.player_off, position.opponent_off
+        self._dice[0] = 0
+        self._dice[0, : min(len(dice), 2)] = dice[:2]
+        self.encode(
+            self._points, self._bar, self._off, self._dice, out.reshape(1, self.size)
+        )
+        return out
+
+    def encode_positions(
+        self, positions: Sequence[Position], out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        (K, size) inputs of `positions` with no dice, written into `out`
+        when given.
+        """
+        k = len(positions)
+        if out is None:
+            out = np.empty((k, self.size), dtype=np.float32)
+        points = np.array([p.board_points for p in positions], np.int8)
+        bar = np.array([(p.player_bar, p.opponent_bar) for p in positions], np.int8)
+        off = np.array([(p.player_off, p.opponent_off) for p in positions], np.int8)
+        return self.encode(
+            points.reshape(k, POINTS), bar.reshape(k, 2), off.reshape(k, 2), None, out
+        )
+
+
+class LegacyEncoder(ObservationEncoder):
+    """
+    The 54-D observation: the first two dice left (0 once used), checkers
+    on the bar and borne off for the player then the opponent, and a
+    colour (1 player, 2 opponent) and count per point.
+    """
+
+    size = OBSERVATION_SIZE
+
+    def space(self) -> spaces.Box:
+        # Dice may be 0 once one of them has been played.
+        low = np.zeros(self.size, dtype=np.float32)
+        high = np.array([6] * 2 + [CHECKERS] * 4 + [2, CHECKERS] * POINTS, np.float32)
+        return spaces.Box(low=low, high=high, dtype=np.float32)
+
+    def encode(self, points, bar, off, dice, out):
+        if dice is None:
+            out[:, :2] = 0
+        else:
+            out[:, :2] = dice[:, :2]
+        out[:, 2:4] = bar
+        out[:, 4:6] = off
+        np.take(COLOURS, points, out=out[:, 6::2], mode="wrap")
+        np.take(COUNTS, points, out=out[:, 7::2], mode="wrap")
+        return out
+
+
+class GnubgEncoder(ObservationEncoder):
+    """
+    The GNUBG network inputs of `encode_board`, `size` of them.
+
+    Per point a pair of player then opponent features, bar and off,
+    the two home boards again, pip counts and their difference over 167,
+    and borne-off ramps: 139 features, then zeros.
+    """
+
+    FEATURES = 139
+
+    def __init__(self, size: int = GNUBG_INPUTS):
+        super().__init__()
+        self.size = size
+        self._rows = 0
+
+    def _scratch(self, n: int) -> None:
+        if n > self._rows:
+            self._rows = n
+            self._checkers = np.empty((n, POINTS + 1))
+            self._pips = np.empty((n, 2))
+            self._features = np.empty((n, self.FEATURES), dtype=np.float32)
+
+    def space(self) -> spaces.Box:
+        low = np.zeros(self.size, dtype=np.float32)
+        high = np.ones(self.size, dtype=np.float32)
+        # Every checker on the bar, at 25 pips each.
+        pips = CHECKERS * PLAYER_PIPS[-1] / PIP_SCALE
+        high[124:127] = pips
+        low[126:127] = -pips
+        return spaces.Box(low=low, high=high, dtype=np.float32)
+
+    def encode(self, points, bar, off, dice, out):
+        n = len(points)
+        self._scratch(n)
+        f = out if self.size >= self.FEATURES else self._features[:n]
+
+        np.take(
+            PLAYER_UNITS, points, axis=0, out=f[:, :48].reshape(n, 24, 2), mode="wrap"
+        )
+        np.take(
+            OPPONENT_UNITS,
+            points,
+            axis=0,
+            out=f[:, 48:96].reshape(n, 24, 2),
+            mode="wrap",
+        )
+
+        np.take(BAR_UNITS, bar[:, 0], out=f[:, 96], mode="clip")
+        np.take(OFF_UNITS, off[:, 0], out=f[:, 97], mode="clip")
+        np.take(BAR_UNITS, bar[:, 1], out=f[:, 98], mode="clip")
+        np.take(OFF_UNITS, off[:, 1], out=f[:, 99], mode="clip")
+
+        np.take(
+            PLAYER_UNITS,
+            points[:, :6],
+            axis=0,
+            out=f[:, 100:112].reshape(n, 6, 2),
+            mode="wrap",
+        )
+        np.take(
+            OPPONENT_UNITS,
+            points[:, 18:],
+            axis=0,
+            out=f[:, 112:124].reshape(n, 6, 2),
+            mode="wrap",
+        )
+
+        # Pips in float64 and divided once, as encode_board does.
+        checkers, pips = self._checkers[:n], self._pips[:n]
+        np.take(PLAYER_CHECKERS, points, out=checkers[:, :POINTS], mode="wrap")
+        checkers[:, POINTS] = bar[:, 0]
+        np.matmul(checkers, PLAYER_PIPS, out=pips[:, 0])
+        np.take(OPPONENT_CHECKERS, points, out=checkers[:, :POINTS], mode="wrap")
+        checkers[:, POINTS] = bar[:, 1]
+        np.matmul(checkers, OPPONENT_PIPS, out=pips[:, 1])
+        np.divide(pips, PIP_SCALE, out=f[:, 124:126])
+        np.subtract(pips[:, 1], pips[:, 0], out=pips[:, 0])
+        np.divide(pips[:, 0], PIP_SCALE, out=f[:, 126])
+
+        np.take(OFF_RAMPS, off[:, 0], axis=0, out=f[:, 127:133], mode="clip")
+        np.take(OFF_RAMPS, off[:, 1], axis=0, out=f[:, 133:139], mode="clip")
+
+        if f is out:
+            out[:, self.FEATURES :] = 0
+        else:
+            out[:] = f[:, : self.size]
+        return out
+
+
+ENCODERS: Dict[str, Type[ObservationEncoder]] = {
+    "legacy": LegacyEncoder,
+    "gnubg": GnubgEncoder,
+}
@@ -0,0 +1,316 @@
+"""
+A `SubprocVecEnv` whose workers hand back observations in shared memory.
+
+`SubprocVecEnv` pickles every observation, reward and done through a pipe
+each step, and MaskablePPO then asks every worker for its action mask over
+the pipe too. `SharedMemoryVecEnv` allocates the batched observations,
+rewards, dones, actions and (for envs with `action_masks`) masks once, in
+`multiprocessing.shared_memory` blocks. The parent writes the actions into
+their block and sends each worker a one-word "step"; the worker steps its
+env, writes its row of every block, and answers with only its small info
+dict. Terminal observations are also written to shared memory and attached
+to the infos by the parent.
+
+Observations alternate between two buffers, like `BackgammonVecEnv`'s, so
+an array `step_wait` returns stays valid until the step after next.
+
+Run this module to compare its throughput with `SubprocVecEnv`.
+"""
+
+import multiprocessing as mp
+import sys
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+from stable_baselines3.common.vec_env.patch_gym import _patch_env
+
+# (name, shape, dtype) of each shared block, in the order of `BLOCKS`.
+BlockSpec = Tuple[str, Tuple[int, ...], str]
+
+BLOCKS = ("observations", "terminal", "rewards", "dones", "actions", "masks")
+
+
+def _attach(spec: BlockSpec) -> Tuple[SharedMemory, np.ndarray]:
+    name, shape, dtype = spec
+    # Only the creating process should unlink a block; since 3.13 the
+    # others can opt out of the resource tracker.
+    kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+    memory = SharedMemory(name=name, **kwargs)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _action_masks(env: gym.Env) -> Optional[Callable[[], np.ndarray]]:
+    try:
+        return env.get_wrapper_attr("action_masks")
+    except AttributeError:
+        return None
+
+
+def _worker(
+    remote: mp.connection.Connection,
+    parent_remote: mp.connection.Connection,
+    env_fn_wrapper: CloudpickleWrapper,
+    index: int,
+) -> None:
+    from stable_baselines3.common.env_util import is_wrapped
+
+    parent_remote.close()
+    env = _patch_env(env_fn_wrapper.var())
+    action_masks = _action_masks(env)
+    remote.send((env.observation_space, env.action_space, action_masks is not None))
+
+    memories, arrays = zip(*[_attach(spec) for spec in remote.recv()])
+    observations, terminal, rewards, dones, actions = arrays[:5]
+    masks = arrays[5] if action_masks is not None else None
+
+    def write(buffer: int, observation) -> None:
+        observations[buffer, index] = observation
+        if masks is not None:
+            masks[index] = action_masks()
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                observation, reward, terminated, truncated, info = env.step(
+                    actions[index]
+                )
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                reset_info = None
+                if done:
+                    terminal[index] = observation
+                    observation, reset_info = env.reset()
+                rewards[index] = reward
+                dones[index] = done
+                write(data, observation)
+                remote.send((info, reset_info))
+            elif cmd == "reset":
+                seed, options, buffer = data
+                maybe_options = {"options": options} if options else {}
+                observation, reset_info = env.reset(seed=seed, **maybe_options)
+                write(buffer, observation)
+                remote.send(reset_info)
+            elif cmd == "render":
+                remote.send(env.render())
+            elif cmd == "close":
+                env.close()
+                remote.close()
+                break
+            elif cmd == "env_method":
+                method = env.get_wrapper_attr(data[0])
+                remote.send(method(*data[1], **data[2]))
+            elif cmd == "get_attr":
+                remote.send(env.get_wrapper_attr(data))
+            elif cmd == "has_attr":
+                remote.send(_has_attr(env, data))
+            elif cmd == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif cmd == "is_wrapped":
+                remote.send(is_wrapped(env, data))
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del observations, terminal, rewards, dones, actions, masks, arrays
+        for memory in memories:
+            memory.close()
+
+
+def _has_attr(env: gym.Env, name: str) -> bool:
+    try:
+        env.get_wrapper_attr(name)
+        return True
+    except AttributeError:
+        return False
+
+
+class SharedMemoryVecEnv(SubprocVecEnv):
+    """
+    One env per subprocess, like `SubprocVecEnv`, with observations, rewards,
+    dones, actions and action masks passed through shared memory.
+
+    The observation space must be a `Box`. If the envs have `action_masks`,
+    workers write their masks after every reset and step, so
+    `action_masks()` and `env_method("action_masks")` (as MaskablePPO
+    calls it) read them without a round trip to the workers.
+
+    :param env_fns: Environments to run in subprocesses
+    :param start_method: as for `SubprocVecEnv`
+    """
+
+    def __init__(
+        self, env_fns: List[Callable[[], gym.Env]], start_method: Optional[str] = None
+    ):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            forkserver_available = "forkserver" in mp.get_all_start_methods()
+            start_method = "forkserver" if forkserver_available else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for index, (work_remote, remote, env_fn) in enumerate(
+            zip(self.work_remotes, self.remotes, env_fns)
+        ):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), index)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        observation_space, action_space, has_masks = zip(
+            *[remote.recv() for remote in self.remotes]
+        )
+        observation_space, action_space = observation_space[0], action_space[0]
+        if not isinstance(observation_space, spaces.Box):
+            for process in self.processes:
+                process.terminate()
+            self.closed = True
+            raise ValueError(
+                "SharedMemoryVecEnv needs a Box observation space, "
+                f"not {observation_space}"
+            )
+        self.has_masks = all(has_masks)
+
+        shapes: Dict[str, Tuple[Tuple[int, ...], Any]] = {
+            "observations": (
+                (2, n_envs) + observation_space.shape,
+                observation_space.dtype,
+            ),
+            "terminal": ((n_envs,) + observation_space.shape, observation_space.dtype),
+            "rewards": ((n_envs,), np.float32),
+            "dones": ((n_envs,), np.bool_),
+            "actions": ((n_envs,) + action_space.shape, action_space.dtype),
+        }
+        if self.has_masks:
+            shapes["masks"] = ((n_envs, int(action_space.n)), np.bool_)
+
+        self.memories: List[SharedMemory] = []
+        specs: List[BlockSpec] = []
+        for block, (shape, dtype) in shapes.items():
+            dtype = np.dtype(dtype)
+            size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            memory = SharedMemory(create=True, size=size)
+            self.memories.append(memory)
+            specs.append((memory.name, shape, dtype.str))
+            setattr(self, block, np.ndarray(shape, dtype=dtype, buffer=memory.buf))
+        for remote in self.remotes:
+            remote.send(specs)
+
+        self.buffer = 0
+        self.reset_infos = [{} for _ in range(n_envs)]
+        VecEnv.__init__(self, n_envs, observation_space, action_space)
+
+    def reset(self) -> np.ndarray:
+        self.buffer ^= 1
+        for env_idx, remote in enumerate(self.remotes):
+            remote.send(
+                ("reset", (self._seeds[env_idx], self._options[env_idx], self.buffer))
+            )
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        self._reset_seeds()
+        self._reset_options()
+        return self.observations[self.buffer]
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.actions[:] = np.asarray(actions).reshape(self.actions.shape)
+        self.buffer ^= 1
+        for remote in self.remotes:
+            remote.send(("step", self.buffer))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        infos, reset_infos = zip(*results)
+        for row in np.flatnonzero(self.dones):
+            infos[row]["terminal_observation"] = self.terminal[row].copy()
+            self.reset_infos[row] = reset_infos[row]
+        return (
+            self.observations[self.buffer],
+            self.rewards.copy(),
+            self.dones.copy(),
+            infos,
+        )
+
+    def action_masks(self) -> np.ndarray:
+        """
+        (n_envs, n_actions) masks the workers wrote after their last step.
+        """
+        return self.masks.copy()
+
+    def env_method(
+        self, method_name: str, *method_args, indices=None, **method_kwargs
+    ) -> List[Any]:
+        if method_name == "action_masks" and self.has_masks and not method_args:
+            masks = self.action_masks()
+            return [masks[i] for i in self._get_indices(indices)]
+        return super().env_method(
+            method_name, *method_args, indices=indices, **method_kwargs
+        )
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        for block in BLOCKS:
+            self.__dict__.pop(block, None)
+        for memory in getattr(self, "memories", []):
+            memory.unlink()
+            try:
+                memory.close()
+            except BufferError:
+                # An observation handed out by step() still maps the block;
+                # it is unmapped when that array is freed.
+                pass
+
+
+def benchmark(
+    env_fn: Callable[[], gym.Env], n_envs: int = 4, steps: int = 2000
+) -> Dict[str, float]:
+    """
+    Random-action steps per second of `SubprocVecEnv` and
+    `SharedMemoryVecEnv` on `n_envs` envs from `env_fn`, fetching the
+    action masks each step as MaskablePPO does.
+    """
+    rates = {}
+    for vec_env_class in (SubprocVecEnv, SharedMemoryVecEnv):
+        env = vec_env_class([env_fn] * n_envs)
+        rng = np.random.default_rng(0)
+        env.reset()
+        start = time.perf_counter()
+        for _ in range(steps):
+            masks = np.stack(env.env_method("action_masks"))
+            scores = np.where(masks, rng.random(masks.shape), -1.0)
+            env.step(np.argmax(scores.reshape(n_envs, -1), axis=1))
+        rates[vec_env_class.__name__] = steps * n_envs / (time.perf_counter() - start)
+        env.close()
+    return rates
+
+
+if __name__ == "__main__":
+    from pybg.rl.envs.backgammon_envs import (
+        BackgammonAfterstateEnv,
+        BackgammonMaskableEnv,
+    )
+
+    for env_fn in (BackgammonMaskableEnv, BackgammonAfterstateEnv):
+        for n_envs in (4, 8):
+            rates = benchmark(env_fn, n_envs)
+            print(
+                f"{env_fn.__name__} x{n_envs}: "
+                + ", ".join(
+                    f"{name} {rate:,.0f} steps/s" for name, rate in rates.items()
+                )
+            )
@@ -0,0 +1,416 @@
+"""
+N backgammon games stepped together as NumPy arrays.
+
+`BackgammonVecEnv` is a native Stable-Baselines3 `VecEnv` with the action
+and observation spaces of `BackgammonMaskableEnv`: one single-checker action
+from `ALL_ACTIONS` per step, and the 54-D observation. Instead of a Python
+game per environment, every game lives in a row of a few small integer
+arrays, and legal moves, masks, hits, bear-offs, dice rolls and terminal
+checks are computed for all rows at once. The opponent plays uniformly
+random legal checker moves, also in batch.
+
+Boards use the `Position` layout from the agent's side: white (the agent)
+is positive and moves from point 23 down to point 0, black is negative and
+moves up. Legal moves are computed from the mover's view, in which the
+mover always moves down, on a (source, die) grid whose last source is the
+bar. They are checked die by die: unlike `generate_plays`, nothing forces
+a checker move that lets the other dice be played too.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from pybg.core.board import BACKGAMMON_STARTING_POSITION_ID
+from pybg.gnubg.position import Position
+from pybg.rl.envs.encoders import CHECKERS, ENCODERS, POINTS
+from pybg.rl.game import ALL_ACTIONS
+
+HOME = 6
+
+# Source index of the bar in the (source, die) grid; destinations use the
+# same index for "off", so a padded board column reads as an empty point.
+BAR = OFF = POINTS
+SOURCES = POINTS + 1
+
+WHITE, BLACK = 0, 1
+
+# Rounds of "no legal move, opponent rolls" after which a game where neither
+# side can move is truncated instead of looping forever.
+MAX_PASSES = 64
+
+INVALID_ACTION_REWARD = -10
+
+STARTING_POINTS = np.array(
+    Position.decode(BACKGAMMON_STARTING_POSITION_ID).board_points, dtype=np.int8
+)
+
+
+def _grids() -> Tuple[np.ndarray, ...]:
+    """
+    Static (source, die) grids: destination, bear-off cells, and whether
+    the die exactly bears the source off.
+    """
+    source = np.arange(SOURCES)[:, None]
+    die = np.arange(1, 7)[None, :]
+    destination = np.where(source == BAR, POINTS - die, source - die)
+    bearoff = destination < 0
+    destination = np.where(bearoff, OFF, destination)
+    exact = bearoff & (source == die - 1)
+    return destination, bearoff, exact
+
+
+DESTINATION, IS_BEAROFF, IS_EXACT = _grids()
+CELL_DESTINATION = DESTINATION.ravel()
+CELL_SOURCE = np.repeat(np.arange(SOURCES), 6)
+CELL_DIE = np.tile(np.arange(6), SOURCES)
+
+
+def _action_tables() -> Tuple[np.ndarray, ...]:
+    """
+    White's `ALL_ACTIONS` index for each (source, die) cell, as a plain move
+    and as a hit; the reward `Game.get_valid_actions` gives each; and, per
+    action index, its source and the dice that can play it.
+    """
+    index = {}
+    for i, action in enumerate(ALL_ACTIONS):
+        index.setdefault(action, i)
+
+    move = np.empty((SOURCES, 6), dtype=np.int64)
+    hit = np.empty((SOURCES, 6), dtype=np.int64)
+    move_reward = np.empty((SOURCES, 6), dtype=np.float32)
+    hit_reward = np.empty((SOURCES, 6), dtype=np.float32)
+    for k, die in enumerate(range(1, 7)):
+        move[BAR, k] = index[("reenter", POINTS - die)]
+        hit[BAR, k] = index[("reenter_hit", POINTS - die)]
+        move_reward[BAR, k], hit_reward[BAR, k] = die, POINTS
+        for source in range(POINTS):
+            destination = source - die
+            if destination < 0:
+                move[source, k] = hit[source, k] = index[("bearoff", source)]
+                move_reward[source, k] = hit_reward[source, k] = die
+            else:
+                move[source, k] = index[("move", source, destination)]
+                hit[source, k] = index[("hit", source, destination)]
+                move_reward[source, k], hit_reward[source, k] = die, source
+
+    action_source = np.full(len(ALL_ACTIONS), -1, dtype=np.int64)
+    action_dice = np.zeros((len(ALL_ACTIONS), 6), dtype=bool)
+    for table in (move, hit):
+        for (source, k), action in np.ndenumerate(table):
+            action_source[action] = source
+            action_dice[action, k] = True
+    return move, hit, move_reward, hit_reward, action_source, action_dice
+
+
+(
+    MOVE_ACTIONS,
+    HIT_ACTIONS,
+    MOVE_REWARDS,
+    HIT_REWARDS,
+    ACTION_SOURCE,
+    ACTION_DICE,
+) = _action_tables()
+
+
+def legal_moves(
+    own: np.ndarray, opponent: np.ndarray, bar: np.ndarray, dice: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Legal single-checker moves of N boards, from the mover's view.
+
+    `own` and `opponent` are (N, 24) checker counts indexed so the mover
+    moves down, `bar` is the mover's checkers on the bar and `dice` an
+    (N, 6) mask of the die values left to play. Returns (N, 25, 6) masks of
+    the legal (source, die) cells and of the cells that hit a blot.
+    """
+    n = len(own)
+    padded = np.zeros((n, SOURCES), dtype=own.dtype)
+    padded[:, :POINTS] = opponent
+    blockers = padded[:, CELL_DESTINATION]
+    padded[:, :POINTS] = own
+    padded[:, BAR] = bar
+    occupied = padded > 0
+    on_bar = bar > 0
+    occupied[:, :POINTS] &= ~on_bar[:, None]
+    # Cells are gathered flat so every operation runs over whole rows.
+    legal = blockers < 2
+    legal &= occupied[:, CELL_SOURCE]
+    legal &= dice[:, CELL_DIE]
+
+    # Bearing off needs every checker home, and a die larger than the
+    # exact one may only bear off from the highest occupied point.
+    home = ~on_bar & (own[:, HOME:].sum(axis=1) == 0)
+    highest = HOME - 1 - np.argmax(occupied[:, HOME - 1 :: -1], axis=1)
+    allowed = IS_EXACT[:HOME] | (np.arange(HOME) == highest[:, None])[:, :, None]
+    allowed &= home[:, None, None]
+    legal[:, : HOME * 6] &= ~IS_BEAROFF[:HOME].ravel() | allowed.reshape(n, -1)
+    return legal.reshape(n, SOURCES, 6), (blockers == 1).reshape(n, SOURCES, 6)
+
+
+class BackgammonVecEnv(VecEnv):
+    """
+    `n_envs` games against a random opponent, stepped in batch.
+
+    Rewards, invalid-action handling and the observation layout follow
+    `BackgammonEnv`. After every step each game is advanced until the agent
+    has a legal move (the opponent playing through any turns the agent must
+    pass), so `action_masks` always has a legal action. Finished games are
+    reset in place and report their last observation as
+    `terminal_observation`, with `is_success` set when the agent won.
+
+    `observation` picks the layout from `ENCODERS`: "legacy" for the 54-D
+    observation, or "gnubg" for the GNUBG network inputs (which carry no
+    dice). Observations are encoded into two preallocated buffers in turn,
+    so the array a step returns stays valid until the step after next.
+    """
+
+    def __init__(
+        self, n_envs: int = 16, seed: Optional[int] = None, observation: str = "legacy"
+    ):
+        self.render_mode = None
+        self.encoder = ENCODERS[observation]()
+        super().__init__(
+            n_envs, self.encoder.space(), spaces.Discrete(len(ALL_ACTIONS))
+        )
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(n_envs)
+        self.points = np.zeros((n_envs, POINTS), dtype=np.int8)
+        self.bar = np.zeros((n_envs, 2), dtype=np.int8)
+        self.off = np.zeros((n_envs, 2), dtype=np.int8)
+        self.dice = np.zeros((n_envs, 4), dtype=np.int8)
+        self.legal = np.zeros((n_envs, SOURCES, 6), dtype=bool)
+        self.hits = np.zeros((n_envs, SOURCES, 6), dtype=bool)
+        self.actions = np.zeros(n_envs, dtype=np.int64)
+        self.invalid_actions_taken = np.zeros(n_envs, dtype=np.int64)
+        self.buffers = np.zeros((2, n_envs, self.encoder.size), dtype=np.float32)
+        self.buffer = 0
+
+    # Game state
+
+    def _view(
+        self, rows: np.ndarray, side: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        points = self.points[rows]
+        if side == BLACK:
+            points = -points[:, ::-1]
+        return np.maximum(points, 0), np.maximum(-points, 0), self.bar[rows, side]
+
+    def _dice_mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros((len(rows), 7), dtype=bool)
+        mask[np.arange(len(rows))[:, None], self.dice[rows]] = True
+        return mask[:, 1:]
+
+    def _legal_moves(
+        self, rows: np.ndarray, side: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        own, opponent, bar = self._view(rows, side)
+        return legal_moves(own, opponent, bar, self._dice_mask(rows))
+
+    def _roll(self, rows: np.ndarray) -> None:
+        rolls = self.rng.integers(1, 7, size=(len(rows), 2), dtype=np.int8)
+        doubles = rolls[:, 0] == rolls[:, 1]
+        self.dice[rows, :2] = rolls
+        self.dice[rows, 2:] = np.where(doubles, rolls[:, 0], 0)[:, None]
+
+    def _move(
+        self, rows: np.ndarray, side: int, source: np.ndarray, die: np.ndarray
+    ) -> np.ndarray:
+        """
+        Play one checker per row from the mover's view and use up its die.
+        Returns which moves hit.
+        """
+        sign = 1 if side == WHITE else -1
+        destination = DESTINATION[source, die - 1]
+        from_bar = source == BAR
+        on_board = destination != OFF
+        if side == BLACK:
+            source = POINTS - 1 - source
+            destination = POINTS - 1 - destination
+
+        self.points[rows[~from_bar], source[~from_bar]] -= sign
+        self.bar[rows[from_bar], side] -= 1
+
+        landing = rows[on_board]
+        target = destination[on_board]
+        hit = np.zeros(len(rows), dtype=bool)
+        hit[on_board] = self.points[landing, target] == -sign
+        self.points[rows[hit], destination[hit]] = 0
+        self.bar[rows[hit], 1 - side] += 1
+        self.points[landing, target] += sign
+        self.off[rows[~on_board], side] += 1
+
+        # Drop the first matching die and shift the rest down, as `Game`
+        # deletes it from its list.
+        dice = self.dice[rows]
+        used = np.argmax(dice == die[:, None], axis=1)
+        shifted = np.zeros_like(dice)
+        shifted[:, :-1] = dice[:, 1:]
+        self.dice[rows] = np.where(np.arange(4) >= used[:, None], shifted, dice)
+        return hit
+
+    def _random_moves(self, legal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        A uniformly random legal (source, die) per row; rows need one.
+        """
+        noise = self.rng.random(legal.shape)
+        noise = np.where(legal, noise, -1.0).reshape(len(legal), SOURCES * 6)
+        flat = np.argmax(noise, axis=1)
+        return flat // 6, flat % 6 + 1
+
+    def _opponent_turn(self, rows: np.ndarray) -> None:
+        """
+        Roll for black (unless its dice are set) and play random checkers
+        until its dice are used, it cannot move, or it has won.
+        """
+        unrolled = rows[self.dice[rows, 0] == 0]
+        self._roll(unrolled)
+        while len(rows):
+            legal, _ = self._legal_moves(rows, BLACK)
+            can_move = legal.any(axis=(1, 2))
+            self.dice[rows[~can_move]] = 0
+            rows, legal = rows[can_move], legal[can_move]
+            source, die = self._random_moves(legal)
+            self._move(rows, BLACK, source, die)
+            rows = rows[(self.dice[rows, 0] > 0) & (self.off[rows, BLACK] < CHECKERS)]
+
+    def _advance(self, rows: np.ndarray, truncated: np.ndarray) -> None:
+        """
+        Give the turn to black in each game the agent cannot move in, and
+        roll for the agent, until it can move or the game is over.
+        """
+        passes = 0
+        while len(rows):
+            self.legal[rows], self.hits[rows] = self._legal_moves(rows, WHITE)
+            rows = rows[~self.legal[rows].any(axis=(1, 2))]
+            rows = rows[self.off[rows, BLACK] < CHECKERS]
+            if passes == MAX_PASSES:
+                truncated[rows] = True
+                break
+            self.dice[rows] = 0
+            self._opponent_turn(rows)
+            rows = rows[self.off[rows, BLACK] < CHECKERS]
+            self._roll(rows)
+            passes += 1
+
+    def _reset_games(self, rows: np.ndarray, truncated: np.ndarray) -> None:
+        """
+        Set up the starting position and play the opening roll, which goes
+        to whoever rolled the higher die.
+        """
+        self.points[rows] = STARTING_POINTS
+        self.bar[rows] = 0
+        self.off[rows] = 0
+        self.dice[rows] = 0
+        self.invalid_actions_taken[rows] = 0
+
+        white = self.rng.integers(1, 7, size=len(rows), dtype=np.int8)
+        black = self.rng.integers(1, 6, size=len(rows), dtype=np.int8)
+        black += black >= white
+        white_starts = white > black
+        first, second = np.where(white_starts, white, black), np.minimum(white, black)
+        self.dice[rows, 0], self.dice[rows, 1] = first, second
+
+        self._opponent_turn(rows[~white_starts])
+        self._roll(rows[~white_starts])
+        self._advance(rows, truncated)
+
+    def _observations(self) -> np.ndarray:
+        self.buffer ^= 1
+        return self.encoder.encode(
+            self.points, self.bar, self.off, self.dice, self.buffers[self.buffer]
+        )
+
+    def _terminal_observations(self, rows: np.ndarray) -> np.ndarray:
+        return self.encoder(
+            self.points[rows], self.bar[rows], self.off[rows], self.dice[rows]
+        )
+
+    def action_masks(self) -> np.ndarray:
+        """
+        (n_envs, len(ALL_ACTIONS)) masks of the legal actions.
+        """
+        masks = np.zeros((self.num_envs, len(ALL_ACTIONS)), dtype=bool)
+        rows, cells = np.nonzero(self.legal.reshape(self.num_envs, -1))
+        hits = self.hits.reshape(self.num_envs, -1)[rows, cells]
+        actions = np.where(
+            hits, HIT_ACTIONS.ravel()[cells], MOVE_ACTIONS.ravel()[cells]
+        )
+        masks[rows, actions] = True
+        return masks
+
+    # VecEnv
+
+    def reset(self) -> np.ndarray:
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_games(self.rows, np.zeros(self.num_envs, dtype=bool))
+        return self._observations()
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def step_wait(self):
+        rows = self.rows
+        source = ACTION_SOURCE[self.actions]
+        playable = self.legal[rows, source] & ACTION_DICE[self.actions]
+        valid = (source >= 0) & playable.any(axis=1)
+        die = np.argmax(playable, axis=1) + 1
+
+        invalid = ~valid
+        self.invalid_actions_taken[invalid] += 1
+        source[invalid], die[invalid] = self._random_moves(self.legal[invalid])
+
+        hit = self._move(rows, WHITE, source, die)
+        rewards = np.where(
+            hit, HIT_REWARDS[source, die - 1], MOVE_REWARDS[source, die - 1]
+        ).astype(np.float32)
+        rewards[invalid] = INVALID_ACTION_REWARD
+
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        playing = rows[self.off[:, WHITE] < CHECKERS]
+        self._advance(playing, truncated)
+
+        won = self.off[:, WHITE] == CHECKERS
+        dones = won | (self.off[:, BLACK] == CHECKERS) | truncated
+        infos: List[dict] = [
+            {"invalid actions taken": int(n)} for n in self.invalid_actions_taken
+        ]
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            terminal = self._terminal_observations(finished)
+            for i, row in enumerate(finished):
+                infos[row]["terminal_observation"] = terminal[i]
+                infos[row]["TimeLimit.truncated"] = bool(truncated[row])
+                infos[row]["is_success"] = bool(won[row])
+            self._reset_games(finished, np.zeros(self.num_envs, dtype=bool))
+        return self._observations(), rewards, dones, infos
+
+    def close(self) -> None:
+        pass
+
+    def get_images(self) -> Sequence[Optional[np.ndarray]]:
+        return [None] * self.num_envs
+
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name: str, value: Any, indices=None) -> None:
+        setattr(self, attr_name, value)
+
+    def env_method(
+        self, method_name: str, *method_args, indices=None, **method_kwargs
+    ) -> List[Any]:
+        """
+        Call a batched method of this env and split its result per game,
+        so `action_masks` works through `env_method` as MaskablePPO expects.
+        """
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result[i] for i in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False] * len(self._get_indices(indices))
@@ -13,27 +13,24 @@ This script allows us to play against a SARSA Backgammon agent.
 """
 
 import argparse
-import pickle
 
 from pybg.rl.game.sarsa_game import SarsaGame
+from pybg.rl.sarsa_train import load_agent
 
 if __name__ == "__main__":
     PARSER = argparse.ArgumentParser(description="Train an agent using RL")
     PARSER.add_argument(
         "--name",
         "-n",
-        help="Name of the agent to play againts.",
-        default="models/sarsa-vs_random-1M.pkl",
+        help="Name of the agent to play againts (.npz, or .pkl for a pickle).",
+        default="models/sarsa-vs_random-1M.npz",
         type=str,
     )
     PARSER.add_argument("--games", "-g", help="Number of games to play.", default=1)
 
     ARGS = PARSER.parse_args()
 
-    filename = ARGS.name
-    infile = open(filename, "rb")
-    agent = pickle.load(infile)
-    infile.close()
+    agent = load_agent(ARGS.name)
 
     # TODO Make human player 1
     opponent = "human"
@@ -1,4 +1,5 @@
 import argparse
+import os
 import pickle
 
 from pybg.rl.game.sarsa_game import SarsaGame
@@ -57,13 +58,31 @@ def train(agent_train, opponent, maxmove):
     return agent_train
 
 
+def load_agent(path):
+    """
+    A `SarsaAgent` from an `.npz` file, or from a pickle of the old format.
+    """
+    if path.endswith(".npz"):
+        return SarsaAgent.load(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_agent(agent, path):
+    if path.endswith(".npz"):
+        agent.save(path)
+    else:
+        with open(path, "wb") as f:
+            pickle.dump(agent, f)
+
+
 if __name__ == "__main__":
     PARSER = argparse.ArgumentParser(description="Train an agent using RL")
     PARSER.add_argument(
         "--name",
         "-n",
-        help="Name of the agent to be trained.",
-        default="models/sarsa-vs_random-1M.pkl",
+        help="Name of the agent to be trained (.npz, or .pkl for a pickle).",
+        default="models/sarsa-vs_random-1M.npz",
         type=str,
     )
     PARSER.add_argument(
@@ -83,9 +102,7 @@ if __name__ == "__main__":
     ARGS = PARSER.parse_args()
 
     if bool(int(ARGS.continued)):
-        infilename = ARGS.name
-        with open(infilename, "rb") as f:
-            agent = pickle.load(f)
+        agent = load_agent(ARGS.name)
     else:
         agent = SarsaAgent()
 
@@ -100,8 +117,8 @@ if __name__ == "__main__":
             pass
 
     if bool(int(ARGS.continued)):
-        outfilename = "{}-updated.pkl".format(ARGS.name)
+        root, ext = os.path.splitext(ARGS.name)
+        outfilename = "{}-updated{}".format(root, ext)
     else:
         outfilename = ARGS.name
-    with open(outfilename, "wb") as f:
-        pickle.dump(agent, f)
+    save_agent(agent, outfilename)
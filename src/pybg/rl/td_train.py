@@ -0,0 +1,339 @@
+"""
+TD(lambda) self-play training of a GNUBG-style evaluation network.
+
+`TDLambdaTrainer` plays `games` games against itself in lockstep. Each ply,
+every game's legal plays from `generate_plays` are encoded with
+`GnubgEncoder` and all of the afterstates (from the side of the player to
+move next) are scored in one forward pass; each game takes the play
+leaving its opponent the lowest cubeless equity. The network is a
+`TorchGnubgNetwork`: one sigmoid hidden layer and GNUBG's five outputs
+(win, win gammon, win backgammon, lose gammon, lose backgammon) for the
+player on roll.
+
+Updates are TD(lambda) with one eligibility trace per output, as in
+TD-Gammon. Values are taken from the side of the game's first player, so
+the opponent's outputs are mirrored (win becomes 1 - win, gammons swap)
+on its turns; the per-sample gradients of the two-layer network are
+written out in closed form and folded into the traces in place, on the
+CPU. The final target is the game's result: 1, 2 or 3 points to the
+player who bore off.
+
+`save` writes the network to every slot of a GNUBG `.weights` file, so
+`GnubgEvaluator` and `TorchGnubgEvaluator` can load it directly.
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from pybg.core.board import BACKGAMMON_STARTING_POSITION_ID, Play, generate_plays
+from pybg.gnubg.neural_net import GnubgEvaluator, GnubgNetwork, save_networks
+from pybg.gnubg.position import Position
+from pybg.gnubg.torch_nn import TorchGnubgNetwork
+from pybg.rl.envs.backgammon_envs import game_points
+from pybg.rl.envs.encoders import CHECKERS, GNUBG_INPUTS, GnubgEncoder
+
+OUTPUTS = 5
+
+# The slots `GnubgEvaluator` reads; `save` writes the network to each.
+NETWORK_NAMES = (
+    "race",
+    "prune race",
+    "crashed",
+    "prune crashed",
+    "contact contact250",
+    "prune contact",
+)
+
+# The outputs seen from the other side: MIRROR_OFFSET + MIRROR_SIGN *
+# outputs[MIRROR_ORDER] turns (win, wg, wbg, lg, lbg) into the opponent's.
+MIRROR_ORDER = [0, 3, 4, 1, 2]
+MIRROR_SIGN = torch.tensor([-1.0, 1.0, 1.0, 1.0, 1.0])
+MIRROR_OFFSET = torch.tensor([1.0, 0.0, 0.0, 0.0, 0.0])
+
+# Cubeless equity of the outputs: 2 * win - 1 + wg - lg + wbg - lbg.
+EQUITY_WEIGHTS = torch.tensor([2.0, 1.0, 1.0, -1.0, -1.0])
+
+STARTING_POSITION = Position.decode(BACKGAMMON_STARTING_POSITION_ID)
+
+
+def random_network(
+    inputs: int = GNUBG_INPUTS,
+    hidden: int = 80,
+    seed: Optional[int] = None,
+    beta_hidden: float = 0.1,
+    beta_output: float = 1.0,
+) -> GnubgNetwork:
+    """
+    A GNUBG network with small random weights, scaled by the betas so the
+    sigmoids start out of saturation.
+    """
+    rng = np.random.default_rng(seed)
+    return GnubgNetwork(
+        inputs,
+        hidden,
+        OUTPUTS,
+        0,
+        beta_hidden,
+        beta_output,
+        rng.normal(0, 1 / (beta_hidden * np.sqrt(inputs)), (inputs, hidden)),
+        rng.normal(0, 1 / (beta_output * np.sqrt(hidden)), (hidden, OUTPUTS)),
+        np.zeros(hidden),
+        np.zeros(OUTPUTS),
+    )
+
+
+def mirror(outputs: torch.Tensor, rows: torch.Tensor) -> torch.Tensor:
+    """
+    `outputs` with the `rows` marked True seen from the other side.
+    """
+    mirrored = MIRROR_OFFSET + MIRROR_SIGN * outputs[:, MIRROR_ORDER]
+    return torch.where(rows[:, None], mirrored, outputs)
+
+
+def result(position: Position) -> torch.Tensor:
+    """
+    The outputs a finished game scores for the player who bore off last,
+    whose side `position` is from.
+    """
+    points = game_points(position)
+    return torch.tensor([1.0, float(points >= 2), float(points == 3), 0.0, 0.0])
+
+
+class TDLambdaTrainer:
+    """
+    Trains `network` by TD(lambda) self-play on `games` games at a time.
+
+    `alpha` is the step size per game and ply, `lamda` the trace decay and
+    `epsilon` the chance of a random play instead of the greedy one.
+    """
+
+    def __init__(
+        self,
+        network: Optional[GnubgNetwork] = None,
+        games: int = 64,
+        alpha: float = 0.1,
+        lamda: float = 0.7,
+        epsilon: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        network = network or random_network(seed=seed)
+        self.model = TorchGnubgNetwork(network)
+        self.trained = network.nTrained
+        self.n_games = games
+        self.alpha = alpha
+        self.lamda = lamda
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.encoder = GnubgEncoder(network.cInput)
+        self.inputs = np.zeros((games, network.cInput), dtype=np.float32)
+
+        inputs, hidden = network.cInput, network.cHidden
+        self.parameters = (
+            self.model.hidden.weight,
+            self.model.hidden.bias,
+            self.model.output.weight,
+            self.model.output.bias,
+        )
+        # Per game and output, the trace of each parameter, flattened.
+        self.traces = [
+            torch.zeros(games, OUTPUTS, hidden, inputs),
+            torch.zeros(games, OUTPUTS, hidden),
+            torch.zeros(games, OUTPUTS, OUTPUTS, hidden),
+            torch.zeros(games, OUTPUTS, OUTPUTS),
+        ]
+
+        self.positions: List[Position] = [STARTING_POSITION] * games
+        self.opening = np.ones(games, dtype=bool)
+        # Rows whose player on roll is the one who moved second.
+        self.second = torch.zeros(games, dtype=torch.bool)
+        self.values = torch.zeros(games, OUTPUTS)
+        self._start_traces(torch.ones(games, dtype=torch.bool))
+
+    # Network
+
+    def _forward(self, x: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        model = self.model
+        hidden = torch.sigmoid(-model.beta_hidden * model.hidden(x))
+        outputs = torch.sigmoid(-model.beta_output * model.output(hidden))
+        return hidden, outputs
+
+    def _start_traces(self, restart: torch.Tensor) -> None:
+        """
+        Value the current positions and fold their output gradients into
+        the traces, which decay by lamda except for `restart` rows.
+        """
+        n = self.n_games
+        x = torch.from_numpy(self.encoder.encode_positions(self.positions, self.inputs))
+        hidden, outputs = self._forward(x)
+        self.values = mirror(outputs, self.second)
+
+        # d output_k / d output activity_k, then through W2 to the hidden
+        # activities, for every game and output.
+        d_output = -self.model.beta_output * outputs * (1 - outputs)
+        d_hidden = (
+            d_output[:, :, None]
+            * self.model.output.weight[None]
+            * (-self.model.beta_hidden * hidden * (1 - hidden))[:, None, :]
+        )
+        eye = torch.eye(OUTPUTS)
+        gradients = [
+            None,
+            d_hidden,
+            d_output[:, :, None, None]
+            * eye[None, :, :, None]
+            * hidden[:, None, None, :],
+            d_output[:, :, None] * eye[None],
+        ]
+        # Mirrored rows: the values' gradients are the outputs', reordered
+        # and with the win row negated.
+        sign = torch.where(self.second[:, None], MIRROR_SIGN, 1.0)
+        order = torch.where(
+            self.second[:, None], torch.tensor(MIRROR_ORDER), torch.arange(OUTPUTS)
+        )
+
+        decay = torch.where(restart, 0.0, self.lamda)
+        for trace in self.traces:
+            trace.mul_(decay.view(n, *[1] * (trace.dim() - 1)))
+
+        d_hidden = d_hidden[torch.arange(n)[:, None], order] * sign[:, :, None]
+        self.traces[0].view(n, -1, x.shape[1]).baddbmm_(
+            d_hidden.reshape(n, -1, 1), x[:, None, :]
+        )
+        for trace, gradient in zip(self.traces[1:], gradients[1:]):
+            gradient = gradient[torch.arange(n)[:, None], order]
+            trace.add_(gradient * sign.view(n, OUTPUTS, *[1] * (gradient.dim() - 2)))
+
+    def _update(self, targets: torch.Tensor) -> None:
+        delta = (targets - self.values).reshape(1, -1) * self.alpha
+        with torch.no_grad():
+            for parameter, trace in zip(self.parameters, self.traces):
+                flat = trace.view(delta.shape[1], -1)
+                parameter.view(1, -1).addmm_(delta, flat)
+
+    # Self-play
+
+    def _roll(self) -> List[Tuple[int, int]]:
+        dice = self.rng.integers(1, 7, size=(self.n_games, 2))
+        # Opening rolls are never doubles.
+        for row in np.flatnonzero(self.opening):
+            dice[row] = self.rng.choice(6, 2, replace=False) + 1
+        return [(int(a), int(b)) for a, b in dice]
+
+    def _choose(self, plays: List[List[Play]]) -> Tuple[List[Play], torch.Tensor]:
+        """
+        The play each game makes, and its afterstate's outputs for the
+        player to move next.
+        """
+        candidates = [play.position.swap_players() for game in plays for play in game]
+        x = torch.from_numpy(self.encoder.encode_positions(candidates))
+        with torch.no_grad():
+            _, outputs = self._forward(x)
+        equities = (outputs @ EQUITY_WEIGHTS).numpy()
+
+        chosen, rows, start = [], [], 0
+        for game in plays:
+            if self.epsilon and self.rng.random() < self.epsilon:
+                best = int(self.rng.integers(len(game)))
+            else:
+                best = int(np.argmin(equities[start : start + len(game)]))
+            chosen.append(game[best])
+            rows.append(start + best)
+            start += len(game)
+        return chosen, outputs[rows]
+
+    def step(self) -> int:
+        """
+        Play one ply in every game and update the network. Returns the
+        number of games that finished.
+        """
+        dice = self._roll()
+        plays = [generate_plays(p, d) for p, d in zip(self.positions, dice)]
+        chosen, outputs = self._choose(plays)
+
+        # Next states are valued from the opponent's side, so mirrored
+        # when the mover is the first player.
+        targets = mirror(outputs, ~self.second)
+        finished = np.array([p.position.player_off == CHECKERS for p in chosen])
+        for row in np.flatnonzero(finished):
+            targets[row] = mirror(
+                result(chosen[row].position)[None], self.second[[row]]
+            )[0]
+        self._update(targets)
+
+        self.positions = [
+            STARTING_POSITION if done else play.position.swap_players()
+            for play, done in zip(chosen, finished)
+        ]
+        restart = torch.from_numpy(finished)
+        self.second = ~self.second & ~restart
+        self.opening = finished
+        self._start_traces(restart)
+        self.trained += int(finished.sum())
+        return int(finished.sum())
+
+    def train(self, games: int, report: int = 0) -> Dict[str, float]:
+        """
+        Step until `games` more games have finished, printing progress every
+        `report` games. Returns the games played, seconds and games/second.
+        """
+        played, start, next_report = 0, time.perf_counter(), report
+        while played < games:
+            played += self.step()
+            if report and played >= next_report:
+                elapsed = time.perf_counter() - start
+                print(f"{played} games, {played / elapsed:.1f} games/s")
+                next_report += report
+        elapsed = time.perf_counter() - start
+        return {
+            "games": played,
+            "seconds": elapsed,
+            "games_per_second": played / elapsed,
+        }
+
+    def network(self) -> GnubgNetwork:
+        return self.model.to_gnubg(self.trained)
+
+    def save(self, path: str) -> None:
+        """
+        Write the network to a GNUBG `.weights` file, in every slot.
+        """
+        network = self.network()
+        save_networks(path, {name: network for name in NETWORK_NAMES})
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description="Train a GNUBG net by TD(lambda)")
+    PARSER.add_argument("--name", "-n", default="models/td-lambda.weights")
+    PARSER.add_argument(
+        "--weights",
+        "-w",
+        default=None,
+        help="Optional: GNUBG weights file whose contact net to continue from",
+    )
+    PARSER.add_argument("--games", "-g", default=10_000, type=int)
+    PARSER.add_argument("--lockstep", "-l", default=64, type=int)
+    PARSER.add_argument("--hidden", default=80, type=int)
+    PARSER.add_argument("--alpha", "-a", default=0.1, type=float)
+    PARSER.add_argument("--lamda", default=0.7, type=float)
+    PARSER.add_argument("--epsilon", "-e", default=0.0, type=float)
+    PARSER.add_argument("--seed", "-s", default=None, type=int)
+    PARSER.add_argument("--report", "-r", default=1000, type=int)
+    ARGS = PARSER.parse_args()
+
+    if ARGS.weights:
+        START = GnubgEvaluator(ARGS.weights).load_all_networks()["contact_contact250"]
+    else:
+        START = random_network(hidden=ARGS.hidden, seed=ARGS.seed)
+    TRAINER = TDLambdaTrainer(
+        START, ARGS.lockstep, ARGS.alpha, ARGS.lamda, ARGS.epsilon, ARGS.seed
+    )
+    STATS = TRAINER.train(ARGS.games, ARGS.report)
+    TRAINER.save(ARGS.name)
+    print(
+        f"Trained {STATS['games']} games in {STATS['seconds']:.0f}s "
+        f"({STATS['games_per_second']:.1f} games/s), saved to {ARGS.name}"
+    )
@@ -9,12 +9,16 @@ from stable_baselines3.common.callbacks import BaseCallback
 from stable_baselines3.common.monitor import Monitor
 from stable_baselines3.common.results_plotter import load_results, ts2xy
 from stable_baselines3.common.utils import set_random_seed
-from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
 from stable_baselines3.ddpg import policies as ddpg_policies
 from stable_baselines3.dqn import policies as dqn_policies
 from stable_baselines3.ppo import MlpPolicy, CnnPolicy
 from stable_baselines3.sac import policies as sac_policies
 
+from pybg.rl.agents.policy import PolicyAgent
+from pybg.rl.envs.shared_vec_env import SharedMemoryVecEnv
+from pybg.rl.envs.vec_env import BackgammonVecEnv
+
 # Manual registration
 register(
     id="BackgammonRandomEnv-v0",
@@ -46,10 +50,17 @@ class EpisodeLimitCallback(BaseCallback):
         return True
 
 
+def make_opponent():
+    """
+    The PPO policy at `--opponent`, or None for random legal plays.
+    """
+    return PolicyAgent("ppo", ARGS.opponent) if ARGS.opponent else None
+
+
 def make_env(env_id, algorithm, rank, seed=0):
     def _init():
-        env = gym.make(env_id)
-        env.seed(seed + rank)
+        env = gym.make(env_id, opponent=make_opponent())
+        env.reset(seed=seed + rank)
         os.makedirs(ARGS.log_directory, exist_ok=True)
         env = Monitor(env, ARGS.log_directory, allow_early_resets=True)
         return env
@@ -90,11 +101,32 @@ if __name__ == "__main__":
         help="Optional: number of episodes instead of timesteps",
     )
     PARSER.add_argument("--multiprocess", "-m", default=1, type=int)
+    PARSER.add_argument(
+        "--shared_memory",
+        "-s",
+        action="store_true",
+        help="Optional: pass multiprocess observations through shared memory",
+    )
+    PARSER.add_argument(
+        "--vectorized",
+        "-V",
+        default=0,
+        type=int,
+        help="Optional: number of games to step together in one process",
+    )
+    PARSER.add_argument(
+        "--opponent",
+        "-o",
+        default=None,
+        help="Optional: a PPO model (.zip) to train against instead of random plays",
+    )
     PARSER.add_argument("--graph", "-g", default=1, type=int)
     PARSER.add_argument("--window", "-w", default=50, type=int)
     PARSER.add_argument("--verbose", "-v", default=1, type=int)
 
     ARGS = PARSER.parse_args()
+    if ARGS.opponent and not os.path.exists(ARGS.opponent):
+        raise ValueError(f"No opponent model at {ARGS.opponent}")
 
     if ARGS.algorithm.lower() == "a2c":
         algorithm = A2C
@@ -129,12 +161,19 @@ if __name__ == "__main__":
     )
 
     os.makedirs(ARGS.log_directory, exist_ok=True)
-    if ARGS.multiprocess > 1:
-        env = SubprocVecEnv(
+    if ARGS.vectorized > 0:
+        if algorithm in [DDPG, SAC]:
+            raise ValueError("The vectorized environment has discrete actions only")
+        if ARGS.opponent:
+            raise ValueError("The vectorized environment plays random opponents only")
+        env = VecMonitor(BackgammonVecEnv(ARGS.vectorized), ARGS.log_directory)
+    elif ARGS.multiprocess > 1:
+        vec_env_class = SharedMemoryVecEnv if ARGS.shared_memory else SubprocVecEnv
+        env = vec_env_class(
             [make_env(env_id, algorithm, i) for i in range(ARGS.multiprocess)]
         )
     else:
-        env = gym.make(env_id)
+        env = gym.make(env_id, opponent=make_opponent())
         env = Monitor(env, ARGS.log_directory, allow_early_resets=True)
         env = DummyVecEnv([lambda: env])
 
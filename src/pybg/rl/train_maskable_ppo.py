@@ -1,33 +1,14 @@
-import gymnasium as gym
 from sb3_contrib import MaskablePPO
 from sb3_contrib.common.maskable.policies import MaskableActorCriticPolicy
-from sb3_contrib.common.wrappers import ActionMasker
-from stable_baselines3.common.vec_env import DummyVecEnv
 
-from pybg.rl.agents.random import RandomAgent
-from pybg.rl.envs.backgammon_envs import BackgammonMaskableEnv
-from pybg.rl.game.game import ALL_ACTIONS
+from pybg.rl.envs.vec_env import BackgammonVecEnv
 
-
-def mask_fn(env):
-    return env.get_action_mask()
-
-
-def make_env():
-    action_space = gym.spaces.Discrete(len(ALL_ACTIONS))
-    opponent = RandomAgent(action_space=action_space)
-
-    class MaskableWrapper(BackgammonMaskableEnv):
-        def get_action_mask(self):
-            return super().get_action_mask()
-
-    env = MaskableWrapper(opponent=opponent)
-    return ActionMasker(env=env, action_mask_fn=mask_fn)
+# Games stepped together; the env exposes action_masks for all of them.
+N_ENVS = 64
 
 
 if __name__ == "__main__":
-    # ⚠️ Wrap in DummyVecEnv, but make sure get_action_mask is exposed
-    vec_env = DummyVecEnv([make_env])
+    vec_env = BackgammonVecEnv(n_envs=N_ENVS)
 
     model = MaskablePPO(
         policy=MaskableActorCriticPolicy,
@@ -5,11 +5,14 @@ import re
 from typing import List, Optional, Tuple, cast
 
 from pybg.core.board import (
+    ACEYDEUCY_STARTING_POSITION_ID,
     BACKGAMMON_STARTING_POSITION_ID,
     Board,
     BoardError,
     GameState,
     Resign,
+    generate_plays,
+    generate_positions,
 )
 from pybg.core.player import Player, PlayerType
 from pybg.gnubg.position import Position
@@ -99,6 +102,54 @@ def test_generate():
     assert len(bg.generate_plays()) == 2
 
 
+@pytest.mark.parametrize(
+    "dice,plays,partial_plays",
+    [((1, 1), 42, 75), ((4, 4), 52, 96), ((6, 6), 11, 30), ((3, 1), 16, 24)],
+)
+def test_generate_plays_from_start(dice, plays, partial_plays):
+    """Doubles reach each final position by many orders; each counts once."""
+    position = Position.decode(BACKGAMMON_STARTING_POSITION_ID)
+    full = generate_plays(position, dice)
+    partial = generate_plays(position, dice, partial=True)
+
+    assert len(full) == plays
+    assert len(partial) == partial_plays
+    assert len({play.position for play in partial}) == partial_plays
+    assert {play.position for play in full} <= {play.position for play in partial}
+
+
+@pytest.mark.parametrize(
+    "position",
+    [
+        Position.decode(BACKGAMMON_STARTING_POSITION_ID),
+        Position.decode(ACEYDEUCY_STARTING_POSITION_ID),
+        Position(
+            board_points=(-2, 0, 0, 0, 0, 5, 0, 3, 0, 0, 0, -5)
+            + (5, 0, 0, 0, -3, 0, -5, 0, 0, 0, 0, 1),
+            player_bar=1,
+            player_off=0,
+            opponent_bar=0,
+            opponent_off=0,
+        ),
+        Position(
+            board_points=(2, 2, -1, 3, 3, 1) + (0,) * 12 + (-3, -3, -3, -2, -2, -1),
+            player_bar=0,
+            player_off=2,
+            opponent_bar=0,
+            opponent_off=0,
+        ),
+    ],
+)
+def test_generate_positions_matches_generate_plays(position):
+    for d0 in range(1, 7):
+        for d1 in range(d0, 7):
+            positions = generate_positions(position, (d0, d1))
+            assert len(positions) == len(set(positions))
+            expected = {play.position for play in generate_plays(position, (d0, d1))}
+            assert set(positions) == expected
+    assert generate_positions(position, (0, 0)) == []
+
+
 def test_encode():
     """Tests the encode function"""
     bg = Board(
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from pybg.gnubg.bearoff_cache import BearoffCache, decode_record, encode_record
+from pybg.gnubg.bearoff_database import OS_PATH, _BearoffReader
+from pybg.gnubg.position import Position
+
+pytestmark = pytest.mark.unit
+
+BEAROFF_POSITION = Position(
+    board_points=(2, 2, 2, 3, 3, 3) + (0,) * 12 + (-3, -3, -3, -2, -2, -2),
+    player_bar=0,
+    player_off=0,
+    opponent_bar=0,
+    opponent_off=0,
+)
+
+TWO_SIDED = {
+    "win_prob": 0.75,
+    "gammon_prob": 0.0,
+    "lose_gammon_prob": 0.0,
+    "equity": 0.5,
+    "cubeful_equity": [0.6, 0.55, 0.5],
+}
+
+
+def test_records_are_fixed_size_float32():
+    blob = encode_record(TWO_SIDED)
+    assert len(blob) == 32
+    decoded = decode_record(blob)
+    assert decoded.keys() == TWO_SIDED.keys()
+    np.testing.assert_allclose(decoded["cubeful_equity"], [0.6, 0.55, 0.5], rtol=1e-6)
+    assert "equity" not in decode_record(encode_record({"win_prob": 0.1}))
+
+
+def test_entries_persist_incrementally(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    writer = BearoffCache(path)
+    writer[(3, 7)] = TWO_SIDED
+    assert (3, 7) in writer and (7, 3) not in writer
+
+    # Other connections see entries once flushed, without a full rewrite.
+    reader = BearoffCache(path)
+    assert reader.get((3, 7)) is None
+    writer.flush()
+    assert reader[(3, 7)]["win_prob"] == pytest.approx(0.75)
+    writer.close()
+    reader.close()
+
+
+def test_oldest_entries_are_evicted(tmp_path):
+    cache = BearoffCache(str(tmp_path / "cache.sqlite"), max_entries=10)
+    for i in range(25):
+        cache[(i, 0)] = {"win_prob": i / 25}
+        cache.flush()
+    assert len(cache) == 10
+    assert (14, 0) not in cache and (15, 0) in cache and (24, 0) in cache
+    cache.close()
+
+
+def test_reader_uses_the_persistent_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    reader = _BearoffReader(OS_PATH, BearoffCache(path))
+    result = reader.evaluate_position(BEAROFF_POSITION)
+    reader.cache.close()
+    player_ids, opponent_ids = reader.position_ids([BEAROFF_POSITION])
+    reader.close()
+
+    cached = BearoffCache(path)
+    assert len(cached) == 1
+    value = cached[(int(player_ids[0]), int(opponent_ids[0]))]
+    for field in ("win_prob", "gammon_prob", "lose_gammon_prob", "expected_rolls"):
+        assert value[field] == pytest.approx(result[field], rel=1e-6, abs=1e-9)
+    cached.close()
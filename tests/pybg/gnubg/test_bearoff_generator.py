@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from pybg.gnubg.bearoff_database import OS_PATH, _BearoffReader
+from pybg.gnubg.bearoff_generator import (
+    MAX_ROLLS,
+    generate_one_sided,
+    generate_two_sided,
+    move_table,
+    solve_one_sided,
+    solve_two_sided,
+    successors,
+)
+from pybg.gnubg.bearoff_index import bearoff_board, bearoff_index, n_positions
+
+pytestmark = pytest.mark.unit
+
+SIX_POINT = (0, 0, 0, 0, 0, 1)
+ACE_POINT = (1, 0, 0, 0, 0, 0)
+
+
+def test_successors():
+    assert successors(SIX_POINT, (6, 5)) == [(0,) * 6]
+    assert successors(SIX_POINT, (2, 1)) == [(0, 0, 1, 0, 0, 0)]
+    # The six bears off from the highest point, whichever checker the one moved.
+    assert successors((1, 0, 0, 1, 0, 0), (6, 1)) == [(0,) * 6, (1, 0, 0, 0, 0, 0)]
+    assert (0, 0, 1, 0, 1, 0) in successors((0, 0, 0, 0, 0, 2), (1, 1))
+
+
+def test_move_table_padding_repeats_first_successor():
+    table = move_table(3, 3)
+    assert table.shape[:2] == (n_positions(3, 3), 21)
+    for index in range(len(table)):
+        board = bearoff_board(index, 3, 3)
+        for r, dice in enumerate([(1, 1), (1, 2)]):
+            expected = {bearoff_index(b) for b in successors(board, dice)}
+            assert set(table[index, r]) == expected
+
+
+def test_two_sided_equities():
+    n = n_positions(6, 2)
+    equities = solve_two_sided(6, 2, cubeful=True)
+    six_vs_ace = equities[bearoff_index(SIX_POINT) * n + bearoff_index(ACE_POINT)]
+    # 27 of 36 rolls bear off a lone checker from the six point.
+    np.testing.assert_allclose(six_vs_ace, [0.5, 1.0, 1.0, 0.5])
+    cubeless, owned, centered, opponent_owned = equities.T
+    assert np.all(owned >= centered - 1e-12)
+    assert np.all(centered >= opponent_owned - 1e-12)
+    np.testing.assert_array_equal(solve_two_sided(6, 2, cubeful=False)[:, 0], cubeless)
+
+
+def test_worker_count_does_not_change_results():
+    np.testing.assert_array_equal(
+        solve_two_sided(4, 3, workers=1), solve_two_sided(4, 3, workers=2)
+    )
+
+
+def test_generated_file_round_trips(tmp_path):
+    path = str(tmp_path / "ts.bd")
+    reported = []
+    generate_two_sided(path, 6, 3, progress=lambda done, total: reported.append(done))
+    assert reported[-1] == n_positions(6, 3)
+
+    reader = _BearoffReader(path, {})
+    assert reader.two_sided and reader.cubeful
+    assert (reader.points, reader.chequers) == (6, 3)
+    expected = solve_two_sided(6, 3)
+    n = n_positions(6, 3)
+    ids = np.arange(0, n * n, 7)
+    np.testing.assert_allclose(
+        reader.read_equities(ids // n, ids % n), expected[ids], atol=1 / 32767
+    )
+
+    # Racing both sides' one-sided distributions is near the exact answer.
+    one_sided = _BearoffReader(OS_PATH, {})
+    on_roll, other = ids // n, ids % n
+    live = (on_roll > 0) & (other > 0)
+    np.testing.assert_allclose(
+        reader.win_probabilities(on_roll[live], other[live]),
+        one_sided.win_probabilities(on_roll[live], other[live]),
+        atol=0.03,
+    )
+    reader.close()
+    one_sided.close()
+
+
+def test_one_sided_distributions():
+    n = n_positions(4, 5)
+    distributions = solve_one_sided(4, 5)
+    assert distributions.shape == (n, 2 * MAX_ROLLS)
+    np.testing.assert_allclose(distributions.sum(axis=1), 2.0, atol=1e-5)
+    full = np.array([sum(bearoff_board(i, 4, 5)) == 5 for i in range(n)])
+    np.testing.assert_array_equal(distributions[~full, MAX_ROLLS], 1.0)
+    assert np.all(distributions[full, MAX_ROLLS] == 0.0)
+    # A lone checker on the 4 point bears off in one roll unless it rolls 1-2.
+    lone = distributions[bearoff_index((0, 0, 0, 1))]
+    np.testing.assert_allclose(lone[1:3], [34 / 36, 2 / 36])
+
+    np.testing.assert_array_equal(distributions, solve_one_sided(4, 5, workers=2))
+    with pytest.raises(ValueError):
+        solve_one_sided(4, 5, max_memory=1000)
+
+
+def test_one_sided_matches_gnubg():
+    # Indices are prefix-consistent, so boards of up to 6 checkers share the
+    # shipped database's first entries. Near-ties may be broken differently.
+    n = n_positions(6, 6)
+    distributions = solve_one_sided(6, 6)[:, :MAX_ROLLS]
+    shipped = _BearoffReader(OS_PATH, {})
+    expected = shipped.read_distributions(np.arange(n))[:, :MAX_ROLLS] / 65535.0
+    shipped.close()
+    np.testing.assert_allclose(distributions, expected, atol=0.005)
+    np.testing.assert_allclose(
+        distributions @ np.arange(MAX_ROLLS),
+        expected @ np.arange(MAX_ROLLS),
+        atol=1e-3,
+    )
+
+
+def test_generated_one_sided_file_round_trips(tmp_path):
+    path = str(tmp_path / "os.bd")
+    reported = []
+    generate_one_sided(
+        path, 7, 4, workers=1, progress=lambda done, total: reported.append(done)
+    )
+    assert reported[-1] == n_positions(7, 4)
+
+    reader = _BearoffReader(path, {})
+    assert not reader.two_sided
+    assert (reader.points, reader.chequers) == (7, 4)
+    np.testing.assert_allclose(
+        reader.read_distributions(np.arange(n_positions(7, 4))) / 65535.0,
+        solve_one_sided(7, 4),
+        atol=1 / 65535,
+    )
+    reader.close()
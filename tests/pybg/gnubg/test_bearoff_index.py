@@ -0,0 +1,63 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from pybg.gnubg.bearoff_index import (
+    bearoff_board,
+    bearoff_index,
+    bearoff_indices,
+    n_positions,
+)
+
+pytestmark = pytest.mark.unit
+
+ALL_BOARDS = [b for b in itertools.product(range(16), repeat=6) if sum(b) <= 15]
+
+
+def recursive_index(board):
+    """The original bit-pattern ranking, kept as a reference."""
+    j = len(board) - 1 + sum(board)
+    f_bits = 1 << j
+    for count in board[:-1]:
+        j -= count + 1
+        f_bits |= 1 << j
+
+    def position_f(n, r):
+        if n == r:
+            return 0
+        if (f_bits >> (n - 1)) & 1:
+            return math.comb(n - 1, r) + position_f(n - 1, r - 1)
+        return position_f(n - 1, r)
+
+    return position_f(15 + len(board), len(board))
+
+
+def test_index_is_a_bijection():
+    indices = [bearoff_index(board) for board in ALL_BOARDS]
+    assert len(ALL_BOARDS) == n_positions(6, 15) == 54264
+    assert sorted(indices) == list(range(len(ALL_BOARDS)))
+
+
+def test_index_matches_recursive_ranking():
+    for board in ALL_BOARDS[::97]:
+        assert bearoff_index(board) == recursive_index(board)
+
+
+def test_batch_matches_single():
+    boards = np.array(ALL_BOARDS)
+    expected = [bearoff_index(board) for board in ALL_BOARDS]
+    np.testing.assert_array_equal(bearoff_indices(boards), expected)
+
+
+def test_board_round_trip():
+    assert bearoff_board(0) == (0,) * 6
+    for board in ALL_BOARDS[::101]:
+        assert bearoff_board(bearoff_index(board)) == board
+
+
+def test_other_board_sizes():
+    boards = [b for b in itertools.product(range(4), repeat=4) if sum(b) <= 3]
+    assert sorted(bearoff_index(b) for b in boards) == list(range(n_positions(4, 3)))
+    assert all(bearoff_board(bearoff_index(b), 4, 3) == b for b in boards)
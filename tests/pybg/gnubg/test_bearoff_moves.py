@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import generate_plays
+from pybg.gnubg.bearoff_database import _BearoffReader
+from pybg.gnubg.bearoff_generator import generate_two_sided, successors
+from pybg.gnubg.bearoff_index import bearoff_board, bearoff_index, n_positions
+from pybg.gnubg import bearoff_moves
+from pybg.gnubg.bearoff_moves import MoveTable, generate_move_table, load_move_table
+from pybg.gnubg.position import Position
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+pytestmark = pytest.mark.unit
+
+POSITION = Position(
+    board_points=(1, 1, 1, 0, 1, 0) + (0,) * 12 + (0, -1, -1, -1, 0, -1),
+    player_bar=0,
+    player_off=11,
+    opponent_bar=0,
+    opponent_off=11,
+)
+
+
+@pytest.fixture(scope="module")
+def two_sided(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("bearoff") / "ts.bd")
+    return generate_two_sided(path, 6, 4, workers=1)
+
+
+def test_table_lists_every_successor():
+    table = MoveTable.build(4, 4)
+    for index in range(n_positions(4, 4)):
+        board = bearoff_board(index, 4, 4)
+        for dice, _ in WEIGHTED_ROLLS:
+            expected = [bearoff_index(b) for b in successors(board, dice)]
+            assert sorted(table.successors(index, dice)) == sorted(expected)
+            assert set(table.successors(index, dice[::-1])) == set(expected)
+
+
+def test_table_is_only_built_on_request(tmp_path):
+    path = str(tmp_path / "moves.npz")
+    assert load_move_table(5, 3, path) is None
+    built = generate_move_table(5, 3, path, workers=1)
+    loaded = load_move_table(5, 3, path)
+    np.testing.assert_array_equal(built.counts, loaded.counts)
+    np.testing.assert_array_equal(built.flat, loaded.flat)
+    np.testing.assert_array_equal(built.starts, loaded.starts)
+
+
+def test_reader_does_not_build_a_missing_table(two_sided, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        bearoff_moves, "move_table_path", lambda *shape: str(tmp_path / "none.npz")
+    )
+    bearoff_moves.move_table_for.cache_clear()
+    reader = _BearoffReader(two_sided, {})
+    try:
+        assert reader.moves is None
+        assert not (tmp_path / "none.npz").exists()
+    finally:
+        reader.close()
+        bearoff_moves.move_table_for.cache_clear()
+
+
+@pytest.mark.parametrize("with_table", [True, False])
+def test_plays_and_successors_match_move_generation(two_sided, with_table):
+    reader = _BearoffReader(two_sided, {})
+    reader._moves = MoveTable.build(6, 4) if with_table else None
+    reader._moves_loaded = True
+    for dice, _ in WEIGHTED_ROLLS:
+        expected = {play.position for play in generate_plays(POSITION, dice)}
+        plays = reader.plays(POSITION, dice)
+        assert {play.position for play in plays} == expected
+        assert set(reader.successor_positions(POSITION, dice)) == expected
+        for play in plays:
+            position = POSITION
+            for move in play.moves:
+                position = position.apply_move(move.source, move.destination)
+            assert position == play.position
+    assert reader.plays(POSITION.swap_players(), (6, 5)) is not None
+    assert reader.plays(Position.decode("4HPwATDgc/ABMA"), (6, 5)) is None
+    assert reader.successor_positions(Position.decode("4HPwATDgc/ABMA"), (6, 5)) is None
+    reader.close()
@@ -0,0 +1,187 @@
+import mmap
+
+import numpy as np
+import pytest
+
+from pybg.core.board import Board, generate_plays
+from pybg.gnubg.bearoff_database import OS_PATH, BearoffDatabase, _BearoffReader
+from pybg.gnubg.bearoff_generator import generate_one_sided, generate_two_sided
+from pybg.gnubg.position import Position
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+pytestmark = pytest.mark.unit
+
+BEAROFF_POSITION = Position(
+    board_points=(2, 2, 2, 3, 3, 3) + (0,) * 12 + (-3, -3, -3, -2, -2, -2),
+    player_bar=0,
+    player_off=0,
+    opponent_bar=0,
+    opponent_off=0,
+)
+
+
+@pytest.fixture
+def reader():
+    reader = _BearoffReader(OS_PATH, {})
+    yield reader
+    reader.close()
+
+
+def test_reader_maps_the_file(reader):
+    assert isinstance(reader.data, mmap.mmap)
+    assert not reader.two_sided
+    assert (reader.points, reader.chequers) == (6, 15)
+
+
+def test_readers_agree(reader):
+    other = _BearoffReader(OS_PATH, {})
+    assert other.evaluate_position(BEAROFF_POSITION) == reader.evaluate_position(
+        BEAROFF_POSITION
+    )
+    other.close()
+    assert other.data is None
+
+
+def test_symmetric_position_favours_player_on_roll(reader):
+    result = reader.evaluate_position(BEAROFF_POSITION)
+    assert 0.5 < result["win_prob"] < 1.0
+    assert 7.0 < result["expected_rolls"] < 9.0
+
+
+def random_bearoff_positions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = []
+    for _ in range(n):
+        player = np.bincount(rng.integers(0, 6, rng.integers(1, 16)), minlength=6)
+        opponent = np.bincount(rng.integers(0, 6, rng.integers(1, 16)), minlength=6)
+        positions.append(
+            Position(
+                board_points=tuple(int(x) for x in player)
+                + (0,) * 12
+                + tuple(-int(x) for x in opponent[::-1]),
+                player_bar=0,
+                player_off=15 - int(player.sum()),
+                opponent_bar=0,
+                opponent_off=15 - int(opponent.sum()),
+            )
+        )
+    return positions
+
+
+def test_batch_decoding_matches_single(reader):
+    ids = np.arange(0, 54264, 37)
+    batch = reader.read_distributions(ids)
+    for row, pos_id in zip(batch, ids):
+        np.testing.assert_array_equal(row, reader.read_distribution(int(pos_id)))
+
+
+def test_cumulative_win_probability_matches_double_loop(reader):
+    rng = np.random.default_rng(1)
+    p, q = rng.random((2, 32))
+    expected = sum(p[i] * q[j] for i in range(32) for j in range(i, 32))
+    assert reader.win_probability(p / 40, q / 40) == pytest.approx(expected / 1600)
+
+
+def test_evaluate_positions_matches_single(reader):
+    positions = random_bearoff_positions(50)
+    batch = reader.evaluate_positions(positions)
+    for i, position in enumerate(positions):
+        single = reader.evaluate_position(position)
+        assert batch["win_prob"][i] == pytest.approx(single["win_prob"])
+        assert batch["expected_rolls"][i] == pytest.approx(single["expected_rolls"])
+
+
+def test_gammons_come_from_the_gammon_distributions(reader):
+    lone_ace = Position(
+        board_points=(1,) + (0,) * 17 + (-15,) + (0,) * 5,
+        player_bar=0,
+        player_off=14,
+        opponent_bar=0,
+        opponent_off=0,
+    )
+    result = reader.evaluate_position(lone_ace)
+    assert result["win_prob"] == pytest.approx(1.0)
+    assert result["gammon_prob"] == pytest.approx(1.0)
+
+    # The full board is gammoned unless its first roll bears a checker off.
+    result = reader.evaluate_position(lone_ace.swap_players())
+    assert result["win_prob"] == pytest.approx(0.0)
+    assert result["lose_gammon_prob"] == pytest.approx(1.0 - 30947 / 65535)
+
+    positions = random_bearoff_positions(50, seed=3)
+    batch = reader.evaluate_positions(positions)
+    for i, position in enumerate(positions):
+        single = reader.evaluate_position(position)
+        assert batch["gammon_prob"][i] == pytest.approx(single["gammon_prob"])
+        assert batch["lose_gammon_prob"][i] == pytest.approx(single["lose_gammon_prob"])
+        if position.opponent_off:
+            assert single["gammon_prob"] == 0.0
+
+
+def _brute_force_reply_equity(reader, position, checkers):
+    """
+    1-ply equity for the side that just moved, via full move generation.
+    """
+    total = 0.0
+    for dice, weight in WEIGHTED_ROLLS:
+        worst = min(
+            reader.evaluate_ids(*reader.position_ids([reply.position.swap_players()]))[
+                "equity"
+            ][0]
+            for reply in generate_plays(
+                position.swap_players(), dice, checkers=checkers
+            )
+        )
+        total += weight / 36 * worst
+    return total
+
+
+def test_replies_match_exact_two_sided_equities(tmp_path):
+    path = generate_two_sided(str(tmp_path / "ts.bd"), 6, 4, workers=1)
+    reader = _BearoffReader(path, {})
+    position = Position(
+        board_points=(1, 1, 1, 0, 1, 0) + (0,) * 12 + (0, -1, -1, -1, 0, -1),
+        player_bar=0,
+        player_off=11,
+        opponent_bar=0,
+        opponent_off=11,
+    )
+    plays = generate_plays(position, (4, 2))
+    player_ids, opponent_ids = reader.position_ids([p.position for p in plays])
+    result = reader.evaluate_replies(player_ids, int(opponent_ids[0]))
+    # One ply over exact equities is the exact equity of the opponent's turn.
+    exact = -reader.read_equities(opponent_ids, player_ids)[:, 0]
+    np.testing.assert_allclose(result["equity"], exact, atol=1e-4)
+
+    board = Board(position_id=position.encode())
+    board.match.dice = (4, 2)
+    evaluations = reader.complete_eval(board)
+    assert evaluations[0][2] == pytest.approx(exact.max(), abs=1e-4)
+    reader.close()
+
+
+def test_replies_match_brute_force_with_gammons(tmp_path):
+    path = generate_one_sided(str(tmp_path / "os.bd"), 6, 4, workers=1)
+    reader = _BearoffReader(path, {})
+    position = Position(
+        board_points=(0, 0, 0, 0, 2, 2) + (0,) * 14 + (-1, -1, 0, -2),
+        player_bar=0,
+        player_off=0,
+        opponent_bar=0,
+        opponent_off=0,
+    )
+    # Four checkers a side, so a full four-checker board can be gammoned.
+    plays = generate_plays(position, (2, 1), checkers=4)
+    player_ids, opponent_ids = reader.position_ids([p.position for p in plays])
+    result = reader.evaluate_replies(player_ids, int(opponent_ids[0]))
+    expected = [_brute_force_reply_equity(reader, play.position, 4) for play in plays]
+    np.testing.assert_allclose(result["equity"], expected)
+    assert np.any(result["lose_gammon_prob"] > 0)
+    reader.close()
+
+
+def test_database_does_not_generate_a_missing_two_sided_file(tmp_path):
+    missing = tmp_path / "ts.bd"
+    with pytest.raises(FileNotFoundError, match="pybg.gnubg.bearoff_generator"):
+        BearoffDatabase(OS_PATH, str(missing), str(tmp_path / "cache"))
+    assert not missing.exists()
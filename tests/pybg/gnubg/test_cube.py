@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from pybg.gnubg.cube import (
+    CENTERED,
+    OPPONENT_OWNED,
+    OWNED,
+    cubeful_equity,
+    cubeful_mwc,
+    cubeless_equity,
+    cubeless_mwc,
+    generate_met,
+    load_met,
+    match_equity,
+    mwc_to_equity,
+)
+
+pytestmark = pytest.mark.unit
+
+PROBS = np.array(
+    [
+        [0.5, 0.0, 0.0, 0.0, 0.0],
+        [0.7, 0.2, 0.01, 0.05, 0.0],
+        [0.9, 0.3, 0.0, 0.0, 0.0],
+        [0.2, 0.0, 0.0, 0.1, 0.0],
+    ]
+)
+
+
+def test_met_is_consistent():
+    met, post_crawford = generate_met()
+    assert met.shape == (26, 26)
+    np.testing.assert_allclose(met[1:, 1:] + met[1:, 1:].T, 1.0)
+    assert met[1, 1] == 0.5
+    assert met[1, 2] == pytest.approx(0.685)
+    assert post_crawford[1] == 0.5
+    # Further behind is always worse.
+    assert np.all(np.diff(met[1:, 1:], axis=0) < 0)
+    assert np.all(np.diff(post_crawford[1:]) <= 0)
+
+
+def test_met_is_cached(tmp_path):
+    path = str(tmp_path / "met.npz")
+    met, _ = load_met(path)
+    assert (tmp_path / "met.npz").exists()
+    load_met.cache_clear()
+    cached, _ = load_met(path)
+    np.testing.assert_array_equal(met, cached)
+    load_met.cache_clear()
+
+
+def test_match_equity_edges():
+    assert match_equity(0, 3) == 1.0
+    assert match_equity(3, 0) == 0.0
+    assert match_equity(1, 3, post_crawford=True) == pytest.approx(
+        1.0 - match_equity(3, 1, post_crawford=True)
+    )
+
+
+def test_cubeful_equity_is_vectorized():
+    batch = cubeful_equity(PROBS)
+    single = [cubeful_equity(row) for row in PROBS]
+    np.testing.assert_allclose(batch, single)
+    assert batch[0] == pytest.approx(0.0)
+
+
+def test_cube_ownership_ordering():
+    owned = cubeful_equity(PROBS, OWNED)
+    centered = cubeful_equity(PROBS, CENTERED)
+    opponent = cubeful_equity(PROBS, OPPONENT_OWNED)
+    assert np.all(owned >= centered - 1e-12)
+    assert np.all(centered >= opponent - 1e-12)
+
+
+def test_dead_cube_is_cubeless():
+    np.testing.assert_allclose(
+        cubeful_equity(PROBS, cube_efficiency=0.0), cubeless_equity(PROBS)
+    )
+    np.testing.assert_allclose(
+        cubeful_mwc(PROBS, 5, 5, cube_efficiency=0.0), cubeless_mwc(PROBS, 5, 5)
+    )
+
+
+def test_crawford_game_has_no_cube():
+    np.testing.assert_allclose(
+        cubeful_mwc(PROBS, 1, 4, crawford=True), cubeless_mwc(PROBS, 1, 4)
+    )
+
+
+def test_cubeless_mwc_at_even_score():
+    mwc = cubeless_mwc(PROBS, 5, 5)
+    assert mwc[0] == pytest.approx(0.5)
+    assert mwc[2] > mwc[1] > mwc[0] > mwc[3]
+    assert mwc_to_equity(0.5, 5, 5) == pytest.approx(0.0)
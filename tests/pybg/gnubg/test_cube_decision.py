@@ -0,0 +1,87 @@
+import pytest
+
+from pybg.core.player import PlayerType
+from pybg.gnubg.cube import CENTERED, OPPONENT_OWNED, OWNED
+from pybg.gnubg.cube_decision import (
+    CubeDecision,
+    CubeDecisionEngine,
+    CubeState,
+    pubeval_probabilities,
+)
+from pybg.gnubg.match import STARTING_MATCH_ID, GameState, Match
+from pybg.gnubg.position import Position
+
+pytestmark = pytest.mark.unit
+
+STARTING_POSITION = Position.decode("4HPwATDgc/ABMA")
+# Two checkers left against a full home board: a clear double and pass.
+WINNING_POSITION = Position(
+    board_points=(0, 2) + (0,) * 16 + (-3, -3, -3, -2, -2, -2),
+    player_bar=0,
+    player_off=13,
+    opponent_bar=0,
+    opponent_off=0,
+)
+
+
+def test_no_double_at_the_start():
+    decision = CubeDecisionEngine().evaluate(STARTING_POSITION, CubeState())
+    assert not decision.should_double
+    assert decision.should_take
+
+
+def test_double_pass_when_far_ahead():
+    decision = CubeDecisionEngine().evaluate(WINNING_POSITION, CubeState())
+    assert decision.should_double
+    assert not decision.should_take
+    assert decision.double_equity == decision.double_pass == 1.0
+
+
+def test_match_play_and_crawford():
+    engine = CubeDecisionEngine()
+    decision = engine.evaluate(WINNING_POSITION, CubeState(away=5, opponent_away=5))
+    assert decision.should_double
+    crawford = engine.evaluate(
+        WINNING_POSITION, CubeState(away=4, opponent_away=1, crawford=True)
+    )
+    assert not crawford.should_double
+
+
+def test_decisions_are_cached():
+    calls = []
+
+    def counting(positions):
+        calls.append(len(positions))
+        return pubeval_probabilities(positions)
+
+    engine = CubeDecisionEngine(probabilities=counting)
+    first = engine.evaluate(STARTING_POSITION, CubeState())
+    second = engine.evaluate(STARTING_POSITION, CubeState())
+    assert first is second
+    # One batched evaluation of the 21 replies to each roll; two of the
+    # opening rolls are played to the same position and share theirs.
+    assert calls == [20 * 21]
+
+
+def test_cube_state_from_match():
+    match = Match.decode(STARTING_MATCH_ID)
+    match.length = 7
+    match.player_0_score = 2
+    match.player = PlayerType.ZERO
+    match.cube_holder = PlayerType.CENTERED
+    assert CubeState.from_match(match) == CubeState(1, CENTERED, 5, 7, False)
+
+    match.cube_value = 4
+    match.cube_holder = PlayerType.ZERO
+    match.game_state = GameState.DOUBLED
+    assert CubeState.from_match(match) == CubeState(2, OWNED, 5, 7, False)
+
+    match.cube_holder = PlayerType.ONE
+    assert CubeState.from_match(match).ownership == OPPONENT_OWNED
+
+
+def test_decision_properties():
+    decision = CubeDecision(no_double=0.5, double_take=0.8, double_pass=1.0)
+    assert decision.should_double and decision.should_take
+    assert not CubeDecision(0.5, 0.8, 1.0, available=False).should_double
+    assert "double/take +0.800" in str(decision)
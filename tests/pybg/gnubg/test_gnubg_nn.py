@@ -1,7 +1,7 @@
 # test_gnubg_nn.py
 import pytest
 import numpy as np
-from pybg.core.board import Board
+from pybg.core.board import Board, generate_plays
 from pybg.gnubg.neural_net import GnubgEvaluator, GnubgNetwork, encode_board
 
 pytestmark = pytest.mark.unit
@@ -58,3 +58,22 @@ def test_evaluate_position_keys(evaluator):
         "losebackgammon",
     }
     assert expected_keys.issubset(result.keys())
+
+
+def test_evaluate_batch_matches_evaluate(evaluator):
+    board = Board(position_id="4HPwATDgc/ABMA")
+    positions = [p.position for p in generate_plays(board.position, (6, 5))]
+    batch = evaluator.evaluate_batch(positions)
+    assert batch.shape == (len(positions), 5)
+    for row, position in zip(batch, positions):
+        expected = evaluator.evaluate(position)
+        np.testing.assert_allclose(
+            row,
+            [
+                expected["win"],
+                expected["wingammon"],
+                expected["winbackgammon"],
+                expected["losegammon"],
+                expected["losebackgammon"],
+            ],
+        )
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import Board, generate_plays
+from pybg.gnubg import hypergammon
+from pybg.gnubg.hypergammon import (
+    BAR,
+    HypergammonTable,
+    PerfectPlaySearch,
+    generate_table,
+    n_sides,
+    perfect_play_search,
+    side_layouts,
+    solve,
+)
+from pybg.gnubg.position import Position
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+pytestmark = pytest.mark.unit
+
+
+def position(player, opponent, checkers):
+    """
+    A position from each side's checker locations, counted from its own ace
+    point (25 is the bar); checkers not listed are off.
+    """
+    points = [0] * 24
+    for point in player:
+        if point < BAR:
+            points[point - 1] += 1
+    for point in opponent:
+        if point < BAR:
+            points[24 - point] -= 1
+    return Position(
+        board_points=tuple(points),
+        player_bar=player.count(BAR),
+        player_off=checkers - len(player),
+        opponent_bar=opponent.count(BAR),
+        opponent_off=checkers - len(opponent),
+    )
+
+
+@pytest.fixture(scope="module")
+def two_checker_table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("hypergammon") / "hypergammon_2.npy")
+    return HypergammonTable(generate_table(path, checkers=2, workers=1))
+
+
+def test_side_layouts_rank_every_multiset():
+    layouts, ranks = side_layouts(2)
+    assert len(layouts) == n_sides(2) == 351
+    assert (np.diff(layouts, axis=1) >= 0).all()
+    np.testing.assert_array_equal(ranks[tuple(layouts.T)], np.arange(len(layouts)))
+
+
+def test_one_checker_bearoffs_score_gammons_and_backgammons():
+    equities = solve(checkers=1)
+    m = n_sides(1)
+    # Any roll bears off the last checker from the ace point.
+    assert equities[1 * m + 10] == pytest.approx(2.0)
+    assert equities[1 * m + 20] == pytest.approx(3.0)
+    assert equities[1 * m + BAR] == pytest.approx(3.0)
+
+
+def test_pool_matches_inline(monkeypatch):
+    inline = solve(checkers=1)
+    monkeypatch.setattr(hypergammon, "MIN_POSITIONS_PER_TASK", 64)
+    np.testing.assert_allclose(solve(checkers=1, workers=2), inline, atol=1e-6)
+
+
+def test_equities_agree_with_generated_plays(two_checker_table):
+    """
+    Each position's equity is the roll-weighted best play found by the
+    board's own move generator.
+    """
+    table = two_checker_table
+    layouts, _ = side_layouts(2)
+    rng = np.random.default_rng(0)
+    checked = 0
+    while checked < 50:
+        player, opponent = (
+            [int(x) for x in layouts[i] if x > 0]
+            for i in rng.integers(1, len(layouts), 2)
+        )
+        shared = {p for p in player if p < BAR} & {BAR - q for q in opponent}
+        if shared:
+            continue
+        pos = position(player, opponent, 2)
+        expected = 0.0
+        for dice, weight in WEIGHTED_ROLLS:
+            plays = generate_plays(pos, dice, checkers=2)
+            best = (
+                max(table.play_equity(play) for play in plays)
+                if plays
+                else -table.equity(pos.swap_players())
+            )
+            expected += weight / 36.0 * best
+        assert table.equity(pos) == pytest.approx(expected, abs=1e-4)
+        checked += 1
+
+
+def test_perfect_play_search_ranks_by_exact_equity(two_checker_table):
+    pos = position([8, 6], [22, BAR], 2)
+    plays = generate_plays(pos, (5, 3), checkers=2)
+    assert len(plays) > 1
+    result = PerfectPlaySearch(two_checker_table).search(plays, time_ms=1)
+
+    scores = [score for score, _ in result.ranked]
+    assert len(result.ranked) == len(plays)
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == max(two_checker_table.play_equity(p) for p in plays)
+    assert result.best_play is result.ranked[0][1]
+
+
+def test_table_rejects_positions_with_too_many_checkers(two_checker_table):
+    with pytest.raises(ValueError):
+        two_checker_table.equity(Board().position)
+
+
+def test_perfect_play_only_for_hypergammon():
+    assert perfect_play_search(Board()) is None
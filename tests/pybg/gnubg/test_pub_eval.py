@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pytest
+
+from pybg.core.board import Board, generate_plays
+from pybg.gnubg.pub_eval import (
+    IncrementalPubeval,
+    pubeval,
+    pubeval_batch,
+    pubeval_features,
+    pubeval_races,
+    pubeval_ranking,
+)
+from pybg.gnubg.rollout import PubevalPolicy, is_race
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def turns():
+    """
+    (position, plays) for a few random games' worth of rolls.
+    """
+    rng = random.Random(7)
+    position = Board().position
+    found = []
+    while len(found) < 200:
+        plays = generate_plays(position, (rng.randint(1, 6), rng.randint(1, 6)))
+        if not plays:
+            position = position.swap_players()
+            continue
+        found.append((position, plays))
+        position = rng.choice(plays).position.swap_players()
+        if position.opponent_off == 15:
+            position = Board().position
+    return found
+
+
+@pytest.fixture(scope="module")
+def positions(turns):
+    return [play.position for _, plays in turns for play in plays][:300]
+
+
+def test_batch_matches_scalar_pubeval(positions):
+    boards = np.array([p.to_array() for p in positions])
+    for race in (False, True):
+        expected = [pubeval(race, b) for b in boards.tolist()]
+        np.testing.assert_allclose(pubeval_batch(boards, race), expected)
+
+
+def test_races_match_the_scalar_test(positions):
+    boards = np.array([p.to_array() for p in positions])
+    np.testing.assert_array_equal(
+        pubeval_races(boards), [is_race(p) for p in positions]
+    )
+    expected = [pubeval(is_race(p), p.to_array()) for p in positions]
+    np.testing.assert_allclose(pubeval_batch(boards), expected)
+
+
+def test_features_are_one_hot_per_point():
+    board = np.array([Board().position.to_array()])
+    x = pubeval_features(board)
+    assert x.shape == (1, 122)
+    # The opening has 2, 5, 3 and 5 checkers on its four points.
+    assert x[0, :120].reshape(24, 5)[:, 2].sum() == 4
+    assert x[0, :120].reshape(24, 5)[:, 3].sum() == 1
+
+
+def test_ranking_is_best_first(positions):
+    boards = np.array([p.to_array() for p in positions[:40]])
+    order, scores = pubeval_ranking(boards)
+    assert sorted(order.tolist()) == list(range(40))
+    assert (np.diff(scores[order]) <= 0).all()
+
+
+def test_incremental_scores_match_full_pubeval(turns):
+    for position, plays in turns:
+        scorer = IncrementalPubeval(position)
+        for play in plays:
+            expected = pubeval(is_race(play.position), play.position.to_array())
+            assert scorer.score(play.moves) == pytest.approx(expected, abs=1e-9)
+
+
+def test_policy_picks_the_same_play_either_way(turns):
+    policy = PubevalPolicy()
+    for position, plays in turns:
+        assert policy(plays, position) is policy(plays)
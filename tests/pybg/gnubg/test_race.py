@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import Board
+from pybg.gnubg.bearoff_database import OS_PATH, _BearoffReader
+from pybg.gnubg.eval import Eval
+from pybg.gnubg.position import Position, PositionClass
+from pybg.gnubg.race import (
+    MAX_PIPS,
+    effective_pip_counts,
+    evaluate_race,
+    race_probabilities,
+    turn_table,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def race(player, opponent, player_off=0, opponent_off=0):
+    """
+    A race position from {point: checkers} for each side, points counted
+    from each side's own ace point.
+    """
+    points = [0] * 24
+    for point, count in player.items():
+        points[point - 1] += count
+    for point, count in opponent.items():
+        points[24 - point] -= count
+    return Position(
+        board_points=tuple(points),
+        player_bar=0,
+        player_off=player_off,
+        opponent_bar=0,
+        opponent_off=opponent_off,
+    )
+
+
+EVEN = {6: 4, 7: 3, 8: 3, 9: 3, 10: 2}
+
+
+def test_turn_table_rows_are_distributions():
+    table = turn_table()
+    assert table.shape[0] == MAX_PIPS + 1
+    np.testing.assert_allclose(table.sum(axis=1), 1.0)
+    assert table[0, 0] == 1.0
+    # Every roll moves at least three pips.
+    assert table[3, 1] == pytest.approx(1.0)
+
+
+def test_home_boards_are_exact():
+    positions = [
+        race({1: 2, 3: 4, 5: 3}, {2: 5, 6: 4}),
+        race({6: 15}, {1: 1}, opponent_off=14),
+    ]
+    reader = _BearoffReader(OS_PATH, {})
+    expected = reader.evaluate_positions(positions)
+    reader.close()
+    probs = race_probabilities(positions)
+    np.testing.assert_allclose(probs[:, 0], expected["win_prob"], atol=1e-12)
+    np.testing.assert_allclose(probs[:, 1], expected["gammon_prob"], atol=1e-12)
+    np.testing.assert_allclose(probs[:, 3], expected["lose_gammon_prob"], atol=1e-12)
+
+
+def test_long_races():
+    even = race(EVEN, EVEN)
+    assert even.classify() == PositionClass.RACE
+    ahead = race({**EVEN, 10: 0, 6: 6}, EVEN)
+    behind = race(EVEN, {**EVEN, 10: 0, 6: 6})
+    win = race_probabilities([even, ahead, behind])[:, 0]
+    # The side on roll is a favourite in an even race, more so when ahead.
+    assert 0.5 < win[0] < 0.7
+    assert win[2] < win[0] < win[1]
+
+    epc = effective_pip_counts(np.array([[0] * 5 + [4, 3, 3, 3, 2] + [0] * 14]))
+    pips = 6 * 4 + 7 * 3 + 8 * 3 + 9 * 3 + 10 * 2
+    assert pips < epc[0] < pips + 20
+
+    # A full board far from home can be gammoned by a side about to finish.
+    probs = race_probabilities([race({1: 2}, {12: 15}, player_off=13)])[0]
+    assert probs[0] == pytest.approx(1.0)
+    assert probs[1] == pytest.approx(1.0)
+
+
+def test_eval_uses_race_evaluator():
+    position = race(EVEN, {**EVEN, 10: 0, 6: 6})
+    result = Eval(None).evaluate(Board(position_id=position.encode()))
+    assert result == pytest.approx(evaluate_race(position))
+    assert result["win"] == pytest.approx(race_probabilities([position])[0, 0])
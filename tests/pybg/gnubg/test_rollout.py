@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import generate_plays
+from pybg.gnubg.position import Position
+from pybg.gnubg.rollout import (
+    EQUITY,
+    WIN,
+    RolloutEngine,
+    RolloutStats,
+    invert_result,
+    is_bearoff,
+    is_race,
+    pubeval_win_probability,
+)
+from pybg.gnubg.search import WEIGHTED_ROLLS
+
+pytestmark = pytest.mark.unit
+
+STARTING_POSITION = Position.decode("4HPwATDgc/ABMA")
+BEAROFF_POSITION = Position(
+    board_points=(2, 2, 2, 3, 3, 3) + (0,) * 12 + (-3, -3, -3, -2, -2, -2),
+    player_bar=0,
+    player_off=0,
+    opponent_bar=0,
+    opponent_off=0,
+)
+
+
+def test_position_predicates():
+    assert not is_race(STARTING_POSITION)
+    assert not is_bearoff(STARTING_POSITION)
+    assert is_race(BEAROFF_POSITION)
+    assert is_bearoff(BEAROFF_POSITION)
+
+
+def test_trials_are_deterministic_per_seed():
+    engine = RolloutEngine(seed=7, truncate_bearoff=False)
+    first = engine.play_trial(STARTING_POSITION, 3)
+    second = engine.play_trial(STARTING_POSITION, 3)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_trial_result_is_consistent():
+    engine = RolloutEngine(seed=1, truncate_bearoff=False)
+    for trial in range(5):
+        result = engine.play_trial(STARTING_POSITION, trial)
+        assert result[WIN] in (0.0, 1.0)
+        assert abs(result[EQUITY]) in (1.0, 2.0, 3.0)
+
+
+def test_bearoff_truncation_uses_database():
+    engine = RolloutEngine(seed=1)
+    stats = engine.rollout(BEAROFF_POSITION, 10)
+    win = engine.bearoff.evaluate_position(BEAROFF_POSITION)["win_prob"]
+    assert stats.mean[WIN] == pytest.approx(win)
+    assert stats.stderr[WIN] == pytest.approx(0.0)
+    assert engine.bearoff.cache is None
+
+
+def test_variance_reduction_with_truncation():
+    engine = RolloutEngine(seed=1, variance_reduction=True, truncate_at=2)
+    stats = engine.rollout(STARTING_POSITION, 4)
+    assert stats.trials == 4
+    assert 0.0 < stats.mean[WIN] < 1.0
+
+
+@pytest.mark.parametrize("position", [STARTING_POSITION, BEAROFF_POSITION])
+def test_roll_values_match_scoring_each_play(position):
+    engine = RolloutEngine(seed=1)
+    values = engine._roll_values(position, engine.luck_batch_evaluator, False)
+    expected = [
+        max(
+            pubeval_win_probability(play.position)
+            for play in generate_plays(position, roll)
+        )
+        for roll, _ in WEIGHTED_ROLLS
+    ]
+    np.testing.assert_allclose(values, expected)
+
+
+def test_cached_roll_values_do_not_change_trials():
+    kwargs = dict(seed=2, variance_reduction=True, stratify=1, truncate_at=3)
+    engine = RolloutEngine(**kwargs)
+    reused = [engine.play_trial(STARTING_POSITION, trial) for trial in range(4)]
+    fresh = [
+        RolloutEngine(**kwargs).play_trial(STARTING_POSITION, trial)
+        for trial in range(4)
+    ]
+    assert engine._roll_values_cache
+    np.testing.assert_array_equal(reused, fresh)
+
+
+def test_progress_callback():
+    seen = []
+    engine = RolloutEngine(seed=1, truncate_at=2)
+    engine.rollout(
+        STARTING_POSITION, 4, progress=lambda s: seen.append(s.trials), progress_every=2
+    )
+    assert seen == [2, 4]
+
+
+def test_stats_running_mean_and_stderr():
+    stats = RolloutStats()
+    samples = np.random.default_rng(0).random((50, 6))
+    for sample in samples:
+        stats.update(sample)
+    np.testing.assert_allclose(stats.mean, samples.mean(axis=0))
+    np.testing.assert_allclose(
+        stats.stderr, samples.std(axis=0, ddof=1) / np.sqrt(len(samples))
+    )
+
+
+def test_invert_result():
+    result = np.array([0.6, 0.2, 0.05, 0.1, 0.01, 0.34])
+    inverted = invert_result(result)
+    np.testing.assert_allclose(inverted, [0.4, 0.1, 0.01, 0.2, 0.05, -0.34])
+    np.testing.assert_allclose(invert_result(inverted), result)
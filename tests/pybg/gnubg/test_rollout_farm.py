@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from pybg.gnubg.position import Position
+from pybg.gnubg.rollout import ALL_ROLLS, RolloutEngine, stratified_roll
+from pybg.gnubg.rollout_farm import RolloutFarm
+
+pytestmark = pytest.mark.unit
+
+STARTING_POSITION = Position.decode("4HPwATDgc/ABMA")
+
+
+def test_stratified_rolls_cover_every_roll():
+    first = {stratified_roll(3, trial, 0) for trial in range(36)}
+    assert first == set(ALL_ROLLS)
+    # The second roll cycles once per block of 36 trials.
+    second = {stratified_roll(3, trial, 1) for trial in range(0, 36 * 36, 36)}
+    assert second == set(ALL_ROLLS)
+
+
+def test_farm_matches_single_engine():
+    kwargs = dict(seed=5, truncate_at=2, stratify=1)
+    stats = RolloutFarm(workers=1, chunk_size=3, **kwargs).run(STARTING_POSITION, 8)
+    expected = RolloutEngine(**kwargs).rollout(STARTING_POSITION, 8)
+    np.testing.assert_array_equal(stats.mean, expected.mean)
+
+
+def test_farm_is_identical_across_worker_counts():
+    kwargs = dict(seed=5, truncate_at=2, stratify=1)
+    one = RolloutFarm(workers=1, chunk_size=3, **kwargs).run(STARTING_POSITION, 8)
+    two = RolloutFarm(workers=2, chunk_size=3, **kwargs).run(STARTING_POSITION, 8)
+    np.testing.assert_array_equal(one.mean, two.mean)
+    np.testing.assert_array_equal(one.m2, two.m2)
+
+
+def test_farm_resumes_from_checkpoint(tmp_path):
+    path = str(tmp_path / "rollout.npz")
+    farm = RolloutFarm(
+        workers=1, chunk_size=2, checkpoint_path=path, seed=5, truncate_at=2
+    )
+    full = farm.run(STARTING_POSITION, 6)
+
+    # Forget the last chunk, as if the run had been interrupted.
+    with np.load(path) as checkpoint:
+        key, results, done = (
+            checkpoint["key"],
+            checkpoint["results"],
+            checkpoint["done"],
+        )
+    done[-1] = False
+    results[4:] = 0.0
+    np.savez(path, key=key, results=results, done=done)
+
+    ran = []
+    resumed = farm.run(STARTING_POSITION, 6, progress=lambda s: ran.append(s.trials))
+    assert ran == [6]
+    np.testing.assert_array_equal(resumed.mean, full.mean)
+
+
+def test_checkpoint_for_other_rollout_is_ignored(tmp_path):
+    path = str(tmp_path / "rollout.npz")
+    RolloutFarm(
+        workers=1, chunk_size=2, checkpoint_path=path, seed=5, truncate_at=2
+    ).run(STARTING_POSITION, 4)
+    stats = RolloutFarm(
+        workers=1, chunk_size=2, checkpoint_path=path, seed=6, truncate_at=2
+    ).run(STARTING_POSITION, 4)
+    expected = RolloutEngine(seed=6, truncate_at=2).rollout(STARTING_POSITION, 4)
+    np.testing.assert_array_equal(stats.mean, expected.mean)
+
+
+def test_key_tells_policies_apart():
+    from pybg.gnubg.rollout import SearchPolicy, pubeval_win_probability
+
+    keys = {
+        RolloutFarm(policy=SearchPolicy(pubeval_win_probability, ply=ply))._key(
+            "4HPwATDgc/ABMA", 4
+        )
+        for ply in (1, 2, 1)
+    }
+    assert len(keys) == 2
+
+
+def test_settings_that_cannot_describe_themselves_are_rejected():
+    with pytest.raises(TypeError):
+        RolloutFarm(luck_evaluator=lambda position: 0.5)
+
+
+def test_progress_merges_chunks_like_a_single_pass():
+    reports = []
+    stats = RolloutFarm(workers=1, chunk_size=2, seed=5, truncate_at=2).run(
+        STARTING_POSITION, 6, progress=reports.append
+    )
+    assert [r.trials for r in reports] == [2, 4, 6]
+    np.testing.assert_allclose(reports[-1].mean, stats.mean)
+    np.testing.assert_allclose(reports[-1].m2, stats.m2, atol=1e-12)
@@ -0,0 +1,85 @@
+import pytest
+
+from pybg.agents.search_agent import SearchAgent
+from pybg.core.board import Board, generate_plays
+from pybg.gnubg.position import Position
+from pybg.gnubg.search import (
+    IterativeDeepeningSearch,
+    SearchResult,
+    WEIGHTED_ROLLS,
+    pubeval_evaluator,
+)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def opening_plays():
+    board = Board(position_id="4HPwATDgc/ABMA")
+    board.match.dice = (3, 1)
+    return board.generate_plays()
+
+
+def test_weighted_rolls_cover_36():
+    assert len(WEIGHTED_ROLLS) == 21
+    assert sum(weight for _, weight in WEIGHTED_ROLLS) == 36
+
+
+def test_generate_plays_matches_board(opening_plays):
+    position = Position.decode("4HPwATDgc/ABMA")
+    plays = generate_plays(position, (3, 1))
+    assert {p.position for p in plays} == {p.position for p in opening_plays}
+
+
+def test_zero_ply_ranking(opening_plays):
+    search = IterativeDeepeningSearch(max_ply=0)
+    result = search.search(opening_plays)
+    assert isinstance(result, SearchResult)
+    assert result.depth == 0
+    assert result.nodes == len(opening_plays)
+    assert len(result.ranked) == len(opening_plays)
+    scores = [score for score, _ in result.ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert result.best_play is result.ranked[0][1]
+
+
+def test_one_ply_reaches_depth(opening_plays):
+    search = IterativeDeepeningSearch(max_ply=1, move_filter={1: 2})
+    result = search.search(opening_plays)
+    assert result.depth == 1
+    assert len(result.nodes_per_depth) == 2
+    assert result.nodes_per_depth[1] > 2 * 21
+    assert not result.timed_out
+    assert len(result.ranked) == len(opening_plays)
+    assert 0.0 <= result.ranked[0][0] <= 1.0
+
+
+def test_deadline_returns_best_so_far(opening_plays):
+    search = IterativeDeepeningSearch(max_ply=2)
+    result = search.search(opening_plays, time_ms=0.0)
+    assert result.timed_out
+    assert result.depth == 0
+    assert result.best_play in opening_plays
+
+    result = search.search(opening_plays, time_ms=50.0)
+    assert result.depth >= 0
+    assert result.best_play is not None
+    assert result.timed_out
+
+
+def test_agent_with_no_time_still_moves(opening_plays):
+    agent = SearchAgent(None, [], time_ms=0)
+    actions = agent.make_decision(legal_plays=opening_plays)
+    assert actions
+    assert all(action[0] == "move" for action in actions)
+
+
+def test_pubeval_evaluator_won_position():
+    position = Position(
+        board_points=(0,) * 18 + (-3, -3, -3, -3, -3, 0),
+        player_bar=0,
+        player_off=15,
+        opponent_bar=0,
+        opponent_off=0,
+    )
+    assert pubeval_evaluator(position) == 1.0
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pytest
+import torch
+
+from pybg.core.board import Board, generate_plays
+from pybg.gnubg.neural_net import GnubgEvaluator
+from pybg.gnubg.position import PositionClass
+from pybg.gnubg.torch_nn import TorchGnubgEvaluator
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def positions():
+    """
+    Contact and race positions from random games.
+    """
+    rng = random.Random(1)
+    position = Board().position
+    found = []
+    while sum(p.classify() == PositionClass.RACE for p in found) < 50:
+        plays = generate_plays(position, (rng.randint(1, 6), rng.randint(1, 6)))
+        if not plays:
+            position = position.swap_players()
+            continue
+        play = rng.choice(plays)
+        if play.position.classify() in (PositionClass.CONTACT, PositionClass.RACE):
+            found.append(play.position)
+        position = play.position.swap_players()
+        if position.opponent_off == 15:
+            position = Board().position
+    return found
+
+
+@pytest.fixture(scope="module")
+def expected(positions):
+    return GnubgEvaluator().evaluate_batch(positions)
+
+
+def test_batch_matches_numpy(positions, expected):
+    evaluator = TorchGnubgEvaluator.from_weights(threads=1)
+    np.testing.assert_allclose(evaluator.evaluate_batch(positions), expected, atol=5e-5)
+    assert torch.get_num_threads() == 1
+
+
+def test_double_precision_matches_numpy_exactly(positions, expected):
+    evaluator = TorchGnubgEvaluator.from_weights(dtype=torch.float64)
+    np.testing.assert_allclose(
+        evaluator.evaluate_batch(positions), expected, atol=1e-12
+    )
+
+
+def test_scripted_export_round_trips(tmp_path, positions, expected):
+    path = str(tmp_path / "nets.pt")
+    exported = TorchGnubgEvaluator.load(path)
+    loaded = TorchGnubgEvaluator.load(path)
+    assert isinstance(loaded.networks, torch.jit.ScriptModule)
+    assert loaded.network_mapping.keys() == exported.network_mapping.keys()
+    np.testing.assert_allclose(loaded.evaluate_batch(positions), expected, atol=5e-5)
+
+
+def test_evaluate_keys_match_numpy(positions):
+    numpy_result = GnubgEvaluator().evaluate(positions[0])
+    torch_result = TorchGnubgEvaluator.from_weights().evaluate(positions[0])
+    assert torch_result.keys() == numpy_result.keys()
+    for key, value in numpy_result.items():
+        assert torch_result[key] == pytest.approx(value, abs=5e-5)
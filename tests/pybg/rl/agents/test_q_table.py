@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+import pytest
+
+from pybg.rl.agents.q_table import QTable, pack, pack_state
+from pybg.rl.agents.random import RandomSarsaAgent
+from pybg.rl.agents.sarsa import SarsaAgent
+from pybg.rl.sarsa_train import train
+
+pytestmark = pytest.mark.unit
+
+STATE = "6B0100040030000E50000C0E000020"
+
+
+def test_pack_state_reads_every_point():
+    counts = []
+    w0, w1, w2 = pack_state(STATE)
+    for point in range(24):
+        word, slot = divmod(point, 10)
+        counts.append((((w0, w1, w2)[word] >> (6 * slot)) & 63) - 17)
+
+    assert w0 >> 60 == 6
+    assert counts[:12] == [-2, 0, 1, 0, 0, 4, 0, 3, 0, 0, 0, -5]
+    assert counts[12:] == [5, 0, 0, 0, -3, 0, -5, 0, 0, 0, 0, 2]
+    assert pack(STATE, ("move", 5, 2)) != pack(STATE, ("hit", 5, 2))
+    with pytest.raises(ValueError):
+        pack_state(STATE + "0")
+
+
+def test_table_grows_and_matches_a_dict():
+    rng = random.Random(0)
+    table, expected = QTable(4), {}
+    actions = [("move", i, i - 2) for i in range(2, 24)] + [("bearoff", 3)]
+    for action in actions:
+        expected[(STATE, action)] = table[(STATE, action)] = rng.random()
+    table[(STATE, actions[0])] = expected[(STATE, actions[0])] = -1.0
+
+    assert len(table) == len(expected)
+    assert len(table.values) >= 2 * len(table)
+    for key, value in expected.items():
+        assert table[key] == pytest.approx(value)
+    assert (STATE, ("bearoff", 4)) not in table
+    assert table.get((STATE, ("bearoff", 4))) is None
+
+    looked_up = table.lookup(STATE, actions + [("bearoff", 4)], default=9.0)
+    assert np.allclose(looked_up[:-1], [expected[(STATE, a)] for a in actions])
+    assert looked_up[-1] == 9.0
+
+
+def test_agent_learns_like_a_dict_agent_and_saves_without_pickle(tmp_path):
+    agents = []
+    for q in ({}, None):
+        random.seed(0)
+        agent = SarsaAgent()
+        if q is not None:
+            agent.q = q
+        for _ in range(5):
+            train(agent, RandomSarsaAgent("opponent"), 100)
+        agents.append(agent)
+    dict_agent, agent = agents
+
+    assert isinstance(agent.q, QTable)
+    assert len(agent.q) == len(dict_agent.q)
+    for key, value in dict_agent.q.items():
+        assert agent.q[key] == pytest.approx(value)
+
+    path = str(tmp_path / "sarsa.npz")
+    dict_agent.save(path)
+    loaded = SarsaAgent.load(path)
+    assert (loaded.epsilon, loaded.alpha, loaded.gamma) == (0.2, 0.2, 0.9)
+    assert len(loaded.q) == len(agent.q)
+    for key, value in dict_agent.q.items():
+        assert loaded.getQ(*key) == pytest.approx(value)
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import generate_plays
+from pybg.rl.agents.agent import Agent
+from pybg.gnubg.position import Position
+from pybg.rl.envs.backgammon_envs import (
+    BackgammonAfterstateEnv,
+    BackgammonMaskableEnv,
+    BackgammonRandomContinuousEnv,
+    afterstate_features,
+    first_moves,
+    game_points,
+    move_action,
+)
+from pybg.rl.game import ALL_ACTIONS
+
+pytestmark = pytest.mark.unit
+
+
+class MaskedRandomAgent(Agent):
+    def __init__(self):
+        self.masks = []
+
+    def make_decision(self, observation=None, action_mask=None):
+        self.masks.append(action_mask)
+        return int(np.random.choice(np.flatnonzero(action_mask)))
+
+
+def checkers(position):
+    player = sum(max(p, 0) for p in position.board_points)
+    opponent = sum(max(-p, 0) for p in position.board_points)
+    return (
+        player + position.player_bar + position.player_off,
+        opponent + position.opponent_bar + position.opponent_off,
+    )
+
+
+def play_games(env, games, seed=0):
+    rng = np.random.default_rng(seed)
+    env.reset(seed=seed)
+    results = []
+    while len(results) < games:
+        mask = env.action_masks()
+        assert mask.any()
+        _, _, terminated, truncated, info = env.step(rng.choice(np.flatnonzero(mask)))
+        assert checkers(env.position) == (15, 15)
+        if terminated or truncated:
+            results.append(info.get("is_success"))
+            env.reset()
+    return results
+
+
+def test_reset_observation_and_mask():
+    env = BackgammonMaskableEnv()
+    obs, _ = env.reset(seed=1)
+
+    assert env.observation_space.contains(obs)
+    mask = env.action_masks()
+    assert mask.shape == (len(ALL_ACTIONS),)
+    assert mask.any()
+
+
+def test_mask_matches_generate_plays():
+    env = BackgammonMaskableEnv()
+    env.reset(seed=2)
+    dice = tuple(env.dice[:2])
+    plays = [p for p in generate_plays(env.position, dice) if p.moves]
+
+    expected = {move_action(env.position, move) for move in first_moves(plays)}
+
+    assert set(np.flatnonzero(env.action_masks())) == expected
+
+
+def test_turn_plays_a_legal_play():
+    env = BackgammonMaskableEnv()
+    env.reset(seed=3)
+    start, dice = env.position, tuple(env.dice[:2])
+    legal = {p.position for p in generate_plays(start, dice)}
+
+    while env.plays:
+        env.play(first_moves(env.plays)[-1])
+
+    assert env.position in legal
+
+
+def test_random_games_finish():
+    results = play_games(BackgammonMaskableEnv(), games=3)
+
+    assert len(results) == 3
+    assert all(result in (True, False) for result in results)
+
+
+def test_agent_opponent_chooses_from_its_mask():
+    opponent = MaskedRandomAgent()
+    play_games(BackgammonMaskableEnv(opponent), games=1, seed=4)
+
+    assert opponent.masks
+    assert all(mask.any() for mask in opponent.masks)
+
+
+def test_random_continuous_env_plays_random_opponents_by_default():
+    opponent = MaskedRandomAgent()
+
+    assert BackgammonRandomContinuousEnv().opponent is None
+    assert BackgammonRandomContinuousEnv(opponent).opponent is opponent
+
+
+def test_invalid_action_is_penalised():
+    env = BackgammonMaskableEnv()
+    env.reset(seed=5)
+    invalid = np.flatnonzero(~env.action_masks())[0]
+
+    _, reward, _, _, info = env.step(invalid)
+
+    assert reward == -10
+    assert info["invalid actions taken"] == 1
+
+
+def test_afterstate_observation_lists_legal_plays():
+    env = BackgammonAfterstateEnv()
+    obs, _ = env.reset(seed=6)
+    plays = generate_plays(env.position, tuple(env.dice[:2]))
+
+    mask = env.action_masks()
+    assert obs.shape == (env.max_plays, 54)
+    assert mask.sum() == len(plays)
+    assert np.array_equal(
+        obs[: len(plays)], afterstate_features([p.position for p in plays])
+    )
+    assert not obs[len(plays) :].any()
+
+
+def test_afterstate_games_end_with_points():
+    env = BackgammonAfterstateEnv(max_plays=32)
+    env.reset(seed=7)
+    rng = np.random.default_rng(7)
+    rewards = []
+    while len(rewards) < 3:
+        mask = env.action_masks()
+        assert 0 < mask.sum() <= 32
+        _, reward, terminated, truncated, info = env.step(
+            rng.choice(np.flatnonzero(mask))
+        )
+        assert checkers(env.position) == (15, 15)
+        if terminated or truncated:
+            rewards.append(reward)
+            assert (reward > 0) == info["is_success"]
+            env.reset()
+        else:
+            assert reward == 0
+    assert all(abs(r) in (1, 2, 3) for r in rewards)
+
+
+@pytest.mark.parametrize(
+    "opponent_bar,opponent_off,home,points",
+    [(0, 1, 0, 1), (0, 0, 0, 2), (1, 0, 0, 3), (0, 0, -1, 3)],
+)
+def test_game_points(opponent_bar, opponent_off, home, points):
+    board = [0] * 24
+    board[0] = home
+    board[12] = -(15 - opponent_bar - opponent_off + home)
+    position = Position(tuple(board), 0, 15, opponent_bar, opponent_off)
+
+    assert game_points(position) == points
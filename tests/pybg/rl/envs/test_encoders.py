@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import generate_plays
+from pybg.gnubg.neural_net import encode_board
+from pybg.gnubg.position import Position
+from pybg.rl.envs.backgammon_envs import observation
+from pybg.rl.envs.encoders import GnubgEncoder, LegacyEncoder, ObservationEncoder
+from pybg.rl.envs.vec_env import BackgammonVecEnv
+
+pytestmark = pytest.mark.unit
+
+
+def positions():
+    start = Position.decode("4HPwATDgc/ABMA")
+    found = [start, Position((0,) * 24, 0, 15, 0, 13)]
+    for dice in [(3, 1), (6, 6), (5, 2)]:
+        for play in generate_plays(start, dice):
+            found.append(play.position.swap_players())
+    return found + [barred(), barred().swap_players()]
+
+
+def barred():
+    board = list(Position.decode("4HPwATDgc/ABMA").board_points)
+    board[23] -= 1
+    board[0] += 2
+    return Position(tuple(board), 1, 0, 2, 0)
+
+
+@pytest.mark.parametrize("size", [250, 200, 100])
+def test_gnubg_encoder_matches_encode_board(size):
+    found = positions()
+
+    encoded = GnubgEncoder(size).encode_positions(found)
+
+    assert np.array_equal(encoded, np.stack([encode_board(p, size) for p in found]))
+
+
+def test_legacy_encoder_matches_observation_layout():
+    position = barred()
+
+    obs = LegacyEncoder().encode_position(position, [5, 3, 0])
+
+    assert list(obs[:6]) == [
+        5,
+        3,
+        position.player_bar,
+        position.opponent_bar,
+        position.player_off,
+        position.opponent_off,
+    ]
+    for i, p in enumerate(position.board_points):
+        assert obs[6 + 2 * i] == (1 if p > 0 else 2 if p < 0 else 0)
+        assert obs[7 + 2 * i] == abs(p)
+
+
+@pytest.mark.parametrize("encoder", [LegacyEncoder(), GnubgEncoder()])
+def test_encoders_write_into_rows_of_a_batch(encoder):
+    found = positions()
+    batch = np.full((len(found) + 2, encoder.size), -1.0, dtype=np.float32)
+
+    result = encoder.encode_positions(found, batch[1:-1])
+    encoder.encode_position(found[0], out=batch[-1])
+
+    assert np.shares_memory(result, batch)
+    assert (batch[0] == -1).all()
+    assert np.array_equal(batch[1:-1], encoder.encode_positions(found))
+    assert np.array_equal(batch[-1], batch[1])
+    assert all(encoder.space().contains(row) for row in batch[1:])
+
+
+def test_encoders_must_implement_encode():
+    class SpaceOnly(ObservationEncoder):
+        size = 1
+
+        def space(self):
+            return LegacyEncoder().space()
+
+    with pytest.raises(TypeError):
+        SpaceOnly()
+    with pytest.raises(TypeError):
+        ObservationEncoder()
+
+
+def test_single_env_observation_uses_the_legacy_layout():
+    position = Position.decode("4HPwATDgc/ABMA")
+
+    assert np.array_equal(
+        observation(position, [6, 1]), LegacyEncoder().encode_position(position, [6, 1])
+    )
+
+
+def test_vec_env_gnubg_observations():
+    env = BackgammonVecEnv(4, seed=0, observation="gnubg")
+    first = env.reset()
+    kept = first.copy()
+    obs, _, _, _ = env.step(np.argmax(env.action_masks(), axis=1))
+
+    assert obs.shape == (4, 250)
+    assert not np.shares_memory(first, obs)
+    assert np.array_equal(first, kept)
+    assert np.array_equal(obs, GnubgEncoder()(env.points, env.bar, env.off))
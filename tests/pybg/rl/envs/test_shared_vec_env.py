@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from pybg.rl.envs.backgammon_envs import (
+    BackgammonAfterstateEnv,
+    BackgammonMaskableEnv,
+)
+from pybg.rl.envs.shared_vec_env import SharedMemoryVecEnv
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def vec_env():
+    env = SharedMemoryVecEnv([BackgammonMaskableEnv] * 2, start_method="fork")
+    yield env
+    env.close()
+
+
+def test_masks_come_from_shared_memory(vec_env):
+    vec_env.seed(0)
+    obs = vec_env.reset()
+
+    assert obs.shape == (2, 54)
+    assert np.array_equal(obs[0], vec_env.env_method("get_observation")[0])
+    masks = np.stack(vec_env.env_method("action_masks"))
+    assert np.array_equal(masks, np.stack(vec_env.env_method("get_action_mask")))
+
+
+def test_steps_until_games_finish(vec_env):
+    vec_env.reset()
+    rng = np.random.default_rng(0)
+    finished = 0
+    while finished < 2:
+        masks = vec_env.action_masks()
+        actions = np.argmax(np.where(masks, rng.random(masks.shape), -1.0), axis=1)
+        obs, rewards, dones, infos = vec_env.step(actions)
+        for row in np.flatnonzero(dones):
+            finished += 1
+            assert infos[row]["terminal_observation"].shape == (54,)
+            assert "is_success" in infos[row]
+        assert np.array_equal(
+            vec_env.action_masks(), np.stack(vec_env.env_method("get_action_mask"))
+        )
+        assert rewards.dtype == np.float32
+
+
+def test_afterstate_observations():
+    env = SharedMemoryVecEnv([BackgammonAfterstateEnv] * 2, start_method="fork")
+    try:
+        obs = env.reset()
+        first = obs.copy()
+        next_obs, _, _, _ = env.step(np.zeros(2, dtype=np.int64))
+
+        assert next_obs.shape == (2, 256, 54)
+        assert np.array_equal(obs, first)
+        assert np.array_equal(next_obs[1], env.env_method("get_observation")[1])
+    finally:
+        env.close()
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from pybg.core.board import generate_plays
+from pybg.gnubg.position import Position
+from pybg.rl.envs.vec_env import (
+    BAR,
+    CHECKERS,
+    DESTINATION,
+    OFF,
+    BackgammonVecEnv,
+    legal_moves,
+)
+from pybg.rl.game import ALL_ACTIONS
+
+pytestmark = pytest.mark.unit
+
+
+def random_actions(env, rng):
+    masks = env.action_masks()
+    return np.argmax(np.where(masks, rng.random(masks.shape), -1.0), axis=1)
+
+
+def core_moves(env, row):
+    """
+    Single-checker moves for the agent's remaining dice from generate_plays.
+    """
+    position = Position(
+        tuple(int(p) for p in env.points[row]),
+        int(env.bar[row, 0]),
+        int(env.off[row, 0]),
+        int(env.bar[row, 1]),
+        int(env.off[row, 1]),
+    )
+    moves = set()
+    for die in {int(d) for d in env.dice[row] if d}:
+        for play in generate_plays(position, (die, die), partial=True):
+            if len(play.moves) == 1:
+                moves.add((play.moves[0].source, play.moves[0].destination))
+    return moves
+
+
+def env_moves(env, row):
+    moves = set()
+    for source, k in zip(*np.nonzero(env.legal[row])):
+        destination = DESTINATION[source, k]
+        moves.add(
+            (
+                -1 if source == BAR else int(source),
+                -1 if destination == OFF else int(destination),
+            )
+        )
+    return moves
+
+
+def test_reset_observations_and_masks():
+    env = BackgammonVecEnv(8, seed=0)
+    obs = env.reset()
+
+    assert obs.shape == (8, 54)
+    assert obs.dtype == np.float32
+    assert env.observation_space.contains(obs[0])
+    masks = env.action_masks()
+    assert masks.shape == (8, len(ALL_ACTIONS))
+    assert masks.any(axis=1).all()
+    assert np.stack(env.env_method("action_masks")).shape == masks.shape
+
+
+def test_legal_moves_match_generate_plays():
+    env = BackgammonVecEnv(4, seed=1)
+    env.reset()
+    rng = np.random.default_rng(1)
+    for _ in range(300):
+        for row in range(env.num_envs):
+            assert env_moves(env, row) == core_moves(env, row)
+        env.step(random_actions(env, rng))
+
+
+def test_bear_off_with_larger_die_only_from_highest_point():
+    own = np.zeros((1, 24), dtype=np.int8)
+    own[0, [1, 3]] = 1
+    opponent = np.zeros((1, 24), dtype=np.int8)
+    dice = np.zeros((1, 6), dtype=bool)
+    dice[0, 5] = True
+
+    legal, _ = legal_moves(own, opponent, np.zeros(1, dtype=np.int8), dice)
+
+    assert legal[0, 3, 5]
+    assert not legal[0, 1, 5]
+
+
+def test_games_conserve_checkers_and_finish():
+    env = BackgammonVecEnv(16, seed=2)
+    env.reset()
+    rng = np.random.default_rng(2)
+    finished = 0
+    for _ in range(500):
+        obs, rewards, dones, infos = env.step(random_actions(env, rng))
+        for side in (1, -1):
+            on_board = np.maximum(side * env.points.astype(int), 0).sum(axis=1)
+            column = 0 if side == 1 else 1
+            total = on_board + env.bar[:, column] + env.off[:, column]
+            assert (total == CHECKERS).all()
+        for row in np.flatnonzero(dones):
+            finished += 1
+            assert infos[row]["terminal_observation"].shape == (54,)
+            assert "is_success" in infos[row]
+        assert env.action_masks().any(axis=1).all()
+    assert finished > 0
+
+
+def test_invalid_action_is_penalised_and_replaced():
+    env = BackgammonVecEnv(2, seed=3)
+    env.reset()
+    masks = env.action_masks()
+    actions = np.array([np.flatnonzero(~masks[0])[0], np.flatnonzero(masks[1])[0]])
+
+    _, rewards, _, infos = env.step(actions)
+
+    assert rewards[0] == -10
+    assert rewards[1] >= 0
+    assert infos[0]["invalid actions taken"] == 1
+    assert infos[1]["invalid actions taken"] == 0
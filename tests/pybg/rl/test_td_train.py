@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import torch
+
+from pybg.gnubg.neural_net import GnubgEvaluator
+from pybg.rl.td_train import TDLambdaTrainer, mirror, random_network
+
+pytestmark = pytest.mark.unit
+
+
+def autograd_traces(trainer, row):
+    """
+    Gradients of the row's values by autograd, one list per output.
+    """
+    model = trainer.model
+    x = torch.from_numpy(trainer.encoder.encode_positions(trainer.positions))
+    parameters = list(trainer.parameters)
+    for parameter in parameters:
+        parameter.requires_grad_(True)
+    try:
+        hidden = torch.sigmoid(-model.beta_hidden * model.hidden(x))
+        outputs = torch.sigmoid(-model.beta_output * model.output(hidden))
+        values = mirror(outputs, trainer.second)
+        return [
+            torch.autograd.grad(values[row, k], parameters, retain_graph=True)
+            for k in range(5)
+        ]
+    finally:
+        for parameter in parameters:
+            parameter.requires_grad_(False)
+
+
+@pytest.mark.parametrize("plies", [0, 1])
+def test_traces_are_value_gradients(plies):
+    trainer = TDLambdaTrainer(random_network(hidden=8, seed=0), games=2, lamda=0.0)
+    for _ in range(plies):
+        trainer.step()
+
+    expected = autograd_traces(trainer, 1)
+
+    assert bool(trainer.second[1]) == bool(plies)
+    for k, gradients in enumerate(expected):
+        for gradient, trace in zip(gradients, trainer.traces):
+            assert torch.allclose(gradient, trace[1, k], atol=1e-6)
+
+
+def test_training_moves_the_weights_and_reports_speed():
+    trainer = TDLambdaTrainer(random_network(hidden=8, seed=1), games=4, seed=1)
+    before = trainer.model.hidden.weight.clone()
+
+    stats = trainer.train(2)
+
+    assert stats["games"] >= 2
+    assert stats["games_per_second"] > 0
+    assert trainer.trained == stats["games"]
+    assert not torch.equal(before, trainer.model.hidden.weight)
+
+
+def test_saved_weights_evaluate_like_the_trainer(tmp_path):
+    trainer = TDLambdaTrainer(random_network(hidden=8, seed=2), games=2, seed=2)
+    trainer.train(1)
+    path = tmp_path / "td.weights"
+
+    trainer.save(str(path))
+    evaluator = GnubgEvaluator(str(path))
+
+    net = evaluator.network_mapping[trainer.positions[0].classify()][0]
+    assert net.nTrained == trainer.trained
+    outputs = evaluator.evaluate_batch(trainer.positions)
+    with torch.no_grad():
+        expected = trainer._forward(
+            torch.from_numpy(trainer.encoder.encode_positions(trainer.positions))
+        )[1]
+    assert np.allclose(outputs, expected.numpy(), atol=1e-4)